@@ -1,14 +1,12 @@
 from flask import Flask, render_template, Response, request, jsonify, session, redirect, url_for, send_file
 import cv2
 import threading
-import time
 import sys
 import traceback
 import logging
 import os
 import uuid
-import subprocess
-import shutil
+import functools
 from werkzeug.utils import secure_filename
 import numpy as np
 
@@ -22,13 +20,16 @@ logging.basicConfig(level=logging.DEBUG,
                    handlers=[logging.StreamHandler()])
 logger = logging.getLogger(__name__)
 try:
-    from pose_estimation.estimation import PoseEstimator
-    from exercises.squat import Squat
-    from exercises.hammer_curl import HammerCurl
-    from exercises.push_up import PushUp
-    from feedback.information import get_exercise_info
-    from feedback.layout import layout_indicators
-    from utils.draw_text_with_background import draw_text_with_background
+    from feedback.movement_suggestions import SUGGESTION_CATALOG
+    from streaming.live_engine import LiveEngine
+    from streaming.broadcaster import FrameBroadcaster
+    from sessions.registry import SessionRegistry, SessionLimitError
+    from streaming.frame_ingest import FrameTooLargeError, UnsupportedFrameError
+    from processing.job_queue import VideoJobQueue, QueueFullError, JobActiveError
+    from processing.landmark_cache import LandmarkCache
+    from pose_estimation.autotune import PoseAutotuner, start_calibration
+    from pose_estimation.smoothing import create_pose_smoother
+    from processing.timeline import iter_record_bytes, open_timeline, records_to_json, timeline_layout, timeline_path
     logger.info("Successfully imported pose estimation modules")
 except ImportError as e:
     logger.error(f"Failed to import required modules: {e}")
@@ -74,119 +75,121 @@ os.makedirs(PROCESSED_FOLDER, exist_ok=True)
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['PROCESSED_FOLDER'] = PROCESSED_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = 500 * 1024 * 1024
+app.config['MAX_SESSIONS'] = int(os.environ.get('HOMEFIT_MAX_SESSIONS', 4))
+app.config['SESSION_IDLE_TIMEOUT'] = int(os.environ.get('HOMEFIT_SESSION_IDLE_TIMEOUT', 300))
+app.config['VIDEO_WORKERS'] = int(os.environ.get('HOMEFIT_VIDEO_WORKERS', 2))
+app.config['VIDEO_QUEUE_SIZE'] = int(os.environ.get('HOMEFIT_VIDEO_QUEUE_SIZE', 8))
+app.config['VIDEO_SEGMENTS'] = int(os.environ.get('HOMEFIT_VIDEO_SEGMENTS', 1))
+app.config['VIDEO_MAX_STRIDE'] = int(os.environ.get('HOMEFIT_VIDEO_MAX_STRIDE', 4))
+app.config['LANDMARK_CACHE_DIR'] = os.environ.get('HOMEFIT_LANDMARK_CACHE_DIR', os.path.join('cache', 'landmarks'))
+# Set to 0 to disable the landmark cache
+app.config['LANDMARK_CACHE_MB'] = int(os.environ.get('HOMEFIT_LANDMARK_CACHE_MB', 1024))
+# Autotuning of model complexity and inference size; 0 keeps the fixed defaults
+app.config['LIVE_TARGET_FPS'] = float(os.environ.get('HOMEFIT_LIVE_TARGET_FPS', 0))
+# Seconds of processing allowed per second of uploaded video
+app.config['VIDEO_TIME_BUDGET'] = float(os.environ.get('HOMEFIT_VIDEO_TIME_BUDGET', 0))
+# Pose inference on a crop around the body; pays off for frames well above 1080p
+app.config['POSE_ROI_TRACKING'] = os.environ.get('HOMEFIT_POSE_ROI_TRACKING', 'false').lower() == 'true'
+# Most people a group (multi_person) session tracks
+app.config['MAX_PEOPLE'] = int(os.environ.get('HOMEFIT_MAX_PEOPLE', 6))
+# One Euro landmark smoothing of live sessions; a min cutoff of 0 counts reps on raw landmarks
+app.config['POSE_SMOOTHING_MIN_CUTOFF'] = float(os.environ.get('HOMEFIT_POSE_SMOOTHING_MIN_CUTOFF', 1.0))
+app.config['POSE_SMOOTHING_BETA'] = float(os.environ.get('HOMEFIT_POSE_SMOOTHING_BETA', 20.0))
+# Frames uploaded by the browser (sessions without a server camera): queued per session before
+# the oldest is dropped, the largest compressed frame accepted and its most pixels
+app.config['INGEST_QUEUE_SIZE'] = int(os.environ.get('HOMEFIT_INGEST_QUEUE_SIZE', 2))
+app.config['INGEST_MAX_FRAME_KB'] = int(os.environ.get('HOMEFIT_INGEST_MAX_FRAME_KB', 1024))
+app.config['INGEST_MAX_FRAME_PIXELS'] = int(os.environ.get('HOMEFIT_INGEST_MAX_FRAME_PIXELS', 1920 * 1080))
+# Most frames per second sent to each /video_feed viewer; 0 sends every processed frame
+app.config['STREAM_MAX_FPS'] = float(os.environ.get('HOMEFIT_STREAM_MAX_FPS', 0))
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 # Global variables
 camera = None
-output_frame = None
-lock = threading.Lock()
-exercise_running = False
-current_exercise = None
-current_exercise_data = None
-exercise_counter = 0
-exercise_goal = 0
-sets_completed = 0
-sets_goal = 0
-workout_start_time = None
-
-video_processing_progress = {}
+# Session whose workout is tracked on the server camera's frames
+camera_session_id = None
+
+live_autotuner = None
+if app.config['LIVE_TARGET_FPS'] > 0:
+    live_autotuner = PoseAutotuner(target_latency=1.0 / app.config['LIVE_TARGET_FPS'])
+    start_calibration(live_autotuner, frame_shape=(480, 640, 3))
+
+pose_smoother_factory = None
+if app.config['POSE_SMOOTHING_MIN_CUTOFF'] > 0:
+    pose_smoother_factory = functools.partial(create_pose_smoother,
+                                              min_cutoff=app.config['POSE_SMOOTHING_MIN_CUTOFF'],
+                                              beta=app.config['POSE_SMOOTHING_BETA'])
+
+sessions = SessionRegistry(max_sessions=app.config['MAX_SESSIONS'],
+                           idle_timeout=app.config['SESSION_IDLE_TIMEOUT'],
+                           autotuner=live_autotuner,
+                           roi_tracking=app.config['POSE_ROI_TRACKING'],
+                           max_people=app.config['MAX_PEOPLE'],
+                           smoother_factory=pose_smoother_factory,
+                           ingest_queue_size=app.config['INGEST_QUEUE_SIZE'],
+                           ingest_max_frame_bytes=app.config['INGEST_MAX_FRAME_KB'] * 1024,
+                           ingest_max_frame_pixels=app.config['INGEST_MAX_FRAME_PIXELS'])
+
+# Set while a camera is open so idle live pipelines can block instead of spinning
+camera_ready = threading.Event()
+
+landmark_cache = None
+if app.config['LANDMARK_CACHE_MB'] > 0:
+    landmark_cache = LandmarkCache(app.config['LANDMARK_CACHE_DIR'],
+                                   max_bytes=app.config['LANDMARK_CACHE_MB'] * 1024 * 1024)
+
+video_jobs = VideoJobQueue(app.config['PROCESSED_FOLDER'],
+                           workers=app.config['VIDEO_WORKERS'],
+                           max_queued=app.config['VIDEO_QUEUE_SIZE'],
+                           landmark_cache=landmark_cache,
+                           time_budget=app.config['VIDEO_TIME_BUDGET'],
+                           roi_tracking=app.config['POSE_ROI_TRACKING'])
 
 def initialize_camera():
     global camera
     if camera is None:
         camera = cv2.VideoCapture(0)
+    camera_ready.set()
     return camera
 
 def release_camera():
     global camera
+    camera_ready.clear()
     if camera is not None:
         camera.release()
         camera = None
 
-def generate_frames():
-    global output_frame, lock, exercise_running, current_exercise, current_exercise_data
-    global exercise_counter, exercise_goal, sets_completed, sets_goal
+def get_session_id():
+    if 'session_id' not in session:
+        session['session_id'] = str(uuid.uuid4())
+    return session['session_id']
+
+def annotate_frame(frame):
+    exercise_session = sessions.get(camera_session_id, touch=False) if camera_session_id else None
     
-    pose_estimator = PoseEstimator()
+    if exercise_session and exercise_session.running:
+        return exercise_session.process_frame(frame)
     
-    while True:
-        if camera is None:
-            continue
-            
-        success, frame = camera.read()
-        if not success:
-            continue
-        
-        if exercise_running and current_exercise:
-            results = pose_estimator.estimate_pose(frame, current_exercise_data['type'])
-            
-            if results.pose_landmarks:
-                if current_exercise_data['type'] == "squat":
-                    counter, angle, stage, suggestions = current_exercise.track_squat(results.pose_landmarks.landmark, frame)
-                    layout_indicators(frame, current_exercise_data['type'], (counter, angle, stage, suggestions))
-                    exercise_counter = counter
-                    
-                elif current_exercise_data['type'] == "push_up":
-                    counter, angle, stage, suggestions = current_exercise.track_push_up(results.pose_landmarks.landmark, frame)
-                    layout_indicators(frame, current_exercise_data['type'], (counter, angle, stage, suggestions))
-                    exercise_counter = counter
-                    
-                elif current_exercise_data['type'] == "hammer_curl":
-                    (counter_right, angle_right, counter_left, angle_left,
-                     warning_message_right, warning_message_left, progress_right, 
-                     progress_left, stage_right, stage_left, suggestions_right, suggestions_left) = current_exercise.track_hammer_curl(
-                        results.pose_landmarks.landmark, frame)
-                    layout_indicators(frame, current_exercise_data['type'], 
-                                     (counter_right, angle_right, counter_left, angle_left,
-                                      warning_message_right, warning_message_left, 
-                                      progress_right, progress_left, stage_right, stage_left,
-                                      suggestions_right, suggestions_left))
-                    exercise_counter = max(counter_right, counter_left)
-                
-                # Display exercise information
-                exercise_info = get_exercise_info(current_exercise_data['type'])
-                draw_text_with_background(frame, f"Exercise: {exercise_info.get('name', 'N/A')}", (40, 50),
-                                         cv2.FONT_HERSHEY_DUPLEX, 0.7, (255, 255, 255), (118, 29, 14), 1)
-                draw_text_with_background(frame, f"Reps Goal: {exercise_goal}", (40, 80),
-                                         cv2.FONT_HERSHEY_DUPLEX, 0.7, (255, 255, 255), (118, 29, 14), 1)
-                draw_text_with_background(frame, f"Sets Goal: {sets_goal}", (40, 110),
-                                         cv2.FONT_HERSHEY_DUPLEX, 0.7, (255, 255, 255), (118, 29, 14), 1)
-                draw_text_with_background(frame, f"Current Set: {sets_completed + 1}", (40, 140),
-                                         cv2.FONT_HERSHEY_DUPLEX, 0.7, (255, 255, 255), (118, 29, 14), 1)
-                
-                # Check if rep goal is reached for current set
-                if exercise_counter >= exercise_goal:
-                    sets_completed += 1
-                    exercise_counter = 0
-                    # Reset exercise counter in the appropriate exercise object
-                    if current_exercise_data['type'] == "squat" or current_exercise_data['type'] == "push_up":
-                        current_exercise.counter = 0
-                    elif current_exercise_data['type'] == "hammer_curl":
-                        current_exercise.counter_right = 0
-                        current_exercise.counter_left = 0
-                    
-                    # Check if all sets are completed
-                    if sets_completed >= sets_goal:
-                        exercise_running = False
-                        draw_text_with_background(frame, "WORKOUT COMPLETE!", (frame.shape[1]//2 - 150, frame.shape[0]//2),
-                                                cv2.FONT_HERSHEY_DUPLEX, 1.2, (255, 255, 255), (0, 200, 0), 2)
-                    else:
-                        draw_text_with_background(frame, f"SET {sets_completed} COMPLETE! Rest for 30 sec", 
-                                                (frame.shape[1]//2 - 200, frame.shape[0]//2),
-                                                cv2.FONT_HERSHEY_DUPLEX, 1.0, (255, 255, 255), (0, 0, 200), 2)
-        else:
-            cv2.putText(frame, "Select an exercise to begin", (frame.shape[1]//2 - 150, frame.shape[0]//2),
-                       cv2.FONT_HERSHEY_DUPLEX, 0.8, (255, 255, 255), 1)
-                
-        with lock:
-            output_frame = frame.copy()
-            
-        ret, buffer = cv2.imencode('.jpg', output_frame)
-        frame = buffer.tobytes()
-        yield (b'--frame\r\n'
-               b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n')
+    cv2.putText(frame, "Select an exercise to begin", (frame.shape[1]//2 - 150, frame.shape[0]//2),
+               cv2.FONT_HERSHEY_DUPLEX, 0.8, (255, 255, 255), 1)
+    return frame
+
+def create_live_engine():
+    return LiveEngine(lambda: camera, annotate_frame, camera_ready=camera_ready)
+
+def camera_session_running():
+    exercise_session = sessions.get(camera_session_id, touch=False) if camera_session_id else None
+    return exercise_session is not None and exercise_session.running
+
+# One pose pipeline per process, shared by every /video_feed viewer; it stops once nobody
+# watches and no camera session is counting reps
+broadcaster = FrameBroadcaster(create_live_engine, max_fps=app.config['STREAM_MAX_FPS'],
+                               keep_running=camera_session_running)
+
+def generate_frames(max_fps=None, tier=None):
+    return broadcaster.stream(max_fps=max_fps, tier=tier)
 
 @app.route('/')
 def index():
@@ -232,76 +235,157 @@ def dashboard():
 
 @app.route('/video_feed')
 def video_feed():
-    return Response(generate_frames(),
+    # Optional: ?max_fps= to lower this viewer's frame rate, ?tier= to pin its quality tier
+    max_fps = request.args.get('max_fps', type=float)
+    tier = request.args.get('tier', type=int)
+    if tier is not None and tier < 0:
+        tier = None
+    return Response(generate_frames(max_fps=max_fps, tier=tier),
                    mimetype='multipart/x-mixed-replace; boundary=frame')
 
+@app.route('/pose_stream')
+def pose_stream():
+    """Server-Sent Events with the session's landmarks and metrics, for clients drawing their own overlays."""
+    exercise_session = sessions.get(get_session_id())
+    if exercise_session is None or not exercise_session.running:
+        return jsonify({'success': False, 'error': 'No running exercise session'}), 404
+    if exercise_session.ingestor is None:
+        broadcaster.start_engine()
+
+    def events():
+        for event in exercise_session.pose_stream.stream():
+            # Stream clients do not poll /get_status, so keep the session from looking idle
+            exercise_session.touch()
+            yield event
+
+    return Response(events(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/ingest_frame', methods=['POST'])
+def ingest_frame():
+    """
+    Queue one JPEG frame from the browser's camera for the session started with frame_source 'browser'.
+
+    The optional X-Frame-Timestamp header is the capture time in milliseconds
+    on the client's clock; landmark smoothing uses it so network jitter does
+    not look like movement.
+    """
+    exercise_session = sessions.get(get_session_id())
+    if exercise_session is None or exercise_session.ingestor is None or not exercise_session.running:
+        return jsonify({'success': False, 'error': 'No running session fed by this browser'}), 404
+    
+    timestamp = request.headers.get('X-Frame-Timestamp')
+    try:
+        timestamp = float(timestamp) / 1000 if timestamp else None
+    except ValueError:
+        timestamp = None
+    
+    ingestor = exercise_session.ingestor
+    length = request.content_length
+    if length is None:
+        return jsonify({'success': False, 'error': 'Content-Length required'}), 411
+    
+    try:
+        # Refused before the body is read, so an oversized upload is never buffered
+        ingestor.check_length(length)
+        dropped = ingestor.submit(request.stream.read(length), timestamp)
+    except FrameTooLargeError as e:
+        return jsonify({'success': False, 'error': str(e)}), 413
+    except UnsupportedFrameError as e:
+        return jsonify({'success': False, 'error': str(e)}), 415
+    
+    return jsonify({'success': True, 'dropped': dropped}), 202
+
+@app.route('/ingest_stats', methods=['GET'])
+def ingest_stats():
+    return jsonify(sessions.ingest_stats())
+
+@app.route('/suggestion_catalog', methods=['GET'])
+def suggestion_catalog():
+    """The movement suggestions the pose stream refers to by index."""
+    response = jsonify(SUGGESTION_CATALOG)
+    response.cache_control.max_age = 3600
+    return response
+
+@app.route('/stream_stats', methods=['GET'])
+def stream_stats():
+    stats = broadcaster.snapshot()
+    exercise_session = sessions.get(get_session_id(), touch=False)
+    stats['pose_stream'] = exercise_session.pose_stream.snapshot() if exercise_session else None
+    return jsonify(stats)
+
+@app.route('/autotune_status', methods=['GET'])
+def autotune_status():
+    return jsonify({
+        'live': {
+            'target_fps': app.config['LIVE_TARGET_FPS'],
+            **live_autotuner.status()
+        } if live_autotuner else None,
+        'video': {
+            'time_budget': app.config['VIDEO_TIME_BUDGET'],
+            'workers': list(video_jobs.worker_autotune.values())
+        } if app.config['VIDEO_TIME_BUDGET'] > 0 else None
+    })
+
 @app.route('/start_exercise', methods=['POST'])
 def start_exercise():
-    global exercise_running, current_exercise, current_exercise_data
-    global exercise_counter, exercise_goal, sets_completed, sets_goal
-    global workout_start_time
+    global camera_session_id
     
     data = request.json
     exercise_type = data.get('exercise_type')
     sets_goal = int(data.get('sets', 3))
     exercise_goal = int(data.get('reps', 10))
+    multi_person = bool(data.get('multi_person', False))
+    client_overlay = bool(data.get('client_overlay', False))
+    # 'browser' when the camera is on the user's device and frames are uploaded to /ingest_frame
+    browser_frames = data.get('frame_source', 'server') == 'browser'
+    session_id = get_session_id()
     
-    initialize_camera()
-    
-    exercise_counter = 0
-    sets_completed = 0
-    workout_start_time = time.time()
-    
-    # Initialize the appropriate exercise class
-    if exercise_type == "squat":
-        current_exercise = Squat()
-    elif exercise_type == "push_up":
-        current_exercise = PushUp()
-    elif exercise_type == "hammer_curl":
-        current_exercise = HammerCurl()
-    else:
+    try:
+        sessions.create(session_id, exercise_type, sets_goal, exercise_goal, multi_person=multi_person,
+                        client_overlay=client_overlay, browser_frames=browser_frames)
+    except ValueError:
         return jsonify({'success': False, 'error': 'Invalid exercise type'})
+    except SessionLimitError as e:
+        return jsonify({'success': False, 'error': str(e)}), 503
     
-    # Store exercise data
-    current_exercise_data = {
-        'type': exercise_type,
-        'sets': sets_goal,
-        'reps': exercise_goal
-    }
-    
-    exercise_running = True
+    if browser_frames:
+        if camera_session_id == session_id:
+            camera_session_id = None
+    else:
+        camera_session_id = session_id
+        initialize_camera()
     
     return jsonify({'success': True})
 
 @app.route('/stop_exercise', methods=['POST'])
 def stop_exercise():
-    global exercise_running, current_exercise_data, workout_start_time
-    global exercise_counter, exercise_goal, sets_completed, sets_goal
+    session_id = get_session_id()
+    exercise_session = sessions.get(session_id)
+    
+    if exercise_session:
+        summary = exercise_session.stop()
+        # Free the session's slot now; the client stops polling, so idle eviction would take minutes
+        sessions.remove(session_id, exercise_session)
+        if summary:
+            workout_logger.log_workout(**summary)
     
-    if exercise_running and current_exercise_data:
-        duration = int(time.time() - workout_start_time) if workout_start_time else 0
-        
-        workout_logger.log_workout(
-            exercise_type=current_exercise_data['type'],
-            sets=sets_completed + (1 if exercise_counter > 0 else 0),
-            reps=exercise_goal,
-            duration_seconds=duration
-        )
-    
-    exercise_running = False
     return jsonify({'success': True})
 
 @app.route('/get_status', methods=['GET'])
 def get_status():
-    global exercise_counter, sets_completed, exercise_goal, sets_goal, exercise_running
+    exercise_session = sessions.get(get_session_id())
     
-    return jsonify({
-        'exercise_running': exercise_running,
-        'current_reps': exercise_counter,
-        'current_set': sets_completed + 1 if exercise_running else 0,
-        'total_sets': sets_goal,
-        'rep_goal': exercise_goal
-    })
+    if exercise_session is None:
+        return jsonify({
+            'exercise_running': False,
+            'current_reps': 0,
+            'current_set': 0,
+            'total_sets': 0,
+            'rep_goal': 0
+        })
+    
+    return jsonify(exercise_session.status())
 
 @app.route('/profile')
 def profile():
@@ -354,43 +438,47 @@ def process_video():
     if not uploaded_file or not os.path.exists(uploaded_file):
         return jsonify({'success': False, 'error': 'File not found'}), 404
     
-    video_processing_progress[file_id] = {
-        'progress': 0,
-        'status': 'processing',
-        'result': None,
-        'error': None
-    }
-    
-    def process_in_background():
-        try:
-            def update_progress(current_frame, total_frames):
-                if total_frames > 0:
-                    progress = int((current_frame / total_frames) * 100)
-                    video_processing_progress[file_id]['progress'] = progress
-            
-            result = process_uploaded_video(uploaded_file, exercise_type, file_id, update_progress)
-            video_processing_progress[file_id]['status'] = 'complete'
-            video_processing_progress[file_id]['result'] = result
-            video_processing_progress[file_id]['progress'] = 100
-        except Exception as e:
-            logger.error(f"Error processing video: {e}")
-            traceback.print_exc()
-            video_processing_progress[file_id]['status'] = 'error'
-            video_processing_progress[file_id]['error'] = str(e)
-    
-    thread = threading.Thread(target=process_in_background)
-    thread.daemon = True
-    thread.start()
-    
-    return jsonify({'success': True, 'file_id': file_id, 'message': 'Processing started'})
+    try:
+        options = {
+            'segments': int(data.get('segments', app.config['VIDEO_SEGMENTS'])),
+            'render': str(data.get('render', True)).lower() not in ('false', '0'),
+            # Landmarks are only cached from runs that infer every frame: max_stride 1, or
+            # fill_cache, which overrides max_stride on a cache miss
+            'max_stride': int(data.get('max_stride', app.config['VIDEO_MAX_STRIDE'])),
+            'fill_cache': str(data.get('fill_cache', False)).lower() in ('true', '1'),
+            'start_time': float(data['start_time']) if data.get('start_time') is not None else None,
+            'end_time': float(data['end_time']) if data.get('end_time') is not None else None
+        }
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'error': 'Invalid processing options'}), 400
+    
+    if options['start_time'] is not None and options['end_time'] is not None \
+            and options['end_time'] <= options['start_time']:
+        return jsonify({'success': False, 'error': 'end_time must be after start_time'}), 400
+    
+    try:
+        queue_position = video_jobs.submit(file_id, uploaded_file, exercise_type,
+                                           priority=int(data.get('priority', 0)), options=options)
+    except QueueFullError as e:
+        response = jsonify({'success': False, 'error': str(e)})
+        response.headers['Retry-After'] = '30'
+        return response, 429
+    except JobActiveError as e:
+        return jsonify({'success': False, 'error': str(e)}), 409
+    
+    return jsonify({
+        'success': True,
+        'file_id': file_id,
+        'message': 'Processing queued',
+        'queue_position': queue_position
+    })
 
 @app.route('/video_progress/<file_id>', methods=['GET'])
 def video_progress(file_id):
-    if file_id not in video_processing_progress:
+    progress_data = video_jobs.status(file_id)
+    if progress_data is None:
         return jsonify({'success': False, 'error': 'File ID not found'}), 404
     
-    progress_data = video_processing_progress[file_id]
-    
     if progress_data['status'] == 'complete':
         return jsonify({
             'success': True,
@@ -398,6 +486,13 @@ def video_progress(file_id):
             'progress': 100,
             'result': progress_data['result']
         })
+    elif progress_data['status'] == 'queued':
+        return jsonify({
+            'success': True,
+            'status': 'queued',
+            'progress': 0,
+            'queue_position': progress_data['queue_position']
+        })
     elif progress_data['status'] == 'error':
         return jsonify({
             'success': False,
@@ -411,201 +506,6 @@ def video_progress(file_id):
             'progress': progress_data['progress']
         })
 
-def process_uploaded_video(video_path, exercise_type, file_id, progress_callback=None):
-    logger.info(f"Starting video processing for {exercise_type}")
-    start_time = time.time()
-    
-    pose_estimator = PoseEstimator(
-        static_image_mode=False,
-        model_complexity=1,
-        enable_segmentation=False,
-        min_detection_confidence=0.5,
-        min_tracking_confidence=0.5
-    )
-    
-    if exercise_type == "squat":
-        exercise = Squat()
-    elif exercise_type == "push_up":
-        exercise = PushUp(use_time_throttle=False)
-    elif exercise_type == "hammer_curl":
-        exercise = HammerCurl()
-    else:
-        raise ValueError(f"Invalid exercise type: {exercise_type}")
-    
-    cap = cv2.VideoCapture(video_path)
-    if not cap.isOpened():
-        raise ValueError("Could not open video file")
-    
-    fps = int(cap.get(cv2.CAP_PROP_FPS)) or 30
-    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-    
-    scale_factor = 1.0
-    if width > 1280:
-        scale_factor = 1280.0 / width
-        width = int(width * scale_factor)
-        height = int(height * scale_factor)
-        logger.info(f"Downscaling video to {width}x{height} for faster processing")
-    
-    logger.info(f"Video properties: {total_frames} frames, {fps} FPS, {width}x{height}")
-    
-    output_filename = f"{file_id}_processed.mp4"
-    output_path = os.path.join(app.config['PROCESSED_FOLDER'], output_filename)
-    
-    fourcc = cv2.VideoWriter_fourcc(*'avc1')
-    out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
-    
-    if not out.isOpened():
-        logger.warning("H.264 codec not available, using mp4v")
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
-    
-    total_reps = 0
-    frame_count = 0
-    angles_history = []
-    last_log_time = time.time()
-    frames_with_landmarks = 0
-    frames_without_landmarks = 0
-    
-    logger.info(f"Processing {total_frames} frames...")
-    
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
-        
-        frame_count += 1
-        
-        if scale_factor < 1.0:
-            frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_LINEAR)
-        
-        results = pose_estimator.estimate_pose(frame, exercise_type)
-        
-        if results.pose_landmarks:
-            frames_with_landmarks += 1
-            if exercise_type == "squat":
-                counter, angle, stage, suggestions = exercise.track_squat(
-                    results.pose_landmarks.landmark, frame)
-                layout_indicators(frame, exercise_type, (counter, angle, stage, suggestions))
-                total_reps = counter
-                angles_history.append(angle)
-                
-            elif exercise_type == "push_up":
-                counter, angle, stage, suggestions = exercise.track_push_up(
-                    results.pose_landmarks.landmark, frame)
-                layout_indicators(frame, exercise_type, (counter, angle, stage, suggestions))
-                total_reps = counter
-                angles_history.append(angle)
-                
-            elif exercise_type == "hammer_curl":
-                (counter_right, angle_right, counter_left, angle_left,
-                 warning_message_right, warning_message_left, progress_right, 
-                 progress_left, stage_right, stage_left, suggestions_right, suggestions_left) = exercise.track_hammer_curl(
-                    results.pose_landmarks.landmark, frame)
-                layout_indicators(frame, exercise_type, 
-                                 (counter_right, angle_right, counter_left, angle_left,
-                                  warning_message_right, warning_message_left, 
-                                  progress_right, progress_left, stage_right, stage_left,
-                                  suggestions_right, suggestions_left))
-                total_reps = max(counter_right, counter_left)
-                angles_history.append((angle_right, angle_left))
-        
-        else:
-            frames_without_landmarks += 1
-        
-        out.write(frame)
-        
-        if progress_callback and frame_count % 10 == 0:
-            progress_callback(frame_count, total_frames)
-        
-        current_time = time.time()
-        if current_time - last_log_time >= 5.0:
-            progress = (frame_count / total_frames) * 100 if total_frames > 0 else 0
-            fps_processing = frame_count / (current_time - start_time)
-            logger.info(f"Progress: {progress:.1f}% ({frame_count}/{total_frames} frames, {fps_processing:.1f} FPS)")
-            logger.info(f"Landmarks detected: {frames_with_landmarks}/{frame_count} frames, Reps: {total_reps}")
-            last_log_time = current_time
-    
-    cap.release()
-    out.release()
-    
-    logger.info(f"Video writing complete. Checking output file...")
-    
-    if not os.path.exists(output_path):
-        raise ValueError("Output video file was not created")
-    
-    output_size = os.path.getsize(output_path)
-    logger.info(f"Output video size: {output_size / 1024 / 1024:.2f} MB")
-    
-    ffmpeg_path = shutil.which('ffmpeg')
-    if ffmpeg_path:
-        logger.info("FFmpeg found. Re-encoding for browser compatibility...")
-        temp_output = output_path.replace('.mp4', '_temp.mp4')
-        os.rename(output_path, temp_output)
-        
-        try:
-            cmd = [
-                ffmpeg_path,
-                '-i', temp_output,
-                '-c:v', 'libx264',
-                '-preset', 'fast',
-                '-crf', '23',
-                '-pix_fmt', 'yuv420p',
-                '-movflags', '+faststart',
-                '-y',
-                output_path
-            ]
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
-            
-            if result.returncode == 0:
-                logger.info("FFmpeg re-encoding successful")
-                os.remove(temp_output)
-            else:
-                logger.warning(f"FFmpeg re-encoding failed: {result.stderr}")
-                os.rename(temp_output, output_path)
-        except Exception as e:
-            logger.warning(f"FFmpeg re-encoding error: {e}")
-            if os.path.exists(temp_output):
-                os.rename(temp_output, output_path)
-    else:
-        logger.warning("FFmpeg not found. Video may not play in all browsers.")
-    
-    if progress_callback:
-        progress_callback(total_frames, total_frames)
-    
-    if exercise_type == "hammer_curl" and angles_history:
-        if isinstance(angles_history[0], tuple):
-            avg_angle_right = sum(a[0] for a in angles_history) / len(angles_history)
-            avg_angle_left = sum(a[1] for a in angles_history) / len(angles_history)
-            avg_angle = (round(avg_angle_right, 2), round(avg_angle_left, 2))
-        else:
-            avg_angle = round(sum(angles_history) / len(angles_history), 2) if angles_history else 0
-    else:
-        avg_angle = round(sum(angles_history) / len(angles_history), 2) if angles_history else 0
-    
-    duration = frame_count / fps if fps > 0 else 0
-    processing_time = time.time() - start_time
-    processing_fps = frame_count / processing_time if processing_time > 0 else 0
-    
-    logger.info(f"Video processing completed in {processing_time:.2f} seconds")
-    logger.info(f"Processing speed: {processing_fps:.1f} FPS (video: {fps} FPS)")
-    logger.info(f"Pose detection: {frames_with_landmarks}/{frame_count} frames ({100*frames_with_landmarks/frame_count:.1f}%)")
-    logger.info(f"Total reps counted: {total_reps}")
-    
-    return {
-        'success': True,
-        'processed_video': f'/processed/{output_filename}',
-        'statistics': {
-            'total_reps': total_reps,
-            'duration_seconds': round(duration, 2),
-            'total_frames': frame_count,
-            'average_angle': round(avg_angle, 2) if isinstance(avg_angle, (int, float)) else avg_angle,
-            'processing_time_seconds': round(processing_time, 2),
-            'processing_fps': round(processing_fps, 1)
-        }
-    }
-
 @app.route('/processed/<filename>')
 def processed_video(filename):
     filepath = os.path.join(app.config['PROCESSED_FOLDER'], filename)
@@ -625,6 +525,60 @@ def processed_video(filename):
     response.headers['Cache-Control'] = 'no-cache'
     return response
 
+@app.route('/timeline/<file_id>/info')
+def timeline_info(file_id):
+    path = timeline_path(app.config['PROCESSED_FOLDER'], secure_filename(file_id))
+    if not os.path.exists(path):
+        return jsonify({'success': False, 'error': 'Timeline not found'}), 404
+    
+    try:
+        header, _ = open_timeline(path)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    return jsonify({'success': True, **header, 'layout': timeline_layout()})
+
+@app.route('/timeline/<file_id>')
+def timeline_range(file_id):
+    """
+    Records of a frame range, as raw little-endian records or ?format=json.
+    
+    The range is given by start/end frame indices into the timeline or by
+    start_time/end_time in seconds; end is exclusive and both are clamped.
+    """
+    path = timeline_path(app.config['PROCESSED_FOLDER'], secure_filename(file_id))
+    if not os.path.exists(path):
+        return jsonify({'success': False, 'error': 'Timeline not found'}), 404
+    
+    try:
+        header, records = open_timeline(path)
+        count = header['count']
+        if 'start_time' in request.args or 'end_time' in request.args:
+            timestamps = records['timestamp']
+            start = int(np.searchsorted(timestamps, float(request.args.get('start_time', 0)), side='left'))
+            end = int(np.searchsorted(timestamps, float(request.args.get('end_time', 'inf')), side='left'))
+        else:
+            start = int(request.args.get('start', 0))
+            end = int(request.args.get('end', count))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    start = min(max(start, 0), count)
+    end = min(max(end, start), count)
+    window = records[start:end]
+    
+    if request.args.get('format') == 'json':
+        return jsonify({'success': True, 'start': start, 'records': records_to_json(window)})
+    
+    # Streamed from the memmap in chunks; only the requested pages are read
+    response = Response(iter_record_bytes(window), mimetype='application/octet-stream')
+    response.headers['Content-Length'] = str(window.nbytes)
+    response.headers['X-Timeline-Start'] = str(start)
+    response.headers['X-Timeline-Count'] = str(end - start)
+    response.headers['X-Record-Size'] = str(records.dtype.itemsize)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
 @app.route('/debug/video/<file_id>')
 def debug_video(file_id):
     uploaded_file = None
@@ -647,7 +601,7 @@ def debug_video(file_id):
             'path': processed_file,
             'size_mb': os.path.getsize(processed_file) / 1024 / 1024 if os.path.exists(processed_file) else 0
         },
-        'progress': video_processing_progress.get(file_id, {})
+        'progress': video_jobs.status(file_id) or {}
     })
 
 if __name__ == '__main__':
@@ -0,0 +1,55 @@
+"""
+Angle Benchmark
+Compares the scalar calculate_angle with the vectorized calculate_angles
+
+Usage:
+    python benchmarks/angle_benchmark.py
+
+Times one frame's four hammer-curl angles and a whole clip's counting-angle
+series both ways, after checking the two implementations agree.
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from exercises.hammer_curl import HammerCurl
+from pose_estimation.angle_calculation import calculate_angle, calculate_angles
+from pose_estimation.landmarks import NUM_LANDMARKS
+
+CLIP_FRAMES = 10000
+
+
+def scalar_angles(points, triples):
+    return [calculate_angle(points[a], points[b], points[c]) for a, b, c in triples]
+
+
+def main():
+    rng = np.random.default_rng(0)
+    clip = rng.integers(0, 1280, size=(CLIP_FRAMES, NUM_LANDMARKS, 2))
+    clip_lists = clip.tolist()
+    frame, frame_list = clip[0], clip_lists[0]
+    triples = HammerCurl.TRACKED_JOINTS
+
+    expected = np.array([scalar_angles(points, triples) for points in clip_lists])
+    difference = np.max(np.abs(calculate_angles(clip, triples) - expected))
+    print(f"Max difference from calculate_angle over {CLIP_FRAMES} frames: {difference:.2e} degrees")
+
+    runs = 2000
+    scalar = timeit.timeit(lambda: scalar_angles(frame_list, triples), number=runs) / runs
+    vector = timeit.timeit(lambda: calculate_angles(frame, triples), number=runs) / runs
+    print(f"One frame, {len(triples)} angles:  scalar {scalar * 1e6:8.1f} us   vectorized {vector * 1e6:8.1f} us")
+
+    runs = 5
+    scalar = timeit.timeit(lambda: [scalar_angles(points, triples) for points in clip_lists], number=runs) / runs
+    vector = timeit.timeit(lambda: calculate_angles(clip, triples), number=runs) / runs
+    print(f"{CLIP_FRAMES}-frame clip:       scalar {scalar * 1e3:8.1f} ms   vectorized {vector * 1e3:8.1f} ms "
+          f"({scalar / vector:.0f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""
+Frame Allocation Benchmark
+Measures how much fresh memory the live pipeline touches per streamed frame
+
+Usage:
+    python benchmarks/frame_alloc_benchmark.py [--seconds 10] [--size 1920x1080] [--video PATH]
+
+Runs the real LiveEngine and ExerciseSession on a paced fake camera and
+counts minor page faults. glibc's mmap threshold is pinned (the script
+re-executes itself with MALLOC_MMAP_THRESHOLD_ set) and NumPy's huge-page
+advice is switched off, so every frame-sized allocation is served by a
+fresh mapping and shows up as faults on its pages, whether it is made by
+NumPy, OpenCV or MediaPipe. Memory recycled from a pool faults nothing.
+"""
+
+import argparse
+import os
+import resource
+import sys
+import time
+
+if 'MALLOC_MMAP_THRESHOLD_' not in os.environ:
+    os.execve(sys.executable, [sys.executable] + sys.argv,
+              {**os.environ, 'MALLOC_MMAP_THRESHOLD_': str(128 * 1024)})
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+
+from sessions.exercise_session import ExerciseSession
+from streaming.live_engine import LiveEngine
+
+PAGE_SIZE = resource.getpagesize()
+
+
+class PacedCamera:
+    """Stands in for cv2.VideoCapture, looping over frames at a fixed rate."""
+
+    def __init__(self, frames, fps=30):
+        self.frames = frames
+        self.interval = 1.0 / fps
+        self.index = 0
+        self.next_time = time.perf_counter()
+
+    def read(self, image=None):
+        delay = self.next_time - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        self.next_time = max(self.next_time + self.interval, time.perf_counter() - self.interval)
+        source = self.frames[self.index % len(self.frames)]
+        self.index += 1
+        # Same contract as VideoCapture.read: fill image when it fits, else allocate
+        if image is not None and image.shape == source.shape:
+            np.copyto(image, source)
+            return True, image
+        return True, source.copy()
+
+
+def load_frames(video_path, size, count=60):
+    width, height = size
+    if video_path is None:
+        gradient = np.linspace(0, 255, width, dtype=np.uint8)
+        return [np.dstack([np.roll(gradient, i * 8)[None, :].repeat(height, axis=0)] * 3) for i in range(count)]
+    cap = cv2.VideoCapture(video_path)
+    frames = []
+    while len(frames) < count:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        frames.append(cv2.resize(frame, size))
+    cap.release()
+    return frames
+
+
+def minor_faults():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_minflt
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--size', default='1920x1080')
+    parser.add_argument('--video')
+    args = parser.parse_args()
+    size = tuple(int(value) for value in args.size.split('x'))
+
+    multiarray = getattr(np, '_core', np.core).multiarray
+    if hasattr(multiarray, '_set_madvise_hugepage'):
+        multiarray._set_madvise_hugepage(False)
+
+    camera = PacedCamera(load_frames(args.video, size))
+    session = ExerciseSession('benchmark', 'squat', 3, 10)
+    frame_count = [0]
+
+    def count_frame(jpeg):
+        frame_count[0] += 1
+
+    engine = LiveEngine(lambda: camera, session.process_frame, sink=count_frame)
+    engine.start()
+    # Warm up: MediaPipe graph, first allocations, pool filling
+    time.sleep(2)
+    start_frames, start_faults, start_time = frame_count[0], minor_faults(), time.perf_counter()
+    time.sleep(args.seconds)
+    frames = frame_count[0] - start_frames
+    faulted = (minor_faults() - start_faults) * PAGE_SIZE
+    elapsed = time.perf_counter() - start_time
+    snapshot = engine.snapshot()
+    engine.stop()
+
+    frame_bytes = size[0] * size[1] * 3
+    print(f"{size[0]}x{size[1]}, {frames} frames streamed in {elapsed:.1f} s")
+    print(f"Fresh memory touched: {faulted / frames / 1e6:.2f} MB/frame "
+          f"({faulted / frame_bytes / frames:.2f} frame sizes), {faulted / elapsed / 1e6:.1f} MB/s")
+    if 'frame_pool' in snapshot:
+        print(f"Frame pool: {snapshot['frame_pool']}")
+        print(f"Estimator buffers: {session.pose_estimator.buffers.stats()}")
+
+
+if __name__ == '__main__':
+    main()
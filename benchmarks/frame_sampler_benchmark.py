@@ -0,0 +1,124 @@
+"""
+Frame Sampler Benchmark
+Compares every-frame pose inference with the adaptive stride sampler
+
+Usage:
+    python benchmarks/frame_sampler_benchmark.py                  # synthetic push-up clip
+    python benchmarks/frame_sampler_benchmark.py VIDEO EXERCISE   # real upload, e.g. squat.mp4 squat
+
+Reports reps counted, inference calls and wall time for max_stride 1 (the
+baseline) and each larger stride. Reps must match the baseline.
+"""
+
+import math
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from exercises.tracking import create_exercise, exercise_reps, measure_counting_angles
+from pose_estimation.landmarks import NUM_LANDMARKS, Landmark
+from processing.frame_sampler import AdaptiveStrideSampler
+
+STRIDES = (1, 2, 4, 6, 8)
+
+
+class SyntheticFrame:
+    """Just enough of an image for the sampler: a shape, plus the frame index."""
+    shape = (720, 1280, 3)
+
+    def __init__(self, index):
+        self.index = index
+
+
+class SyntheticReader:
+    """Stands in for VideoFrameReader over a clip of frame_count frames."""
+
+    def __init__(self, frame_count):
+        self.frame_count = frame_count
+        self.position = 0
+
+    def grab(self):
+        if self.position >= self.frame_count:
+            return False
+        self.position += 1
+        return True
+
+    def read(self):
+        return SyntheticFrame(self.position - 1) if self.grab() else None
+
+
+class SyntheticPushUpEstimator:
+    """Stands in for PoseEstimator: frame i is a left arm bending at a known elbow angle."""
+
+    def __init__(self, angles, noise=1.5, seed=0):
+        self.angles = angles
+        self.noise = noise
+        self.random = random.Random(seed)
+
+    def estimate_pose(self, frame, exercise_type, draw=True):
+        angle = math.radians(self.angles[frame.index] + self.random.gauss(0, self.noise))
+        landmarks = [Landmark(0.5, 0.5, 0.0, 1.0)] * NUM_LANDMARKS
+        landmarks[11] = Landmark(0.5, 0.2, 0.0, 1.0)
+        landmarks[13] = Landmark(0.5, 0.5, 0.0, 1.0)
+        landmarks[15] = Landmark(0.5 + 0.3 * math.sin(angle), 0.5 - 0.3 * math.cos(angle), 0.0, 1.0)
+        return SimpleNamespace(pose_landmarks=SimpleNamespace(landmark=landmarks))
+
+
+def synthetic_clip(reps=20, fps=60, rep_seconds=2.5, hold_seconds=1.0):
+    """Elbow angles of push-ups between 175 and 55 degrees with a pause at the top of each rep."""
+    angles = []
+    for _ in range(reps):
+        angles += [175.0] * int(hold_seconds * fps)
+        steps = int(rep_seconds * fps)
+        angles += [115 + 60 * math.cos(2 * math.pi * i / steps) for i in range(steps)]
+    return angles
+
+
+def count_synthetic(angles, max_stride):
+    exercise = create_exercise("push_up")
+    sampler = AdaptiveStrideSampler(SyntheticPushUpEstimator(angles), exercise, "push_up", max_stride)
+    start = time.perf_counter()
+    for _, pose in sampler.iter_landmarks(SyntheticReader(len(angles)), decode_skipped=False):
+        if pose is not None:
+            exercise.update_stage(*measure_counting_angles(exercise, pose))
+    return exercise_reps(exercise, "push_up"), sampler.stats(), time.perf_counter() - start
+
+
+def run_synthetic():
+    angles = synthetic_clip()
+    print(f"Synthetic push-up clip: {len(angles)} frames at 60 FPS, 20 reps")
+    report(lambda stride: count_synthetic(angles, stride))
+
+
+def run_video(video_path, exercise_type):
+    from processing.video_analysis import analyze_uploaded_video
+
+    def run(stride):
+        result = analyze_uploaded_video(video_path, exercise_type, max_stride=stride)
+        stats = result['statistics']
+        return stats['total_reps'], stats, stats['processing_time_seconds']
+
+    print(f"{video_path} ({exercise_type})")
+    report(run)
+
+
+def report(run):
+    baseline_reps = None
+    print(f"{'stride':>6} {'reps':>5} {'inferred':>9} {'ratio':>6} {'seconds':>8}")
+    for stride in STRIDES:
+        reps, stats, seconds = run(stride)
+        if baseline_reps is None:
+            baseline_reps = reps
+        flag = "" if reps == baseline_reps else "  MISMATCH"
+        print(f"{stride:>6} {reps:>5} {stats['inferred_frames']:>9} {stats['inference_ratio']:>6} {seconds:>8.2f}{flag}")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 3:
+        run_video(sys.argv[1], sys.argv[2])
+    else:
+        run_synthetic()
@@ -0,0 +1,142 @@
+"""
+Overlay Benchmark
+Compares redrawing every indicator each frame with compositing cached overlay layers
+
+Usage:
+    python benchmarks/overlay_benchmark.py [--size 1280x720]
+
+For each exercise, times layout_indicators plus the session's goal panel
+with the static parts drawn from scratch on every frame (as before the
+overlay cache) and with them composited from the cache, after checking
+both produce the same frame.
+
+Then times the movement suggestion panel against the full-frame copy and
+blend it used to be drawn with, at several frame sizes.
+"""
+
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+
+import feedback.indicators
+import sessions.exercise_session
+from feedback.layout import layout_indicators
+from sessions.exercise_session import ExerciseSession
+from utils.drawing_utils import display_suggestions
+from utils.overlay_cache import apply_static_overlay, overlay_cache, text_cache
+
+EXERCISE_DATA = {
+    "squat": (7, 123.4, "Descent", None),
+    "push_up": (4, 98.7, "Ascent", None),
+    "hammer_curl": (3, 45.6, 5, 150.2, None, None, 30, 80, "Up", "Down", None, None),
+}
+
+
+SUGGESTIONS = ["⚠ Keep knees behind toes", "→ Push hips back more", "→ Keep your core tight"]
+SUGGESTION_SIZES = ((640, 480), (1280, 720), (1920, 1080))
+
+
+def legacy_display_suggestions(frame, suggestions, max_suggestions=3):
+    """display_suggestions as it was: blends a full-frame copy and draws every string from scratch."""
+    suggestions_to_show = suggestions[:max_suggestions]
+    frame_height, frame_width = frame.shape[:2]
+    start_y, font_scale, thickness, line_height = 60, 1.2, 3, 55
+    max_text_width = max(cv2.getTextSize(suggestion, cv2.FONT_HERSHEY_SIMPLEX, font_scale, thickness)[0][0]
+                         for suggestion in suggestions_to_show)
+    panel_width = max_text_width + 80
+    panel_height = len(suggestions_to_show) * line_height + 50
+    panel_x = (frame_width - panel_width) // 2
+    panel_y = start_y
+    overlay = frame.copy()
+    cv2.rectangle(overlay, (panel_x - 20, panel_y - 40),
+                  (panel_x + panel_width + 20, panel_y + panel_height), (0, 0, 0), -1)
+    cv2.addWeighted(overlay, 0.75, frame, 0.25, 0, frame)
+    cv2.rectangle(frame, (panel_x - 20, panel_y - 40),
+                  (panel_x + panel_width + 20, panel_y + panel_height), (255, 255, 255), 5)
+    title_text = "MOVEMENT GUIDANCE"
+    (title_width, _), _ = cv2.getTextSize(title_text, cv2.FONT_HERSHEY_DUPLEX, 1.0, 2)
+    cv2.putText(frame, title_text, (panel_x + (panel_width - title_width) // 2, panel_y - 10),
+                cv2.FONT_HERSHEY_DUPLEX, 1.0, (255, 255, 255), 2)
+    for i, suggestion in enumerate(suggestions_to_show):
+        y_pos = panel_y + 30 + (i + 1) * line_height
+        text_color = (0, 165, 255) if suggestion.startswith("⚠") else (135, 206, 250)
+        (text_width, _), _ = cv2.getTextSize(suggestion, cv2.FONT_HERSHEY_SIMPLEX, font_scale, thickness)
+        text_x = panel_x + (panel_width - text_width) // 2
+        cv2.putText(frame, suggestion, (text_x + 2, y_pos + 2), cv2.FONT_HERSHEY_SIMPLEX, font_scale,
+                    (0, 0, 0), thickness + 1)
+        cv2.putText(frame, suggestion, (text_x, y_pos), cv2.FONT_HERSHEY_SIMPLEX, font_scale, text_color, thickness)
+
+
+def benchmark_suggestions(runs):
+    print("Suggestion panel, per-frame time")
+    for width, height in SUGGESTION_SIZES:
+        background = np.random.default_rng(0).integers(0, 256, size=(height, width, 3), dtype=np.uint8)
+        expected, frame = background.copy(), background.copy()
+        legacy_display_suggestions(expected, SUGGESTIONS)
+        display_suggestions(frame, SUGGESTIONS)
+        difference = np.abs(frame.astype(np.int16) - expected).max()
+
+        frame = background.copy()
+        # Drawn over and over onto the same frame; only the time matters here
+        legacy = timeit.timeit(lambda: legacy_display_suggestions(frame, SUGGESTIONS), number=runs) / runs
+        cached = timeit.timeit(lambda: display_suggestions(frame, SUGGESTIONS), number=runs) / runs
+        print(f"{width}x{height:<5d}   full frame {legacy * 1e6:7.1f} us   panel only {cached * 1e6:7.1f} us "
+              f"({legacy / cached:.1f}x)   max pixel difference {difference}")
+    print(f"Text cache: {text_cache.stats()}")
+
+
+def redraw_static(frame, key, draw):
+    draw(frame)
+
+
+def render(session, exercise_type, background):
+    frame = background.copy()
+    layout_indicators(frame, exercise_type, EXERCISE_DATA[exercise_type])
+    session._draw_goals(frame)
+    return frame
+
+
+def use_static_overlay(compositor):
+    feedback.indicators.apply_static_overlay = compositor
+    sessions.exercise_session.apply_static_overlay = compositor
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--size', default='1280x720')
+    args = parser.parse_args()
+    width, height = (int(value) for value in args.size.split('x'))
+
+    background = np.random.default_rng(0).integers(0, 256, size=(height, width, 3), dtype=np.uint8)
+    runs = 500
+    print(f"{width}x{height}, per-frame overlay time")
+    for exercise_type in EXERCISE_DATA:
+        session = ExerciseSession('benchmark', exercise_type, 3, 10, smoother_factory=None)
+        frame = lambda: render(session, exercise_type, background)
+
+        use_static_overlay(redraw_static)
+        expected = frame()
+        redraw = timeit.timeit(frame, number=runs) / runs
+
+        use_static_overlay(apply_static_overlay)
+        # Anti-aliased edges may round differently by one level
+        difference = np.abs(frame().astype(np.int16) - expected).max()
+        cached = timeit.timeit(frame, number=runs) / runs
+
+        # Both timings include copying the background, which is not overlay work
+        copy = timeit.timeit(background.copy, number=runs) / runs
+        print(f"{exercise_type:12s} redraw {(redraw - copy) * 1e6:7.1f} us   cached {(cached - copy) * 1e6:7.1f} us "
+              f"({(redraw - copy) / (cached - copy):.1f}x)   max pixel difference {difference}")
+    print(f"Overlay cache: {overlay_cache.stats()}")
+    print()
+    benchmark_suggestions(runs)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""
+Rep Counter Regression
+Checks the batch rep counter against the streaming trackers
+
+Usage:
+    python benchmarks/rep_counter_regression.py                       # synthetic corpus
+    python benchmarks/rep_counter_regression.py VIDEO EXERCISE [...]  # also record series from videos
+
+Every series in the corpus is fed frame by frame through the tracker's
+update_stage() and once through count_exercise_reps(); rep counts, the
+frames each rep was counted on and the final stages must agree.
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from exercises.rep_counter import count_exercise_reps
+from exercises.tracking import create_exercise, exercise_reps
+
+FPS = 30
+
+
+def stream_reps(exercise_type, angles):
+    """Replay a series through the streaming tracker, recording the frame of every count."""
+    exercise = create_exercise(exercise_type)
+    count_frames = [[] for _ in range(angles.shape[1])]
+    for frame, row in enumerate(angles.tolist()):
+        if np.isnan(row[0]):
+            continue
+        before = _counters(exercise, exercise_type)
+        exercise.update_stage(*row)
+        for column, (old, new) in enumerate(zip(before, _counters(exercise, exercise_type))):
+            if new != old:
+                count_frames[column].append(frame)
+    return exercise_reps(exercise, exercise_type), count_frames, _stages(exercise, exercise_type)
+
+
+def _counters(exercise, exercise_type):
+    if exercise_type == "hammer_curl":
+        return exercise.counter_right, exercise.counter_left
+    return (exercise.counter,)
+
+
+def _stages(exercise, exercise_type):
+    if exercise_type == "hammer_curl":
+        return [exercise.stage_right, exercise.stage_left]
+    return [exercise.stage]
+
+
+def synthetic_series(rng, exercise_type, frames=3000):
+    """A mix of clean reps, noisy reps, half reps, values on the thresholds and gaps without a pose."""
+    low, high = {"squat": (60, 178), "push_up": (50, 170), "hammer_curl": (30, 170)}[exercise_type]
+    columns = 2 if exercise_type == "hammer_curl" else 1
+    series = np.empty((frames, columns))
+    for column in range(columns):
+        t = np.arange(frames)
+        period = rng.uniform(40, 120)
+        depth = rng.uniform(0.4, 1.0, size=frames // 40 + 1).repeat(40)[:frames]
+        clean = high - (high - low) * depth * (0.5 - 0.5 * np.cos(2 * np.pi * t / period))
+        noise = rng.normal(0, rng.uniform(0, 8), size=frames)
+        series[:, column] = np.round(clean + noise, rng.integers(0, 3))
+    gaps = rng.random(frames) < rng.uniform(0, 0.1)
+    series[gaps] = np.nan
+    return series
+
+
+def corpus(video_args):
+    rng = np.random.default_rng(13)
+    for exercise_type in ("squat", "push_up", "hammer_curl"):
+        for index in range(60):
+            yield f"{exercise_type} synthetic {index}", exercise_type, synthetic_series(rng, exercise_type)
+
+    for video_path, exercise_type in zip(video_args[::2], video_args[1::2]):
+        from processing.video_analysis import analyze_uploaded_video
+        timeline = analyze_uploaded_video(video_path, exercise_type)['timeline']
+        columns = 2 if exercise_type == "hammer_curl" else 1
+        angles = np.array([entry['angle'] if entry['angle'] is not None else [np.nan] * columns
+                           for entry in timeline], dtype=np.float64).reshape(len(timeline), columns)
+        yield f"{video_path} ({exercise_type})", exercise_type, angles
+
+
+def main():
+    failures = 0
+    checked = 0
+    stream_seconds = batch_seconds = 0.0
+    for name, exercise_type, angles in corpus(sys.argv[1:]):
+        start = time.perf_counter()
+        expected_reps, expected_frames, expected_stages = stream_reps(exercise_type, angles)
+        stream_seconds += time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = count_exercise_reps(exercise_type, angles, FPS)
+        batch_seconds += time.perf_counter() - start
+
+        frames = [[rep['count_frame'] for rep in series['rep_details']] for series in result['series']]
+        stages = [series['stage'] for series in result['series']]
+        checked += 1
+        if (result['total_reps'], frames, stages) != (expected_reps, expected_frames, expected_stages):
+            failures += 1
+            print(f"MISMATCH {name}: batch {result['total_reps']} reps, streaming {expected_reps}")
+
+    print(f"{checked} series checked, {failures} mismatches")
+    print(f"Streaming update_stage: {stream_seconds * 1000:.1f} ms, batch counter: {batch_seconds * 1000:.1f} ms")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
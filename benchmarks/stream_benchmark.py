@@ -0,0 +1,126 @@
+"""
+Stream Benchmark
+Compares full-quality MJPEG with per-viewer adaptive quality for viewers on links of different speeds
+
+Usage:
+    python benchmarks/stream_benchmark.py [--seconds 20] [--size 1280x720] [--video PATH]
+
+Runs a FrameBroadcaster on a paced 30 fps fake camera, without pose
+inference, and drains /video_feed streams as viewers whose link takes
+len(chunk) / bandwidth seconds per chunk. Once with every frame at
+OpenCV's default JPEG quality (as before adaptive streaming) and once
+with the QUALITY_TIERS ladder, it reports per viewer the frames per
+second and bytes per second actually delivered and the tier it settled
+on, plus the encode time per frame.
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+
+from streaming.broadcaster import FrameBroadcaster
+from streaming.live_engine import LiveEngine
+
+# Link speeds in bytes per second
+LINKS = (('LAN', 50e6), ('8 Mbit/s', 1e6), ('2 Mbit/s', 250e3), ('1 Mbit/s', 125e3))
+
+
+class PacedCamera:
+    """Stands in for cv2.VideoCapture, looping over frames at a fixed rate."""
+
+    def __init__(self, frames, fps=30):
+        self.frames = frames
+        self.interval = 1.0 / fps
+        self.index = 0
+        self.next_time = time.perf_counter()
+
+    def read(self, image=None):
+        delay = self.next_time - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        self.next_time = max(self.next_time + self.interval, time.perf_counter() - self.interval)
+        source = self.frames[self.index % len(self.frames)]
+        self.index += 1
+        if image is not None and image.shape == source.shape:
+            np.copyto(image, source)
+            return True, image
+        return True, source.copy()
+
+
+def load_frames(video_path, size, count=90):
+    width, height = size
+    if video_path is None:
+        rng = np.random.default_rng(0)
+        # Smoothed noise compresses roughly like camera footage, unlike flat gradients
+        base = cv2.GaussianBlur(rng.integers(0, 256, (height, width, 3), dtype=np.uint8), (0, 0), 3)
+        return [np.roll(base, i * 4, axis=1) for i in range(count)]
+    cap = cv2.VideoCapture(video_path)
+    frames = []
+    while len(frames) < count:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        frames.append(cv2.resize(frame, size))
+    cap.release()
+    return frames
+
+
+def drain(stream, bandwidth, stop):
+    for chunk in stream:
+        time.sleep(len(chunk) / bandwidth)
+        if stop.is_set():
+            break
+    stream.close()
+
+
+def run(frames, seconds, **broadcaster_options):
+    camera = PacedCamera(frames)
+    broadcaster = FrameBroadcaster(lambda: LiveEngine(lambda: camera, lambda frame: frame), **broadcaster_options)
+    stop = threading.Event()
+    viewers = [threading.Thread(target=drain, args=(broadcaster.stream(), bandwidth, stop), daemon=True)
+               for _, bandwidth in LINKS]
+    for viewer in viewers:
+        viewer.start()
+    time.sleep(seconds)
+    snapshot = broadcaster.snapshot()
+    stop.set()
+    broadcaster.engine.stop()
+    return snapshot
+
+
+def report(title, snapshot):
+    encode = snapshot['pipeline']['encode']
+    print(f"{title}: encode {encode['avg_ms']:.1f} ms per frame")
+    for (name, _), viewer in zip(LINKS, sorted(snapshot['subscribers'], key=lambda viewer: viewer['id'])):
+        print(f"  {name:9s} {viewer['fps']:5.1f} fps  {viewer['bytes_per_sec'] / 1024:7.1f} KB/s  "
+              f"tier {viewer['tier']}  skipped {viewer['skipped_frames']}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--seconds', type=float, default=20)
+    parser.add_argument('--size', default='1280x720')
+    parser.add_argument('--video')
+    args = parser.parse_args()
+    size = tuple(int(value) for value in args.size.split('x'))
+    frames = load_frames(args.video, size)
+
+    print(f"{size[0]}x{size[1]} at 30 fps, rates over the last 5 s of {args.seconds:.0f} s")
+    report("Default quality", run(frames, args.seconds, tiers=((1.0, 95),)))
+    snapshot = run(frames, args.seconds)
+    report("Adaptive", snapshot)
+    for tier, stats in enumerate(snapshot['encoder']):
+        if stats['frames']:
+            print(f"  tier {tier} ({stats['scale']}x, q{stats['quality']}): "
+                  f"{stats['avg_encode_ms']:.1f} ms, {stats['avg_kb']:.0f} KB per frame")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Timeline Server Check
+Fetches binary timeline ranges through a real WSGI server and compares them with the file
+
+Usage:
+    python benchmarks/timeline_server_check.py [--frames 2000]
+
+Writes a synthetic timeline into a temporary processed folder, serves the
+app with Werkzeug's development server (which, like Gunicorn, rejects
+anything but bytes in a response body, as PEP 3333 requires) and requests
+frame and time ranges over HTTP. Every body must match the records in the
+memory-mapped file byte for byte.
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from werkzeug.serving import make_server
+
+from exercises.tracking import create_exercise
+from processing.timeline import TimelineWriter, open_timeline, timeline_path
+
+FILE_ID = 'timeline-check'
+FPS = 30
+
+
+def write_timeline(output_dir, frames):
+    rng = np.random.default_rng(0)
+    exercise = create_exercise("squat")
+    writer = TimelineWriter(timeline_path(output_dir, FILE_ID), FPS, "squat")
+    for frame_index in range(frames):
+        angle = float(rng.uniform(60, 180))
+        exercise.update_stage(angle)
+        writer.append(frame_index, None, angle, exercise)
+    writer.close()
+
+
+def fetch(port, query):
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/timeline/{FILE_ID}?{query}", timeout=10) as response:
+        return response.read(), response.headers
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--frames', type=int, default=2000)
+    args = parser.parse_args()
+
+    from app import app
+    output_dir = tempfile.mkdtemp()
+    app.config['PROCESSED_FOLDER'] = output_dir
+    write_timeline(output_dir, args.frames)
+    _, records = open_timeline(timeline_path(output_dir, FILE_ID))
+    timestamps = records['timestamp']
+
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    cases = [
+        ('start=0&end=5', 0, 5),
+        (f'start=100&end={args.frames}', 100, args.frames),
+        ('start=0', 0, args.frames),
+        ('start=10&end=10', 10, 10),
+        ('start_time=2&end_time=4.5', int(np.searchsorted(timestamps, 2.0)), int(np.searchsorted(timestamps, 4.5)))
+    ]
+    failures = 0
+    try:
+        for query, start, end in cases:
+            try:
+                body, headers = fetch(server.port, query)
+            except Exception as e:
+                failures += 1
+                print(f"FAIL {query}: {e}")
+                continue
+            expected = records[start:end].tobytes()
+            ok = (body == expected and int(headers['X-Timeline-Start']) == start
+                  and int(headers['X-Timeline-Count']) == end - start)
+            failures += not ok
+            print(f"{'ok  ' if ok else 'FAIL'} {query}: {len(body)} bytes, {end - start} records")
+    finally:
+        server.shutdown()
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+    print(f"{len(cases)} ranges checked, {failures} failures")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -10,6 +10,11 @@ from feedback.movement_suggestions import get_hammer_curl_suggestions
 
 
 class HammerCurl:
+    # Landmark indices (shoulder, elbow, wrist) of the right and left counting angles
+    COUNTING_JOINTS = ((11, 13, 15), (12, 14, 16))
+    # Counting angles followed by the elbow-shoulder-hip alignment angles (vertex at the shoulder)
+    TRACKED_JOINTS = ((11, 13, 15), (12, 14, 16), (13, 11, 23), (14, 12, 24))
+
     def __init__(self):
         self.counter_right = 0
         self.counter_left = 0
@@ -27,53 +32,8 @@ class HammerCurl:
     def calculate_shoulder_elbow_wrist(self, shoulder, elbow, wrist):
         return calculate_angle(shoulder, elbow, wrist)
 
-    def track_hammer_curl(self, landmarks, frame):
-        shoulder_right = [int(landmarks[11].x * frame.shape[1]), int(landmarks[11].y * frame.shape[0])]
-        elbow_right = [int(landmarks[13].x * frame.shape[1]), int(landmarks[13].y * frame.shape[0])]
-        hip_right = [int(landmarks[23].x * frame.shape[1]), int(landmarks[23].y * frame.shape[0])]
-        wrist_right = [int(landmarks[15].x * frame.shape[1]), int(landmarks[15].y * frame.shape[0])]
-
-        shoulder_left = [int(landmarks[12].x * frame.shape[1]), int(landmarks[12].y * frame.shape[0])]
-        elbow_left = [int(landmarks[14].x * frame.shape[1]), int(landmarks[14].y * frame.shape[0])]
-        hip_left = [int(landmarks[24].x * frame.shape[1]), int(landmarks[24].y * frame.shape[0])]
-        wrist_left = [int(landmarks[16].x * frame.shape[1]), int(landmarks[16].y * frame.shape[0])]
-
-        angle_right_counter = self.calculate_shoulder_elbow_wrist(shoulder_right, elbow_right, wrist_right)
-        angle_left_counter = self.calculate_shoulder_elbow_wrist(shoulder_left, elbow_left, wrist_left)
-        angle_right = self.calculate_shoulder_elbow_hip_angle(shoulder_right, elbow_right, hip_right)
-        angle_left = self.calculate_shoulder_elbow_hip_angle(shoulder_left, elbow_left, hip_left)
-
-        self.draw_line_with_style(frame, shoulder_left, elbow_left, (0, 0, 255), 4)
-        self.draw_line_with_style(frame, elbow_left, wrist_left, (0, 0, 255), 4)
-
-        self.draw_line_with_style(frame, shoulder_right, elbow_right, (0, 0, 255), 4)
-        self.draw_line_with_style(frame, elbow_right, wrist_right, (0, 0, 255), 4)
-
-        self.draw_circle(frame, shoulder_left, (0, 0, 255), 8)
-        self.draw_circle(frame, elbow_left, (0, 0, 255), 8)
-        self.draw_circle(frame, wrist_left, (0, 0, 255), 8)
-
-        self.draw_circle(frame, shoulder_right, (0, 0, 255), 8)
-        self.draw_circle(frame, elbow_right, (0, 0, 255), 8)
-        self.draw_circle(frame, wrist_right, (0, 0, 255), 8)
-
-        angle_text_position_left = (elbow_left[0] + 10, elbow_left[1] - 10)
-        cv2.putText(frame, f'Angle: {int(angle_left_counter)}', angle_text_position_left, cv2.FONT_HERSHEY_SIMPLEX, 0.5,
-                     (255, 255, 255), 2)
-
-        angle_text_position_right = (elbow_right[0] + 10, elbow_right[1] - 10)
-        cv2.putText(frame, f'Angle: {int(angle_right_counter)}', angle_text_position_right, cv2.FONT_HERSHEY_SIMPLEX,
-                    0.5,
-                    (255, 255, 255), 2)
-
-        warning_message_right = None
-        warning_message_left = None
-
-        if abs(angle_right) > self.angle_threshold:
-            warning_message_right = f"Right Shoulder-Elbow-Hip Misalignment! Angle: {angle_right:.2f}°"
-        if abs(angle_left) > self.angle_threshold:
-            warning_message_left = f"Left Shoulder-Elbow-Hip Misalignment! Angle: {angle_left:.2f}°"
-
+    def update_stage(self, angle_right_counter, angle_left_counter):
+        """Advance both arms' rep state machines with their elbow angles."""
         if angle_right_counter > self.angle_threshold_up:
             self.stage_right = "Flex"
         elif self.angle_threshold_down < angle_right_counter < self.angle_threshold_up and self.stage_right == "Flex":
@@ -94,11 +54,56 @@ class HammerCurl:
         elif angle_left_counter > self.angle_threshold_up and self.stage_left == "Down":
             self.stage_left = "Flex"
 
+    def track_hammer_curl(self, pose, frame):
+        shoulder_right = pose.point(11)
+        elbow_right = pose.point(13)
+        wrist_right = pose.point(15)
+
+        shoulder_left = pose.point(12)
+        elbow_left = pose.point(14)
+        wrist_left = pose.point(16)
+
+        angle_right_counter, angle_left_counter, angle_right, angle_left = pose.angles(self.TRACKED_JOINTS)
+
+        if frame is not None:
+            self.draw_line_with_style(frame, shoulder_left, elbow_left, (0, 0, 255), 4)
+            self.draw_line_with_style(frame, elbow_left, wrist_left, (0, 0, 255), 4)
+
+            self.draw_line_with_style(frame, shoulder_right, elbow_right, (0, 0, 255), 4)
+            self.draw_line_with_style(frame, elbow_right, wrist_right, (0, 0, 255), 4)
+
+            self.draw_circle(frame, shoulder_left, (0, 0, 255), 8)
+            self.draw_circle(frame, elbow_left, (0, 0, 255), 8)
+            self.draw_circle(frame, wrist_left, (0, 0, 255), 8)
+
+            self.draw_circle(frame, shoulder_right, (0, 0, 255), 8)
+            self.draw_circle(frame, elbow_right, (0, 0, 255), 8)
+            self.draw_circle(frame, wrist_right, (0, 0, 255), 8)
+
+            angle_text_position_left = (elbow_left[0] + 10, elbow_left[1] - 10)
+            cv2.putText(frame, f'Angle: {int(angle_left_counter)}', angle_text_position_left, cv2.FONT_HERSHEY_SIMPLEX, 0.5,
+                         (255, 255, 255), 2)
+
+            angle_text_position_right = (elbow_right[0] + 10, elbow_right[1] - 10)
+            cv2.putText(frame, f'Angle: {int(angle_right_counter)}', angle_text_position_right, cv2.FONT_HERSHEY_SIMPLEX,
+                        0.5,
+                        (255, 255, 255), 2)
+
+        warning_message_right = None
+        warning_message_left = None
+
+        if abs(angle_right) > self.angle_threshold:
+            warning_message_right = f"Right Shoulder-Elbow-Hip Misalignment! Angle: {angle_right:.2f}°"
+        if abs(angle_left) > self.angle_threshold:
+            warning_message_left = f"Left Shoulder-Elbow-Hip Misalignment! Angle: {angle_left:.2f}°"
+
+        self.update_stage(angle_right_counter, angle_left_counter)
+
         progress_right = 1 if self.stage_right == "up" else 0
         progress_left = 1 if self.stage_left == "up" else 0
 
-        suggestions_right = get_hammer_curl_suggestions(landmarks, angle_right_counter, angle_right, self.stage_right, "right", frame)
-        suggestions_left = get_hammer_curl_suggestions(landmarks, angle_left_counter, angle_left, self.stage_left, "left", frame)
+        suggestions_right = get_hammer_curl_suggestions(pose, angle_right_counter, angle_right, self.stage_right, "right")
+        suggestions_left = get_hammer_curl_suggestions(pose, angle_left_counter, angle_left, self.stage_left, "left")
 
         return self.counter_right, angle_right_counter, self.counter_left, angle_left_counter, warning_message_right, warning_message_left, progress_right, progress_left, self.stage_right, self.stage_left, suggestions_right, suggestions_left
 
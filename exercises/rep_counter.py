@@ -0,0 +1,161 @@
+"""
+Rep Counter Module
+Counts reps over a whole recorded angle series instead of frame by frame
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from exercises.tracking import create_exercise
+
+# Stage names of one counting angle's state machine, in the order a rep passes through them
+StageNames = namedtuple('StageNames', ['start', 'descent', 'ascent'])
+
+STAGE_NAMES = {
+    "squat": StageNames("Starting Position", "Descent", "Ascent"),
+    "push_up": StageNames("Starting position", "Descent", "Ascent"),
+    "hammer_curl": StageNames("Flex", "Up", "Down"),
+}
+
+
+def stage_machine(exercise_type):
+    """
+    Thresholds and stage names of an exercise's rep state machine.
+
+    Read from a fresh tracker so the batch counter always uses the same
+    thresholds as the streaming update_stage().
+
+    Returns:
+        (up, down, return_threshold, names, initial_stages) where
+        initial_stages has one entry per counting angle
+    """
+    exercise = create_exercise(exercise_type)
+    up = exercise.angle_threshold_up
+    down = exercise.angle_threshold_down
+    return_threshold = getattr(exercise, 'angle_threshold_return', up)
+    if exercise_type == "hammer_curl":
+        initial_stages = (exercise.stage_right, exercise.stage_left)
+    else:
+        initial_stages = (exercise.stage,)
+    return up, down, return_threshold, STAGE_NAMES[exercise_type], initial_stages
+
+
+def threshold_zones(angles, thresholds):
+    """
+    Label each angle with the band it falls in between the sorted thresholds.
+
+    Values exactly on a threshold get their own label, so every angle in a
+    run of equal labels satisfies the same comparisons in update_stage().
+    """
+    thresholds = np.unique(thresholds)
+    return np.searchsorted(thresholds, angles, side='left') + np.searchsorted(thresholds, angles, side='right')
+
+
+def count_reps(angles, up, down, return_threshold, names, initial_stage=None, fps=30, first_frame=0):
+    """
+    Count reps in one angle series with the trackers' hysteresis rules.
+
+    Angles are classified against the thresholds and run-length encoded in
+    NumPy; the state machine then steps once per run rather than once per
+    frame. Repeated frames in a run only matter until the stage stops
+    changing, so a run is replayed at most until it settles.
+
+    Args:
+        angles: 1-D series of angles in degrees; NaN marks frames without a pose
+        up, down, return_threshold: The tracker's stage thresholds
+        names: StageNames of the tracker
+        initial_stage: Stage before the first frame
+        fps: Frame rate used for the tempo figures
+        first_frame: Frame number of angles[0], used to number rep boundaries
+
+    Returns:
+        Dict with the rep count, the stage after the last frame and one entry
+        per rep with its start, counted and end frames, min/max angle and
+        tempo in seconds
+    """
+    angles = np.asarray(angles, dtype=np.float64)
+    indices = np.flatnonzero(~np.isnan(angles))
+    values = angles[indices]
+    frames = indices + first_frame
+
+    reps = []
+    stage = initial_stage
+    descent_start = None
+
+    if len(values):
+        zones = threshold_zones(values, (up, down, return_threshold))
+        run_starts = np.flatnonzero(np.r_[True, zones[1:] != zones[:-1]])
+        run_lengths = np.diff(np.r_[run_starts, len(values)])
+
+        for run_start, run_length in zip(run_starts.tolist(), run_lengths.tolist()):
+            angle = values[run_start]
+            for offset in range(run_length):
+                if angle > up:
+                    next_stage = names.start
+                elif down < angle < up and stage == names.start:
+                    next_stage = names.descent
+                elif angle < down and stage == names.descent:
+                    next_stage = names.ascent
+                elif angle > return_threshold and stage == names.ascent:
+                    next_stage = names.start
+                else:
+                    next_stage = stage
+
+                if next_stage == stage:
+                    break
+
+                frame = int(frames[run_start + offset])
+                if next_stage == names.descent:
+                    descent_start = frame
+                elif next_stage == names.ascent:
+                    reps.append({'start_frame': descent_start, 'count_frame': frame, 'end_frame': None})
+                elif next_stage == names.start:
+                    if stage == names.ascent and reps:
+                        reps[-1]['end_frame'] = frame
+                    descent_start = None
+                stage = next_stage
+
+    last_frame = int(frames[-1]) if len(frames) else 0
+    for rep in reps:
+        start = rep['start_frame'] if rep['start_frame'] is not None else int(frames[0])
+        end = rep['end_frame'] if rep['end_frame'] is not None else last_frame
+        window = angles[start - first_frame:end - first_frame + 1]
+        rep.update({
+            'start_frame': start,
+            'end_frame': end,
+            'min_angle': round(float(np.nanmin(window)), 2),
+            'max_angle': round(float(np.nanmax(window)), 2),
+            'duration_seconds': round((end - start) / fps, 3),
+            'down_seconds': round((rep['count_frame'] - start) / fps, 3),
+            'up_seconds': round((end - rep['count_frame']) / fps, 3)
+        })
+
+    return {'reps': len(reps), 'stage': stage, 'rep_details': reps}
+
+
+def count_exercise_reps(exercise_type, angles, fps=30, first_frame=0):
+    """
+    Count reps for an exercise from its counting-angle series.
+
+    Args:
+        exercise_type: "squat", "push_up" or "hammer_curl"
+        angles: (frames,) series, or (frames, 2) right/left series for hammer curls
+        fps: Frame rate of the series
+        first_frame: Frame number of the first sample
+
+    Returns:
+        Dict with 'total_reps' (as exercise_reps() would report it) and
+        'series', one count_reps() result per counting angle
+    """
+    up, down, return_threshold, names, initial_stages = stage_machine(exercise_type)
+    angles = np.asarray(angles, dtype=np.float64).reshape(len(angles), -1)
+    if angles.shape[1] != len(initial_stages):
+        raise ValueError(f"Expected {len(initial_stages)} angle series for {exercise_type}")
+
+    series = [count_reps(angles[:, column], up, down, return_threshold, names, initial_stage, fps, first_frame)
+              for column, initial_stage in enumerate(initial_stages)]
+    return {
+        'total_reps': max(result['reps'] for result in series),
+        'series': series
+    }
@@ -9,54 +9,66 @@ from feedback.movement_suggestions import get_squat_suggestions
 
 
 class Squat:
+    # Landmark indices (shoulder, hip, knee) of the angle that drives rep counting
+    COUNTING_JOINTS = ((11, 23, 25),)
+    # Left and right shoulder-hip-knee angles computed for every frame
+    TRACKED_JOINTS = ((11, 23, 25), (12, 24, 26))
+
     def __init__(self):
         self.counter = 0
         self.stage = None
+        self.angle_threshold_up = 170
+        self.angle_threshold_down = 90
+        self.angle_threshold_return = 150
 
     def calculate_angle(self, hip, knee, ankle):
         return calculate_angle(hip, knee, ankle)
 
-    def track_squat(self, landmarks, frame):
-        hip = [int(landmarks[23].x * frame.shape[1]), int(landmarks[23].y * frame.shape[0])]
-        knee = [int(landmarks[25].x * frame.shape[1]), int(landmarks[25].y * frame.shape[0])]
-        shoulder = [int(landmarks[11].x * frame.shape[1]), int(landmarks[11].y * frame.shape[0])]
+    def update_stage(self, angle):
+        """Advance the rep state machine with the left hip angle."""
+        if angle > self.angle_threshold_up:
+            self.stage = "Starting Position"
+        elif self.angle_threshold_down < angle < self.angle_threshold_up and self.stage == "Starting Position":
+            self.stage = "Descent"
+        elif angle < self.angle_threshold_down and self.stage == "Descent":
+            self.stage = "Ascent"
+            self.counter += 1
+        elif angle > self.angle_threshold_return and self.stage == "Ascent":
+            self.stage = "Starting Position"
+
+    def track_squat(self, pose, frame):
+        hip = pose.point(23)
+        knee = pose.point(25)
+        shoulder = pose.point(11)
 
-        hip_right = [int(landmarks[24].x * frame.shape[1]), int(landmarks[24].y * frame.shape[0])]
-        knee_right = [int(landmarks[26].x * frame.shape[1]), int(landmarks[26].y * frame.shape[0])]
-        shoulder_right = [int(landmarks[12].x * frame.shape[1]), int(landmarks[12].y * frame.shape[0])]
+        hip_right = pose.point(24)
+        knee_right = pose.point(26)
+        shoulder_right = pose.point(12)
 
-        angle = self.calculate_angle(shoulder, hip, knee)
-        angle_right = self.calculate_angle(shoulder_right, hip_right, knee_right)
+        angle, angle_right = pose.angles(self.TRACKED_JOINTS)
 
-        self.draw_line_with_style(frame, shoulder, hip, (178, 102, 255), 2)
-        self.draw_line_with_style(frame, hip, knee, (178, 102, 255), 2)
-        self.draw_line_with_style(frame, shoulder_right, hip_right, (51, 153, 255), 2)
-        self.draw_line_with_style(frame, hip_right, knee_right, (51, 153, 255), 2)
+        if frame is not None:
+            self.draw_line_with_style(frame, shoulder, hip, (178, 102, 255), 2)
+            self.draw_line_with_style(frame, hip, knee, (178, 102, 255), 2)
+            self.draw_line_with_style(frame, shoulder_right, hip_right, (51, 153, 255), 2)
+            self.draw_line_with_style(frame, hip_right, knee_right, (51, 153, 255), 2)
 
-        self.draw_circle(frame, shoulder, (178, 102, 255), 8)
-        self.draw_circle(frame, hip, (178, 102, 255), 8)
-        self.draw_circle(frame, knee, (178, 102, 255), 8)
-        self.draw_circle(frame, shoulder_right, (51, 153, 255), 8)
-        self.draw_circle(frame, hip_right, (51, 153, 255), 8)
-        self.draw_circle(frame, knee_right, (51, 153, 255), 8)
+            self.draw_circle(frame, shoulder, (178, 102, 255), 8)
+            self.draw_circle(frame, hip, (178, 102, 255), 8)
+            self.draw_circle(frame, knee, (178, 102, 255), 8)
+            self.draw_circle(frame, shoulder_right, (51, 153, 255), 8)
+            self.draw_circle(frame, hip_right, (51, 153, 255), 8)
+            self.draw_circle(frame, knee_right, (51, 153, 255), 8)
 
-        angle_text_position = (knee[0] + 10, knee[1] - 10)
-        cv2.putText(frame, f'Angle Left: {int(angle)}', angle_text_position, cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 2)
+            angle_text_position = (knee[0] + 10, knee[1] - 10)
+            cv2.putText(frame, f'Angle Left: {int(angle)}', angle_text_position, cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 2)
 
-        angle_text_position_right = (knee_right[0] + 10, knee_right[1] - 10)
-        cv2.putText(frame, f'Angle Right: {int(angle_right)}', angle_text_position_right, cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 2)
+            angle_text_position_right = (knee_right[0] + 10, knee_right[1] - 10)
+            cv2.putText(frame, f'Angle Right: {int(angle_right)}', angle_text_position_right, cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 2)
 
-        if angle > 170:
-            self.stage = "Starting Position"
-        elif 90 < angle < 170 and self.stage == "Starting Position":
-            self.stage = "Descent"
-        elif angle < 90 and self.stage == "Descent":
-            self.stage = "Ascent"
-            self.counter += 1
-        elif angle > 150 and self.stage == "Ascent":
-            self.stage = "Starting Position"
+        self.update_stage(angle)
         
-        suggestions = get_squat_suggestions(landmarks, angle, self.stage, frame)
+        suggestions = get_squat_suggestions(pose, angle, self.stage)
         
         return self.counter, angle, self.stage, suggestions
 
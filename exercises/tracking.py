@@ -0,0 +1,128 @@
+"""
+Exercise Tracking Module
+Creates exercise trackers and runs them on a frame's pose landmarks
+"""
+
+import numpy as np
+
+from exercises.squat import Squat
+from exercises.push_up import PushUp
+from exercises.hammer_curl import HammerCurl
+from feedback.layout import layout_indicators
+from pose_estimation.angle_calculation import calculate_angles
+from pose_estimation.landmarks import pixel_points
+
+EXERCISE_TYPES = ("squat", "push_up", "hammer_curl")
+
+
+def create_exercise(exercise_type):
+    """
+    Build the tracker for an exercise type.
+
+    Raises:
+        ValueError: If the exercise type is unknown
+    """
+    if exercise_type == "squat":
+        return Squat()
+    elif exercise_type == "push_up":
+        return PushUp()
+    elif exercise_type == "hammer_curl":
+        return HammerCurl()
+    raise ValueError(f"Invalid exercise type: {exercise_type}")
+
+
+def track_exercise(exercise, exercise_type, pose, frame):
+    """
+    Update the tracker with one frame's PoseFrame and draw its indicators.
+
+    With frame None nothing is drawn, for clients that draw the overlays
+    themselves from exercise_metrics().
+
+    Returns:
+        (exercise_data, reps, angle) where exercise_data is the tuple passed to
+        layout_indicators and angle is a float, or a (right, left) tuple for
+        hammer curls
+    """
+    if exercise_type == "squat":
+        exercise_data = exercise.track_squat(pose, frame)
+    elif exercise_type == "push_up":
+        exercise_data = exercise.track_push_up(pose, frame)
+    elif exercise_type == "hammer_curl":
+        exercise_data = exercise.track_hammer_curl(pose, frame)
+    else:
+        raise ValueError(f"Invalid exercise type: {exercise_type}")
+
+    if frame is not None:
+        layout_indicators(frame, exercise_type, exercise_data)
+
+    if exercise_type == "hammer_curl":
+        angle_right, angle_left = exercise_data[1], exercise_data[3]
+        return exercise_data, exercise_reps(exercise, exercise_type), (angle_right, angle_left)
+
+    return exercise_data, exercise_reps(exercise, exercise_type), exercise_data[1]
+
+
+def exercise_metrics(exercise_type, exercise_data):
+    """
+    The values the indicators show, from the exercise_data of track_exercise().
+
+    Returns:
+        Dict of 'angles', 'stages' and 'suggestions' lists, right arm first
+        for hammer curls
+    """
+    if exercise_type == "hammer_curl":
+        (_, angle_right, _, angle_left, _, _, _, _,
+         stage_right, stage_left, suggestions_right, suggestions_left) = exercise_data
+        return {
+            'angles': [angle_right, angle_left],
+            'stages': [stage_right, stage_left],
+            # The two most important of each arm, as the indicators show them
+            'suggestions': suggestions_right[:2] + suggestions_left[:2]
+        }
+    _, angle, stage, suggestions = exercise_data
+    return {'angles': [angle], 'stages': [stage], 'suggestions': suggestions}
+
+
+def exercise_reps(exercise, exercise_type):
+    if exercise_type == "hammer_curl":
+        return max(exercise.counter_right, exercise.counter_left)
+    return exercise.counter
+
+
+def reset_exercise_counter(exercise, exercise_type):
+    if exercise_type == "hammer_curl":
+        exercise.counter_right = 0
+        exercise.counter_left = 0
+    else:
+        exercise.counter = 0
+
+
+def measure_counting_angles(exercise, pose):
+    """
+    Compute the angles that drive the exercise's rep state machine.
+
+    Uses the same integer pixel coordinates as the track_* methods so that
+    update_stage() sees exactly the values it would during live tracking.
+
+    Returns:
+        List with one angle per entry in exercise.COUNTING_JOINTS
+    """
+    return pose.angles(exercise.COUNTING_JOINTS)
+
+
+def measure_counting_angle_series(exercise, landmarks, frame_shape):
+    """
+    Counting angles for a whole (frames, 33, 4) landmark stack in one NumPy call.
+
+    Returns:
+        (detected, angles) where detected masks the frames with a pose and
+        angles is a (detected frames, len(COUNTING_JOINTS)) array
+    """
+    detected = ~np.isnan(landmarks[:, 0, 0])
+    points = pixel_points(landmarks[detected], frame_shape)
+    return detected, calculate_angles(points, exercise.COUNTING_JOINTS)
+
+
+def history_angle(angles):
+    """Format counting angles the way angles_history stores them."""
+    return tuple(angles) if len(angles) > 1 else angles[0]
@@ -1,44 +1,67 @@
 # feedback/indicators.py
-from utils.drawing_utils import draw_gauge_meter,draw_progress_bar,display_stage,display_counter,display_suggestions
+from utils.drawing_utils import (draw_gauge_meter_static, draw_gauge_meter_value, draw_progress_bar_static,
+                                 draw_progress_bar_value, display_stage, display_counter, display_suggestions)
+from utils.overlay_cache import apply_static_overlay
 
 display_counter_poisiton=(40, 240)
 display_stage_poisiton=(40, 270)
 display_counter_angel_color=(255,255,0)
 
 
+# The draw_*_static functions draw what never changes during a workout; they are rendered once
+# per frame size into a cached overlay and only the values are drawn on each frame
+
+def draw_squat_static(frame):
+    draw_progress_bar_static(frame, exercise="squat", position=(40, 170), size=(200, 20), background_color=(255,255,255))
+    draw_gauge_meter_static(frame, text="Squat Gauge Meter", position=(135, 415), radius=75)
+
 def draw_squat_indicators(frame, counter, angle, stage, suggestions=None):
+    apply_static_overlay(frame, "squat_indicators", draw_squat_static)
+
     # Counter
     display_counter(frame,counter, position=display_counter_poisiton, color=(0, 0, 0),background_color=(192,192,192))
 
     # Stage
     display_stage(frame, stage,"Stage", position=display_stage_poisiton, color=(0, 0, 0),background_color=(192,192,192))
 
-    draw_progress_bar(frame, exercise="squat", value=counter, position=(40, 170), size=(200, 20), color=(163, 245, 184, 1),background_color=(255,255,255))
+    draw_progress_bar_value(frame, exercise="squat", value=counter, position=(40, 170), size=(200, 20), color=(163, 245, 184, 1))
 
-    draw_gauge_meter(frame, angle=angle, text="Squat Gauge Meter", position=(135, 415), radius=75, color=(0, 0, 255))
+    draw_gauge_meter_value(frame, angle=angle, position=(135, 415), radius=75, color=(0, 0, 255))
     
     # Display movement suggestions at top center for long-distance visibility
     if suggestions:
         display_suggestions(frame, suggestions, position=None, max_suggestions=3)
 
+def draw_pushup_static(frame):
+    draw_progress_bar_static(frame, exercise="push_up", position=(40, 170), size=(200, 20), background_color=(255,255,255))
+    draw_gauge_meter_static(frame, text="Push-u Gauge Meter", position=(350,80), radius=50)
+
 def draw_pushup_indicators(frame, counter, angle, stage, suggestions=None):
+    apply_static_overlay(frame, "push_up_indicators", draw_pushup_static)
+
     # Counter
     display_counter(frame,counter, position=display_counter_poisiton, color=(0, 0, 0),background_color=(192,192,192))
 
     display_stage(frame, stage,"Stage", position=display_stage_poisiton, color=(0, 0, 0),background_color=(192,192,192))
-    draw_progress_bar(frame, exercise="push_up", value=counter, position=(40, 170), size=(200, 20), color=(163, 245, 184, 1),background_color=(255,255,255))
+    draw_progress_bar_value(frame, exercise="push_up", value=counter, position=(40, 170), size=(200, 20), color=(163, 245, 184, 1))
 
-    text = "Push-u Gauge Meter"
-    draw_gauge_meter(frame, angle=angle,text=text, position=(350,80), radius=50, color=(0, 102, 204))
+    draw_gauge_meter_value(frame, angle=angle, position=(350,80), radius=50, color=(0, 102, 204))
     
     # Display movement suggestions at top center for long-distance visibility
     if suggestions:
         display_suggestions(frame, suggestions, position=None, max_suggestions=3)
 
 
+def draw_hammercurl_static(frame):
+    draw_progress_bar_static(frame, exercise="hammer_curl", position=(40, 170), size=(200, 20), background_color=(255,255,255))
+    draw_gauge_meter_static(frame, text="Right Gauge Meter", position=(1200,80), radius=50)
+    draw_gauge_meter_static(frame, text="Left Gauge Meter", position=(1200,240), radius=50)
+
 def draw_hammercurl_indicators(frame, counter_right, angle_right, counter_left, angle_left, stage_right, stage_left, suggestions_right=None, suggestions_left=None):
     display_counter_poisiton_left_arm = (40, 300)
 
+    apply_static_overlay(frame, "hammer_curl_indicators", draw_hammercurl_static)
+
     # Right Arm Indicators
     display_counter(frame, counter_right, position=display_counter_poisiton, color=(0, 0, 0),background_color=(192,192,192))
 
@@ -46,14 +69,11 @@ def draw_hammercurl_indicators(frame, counter_right, angle_right, counter_left,
     display_stage(frame, stage_left,"Left Stage", position=display_counter_poisiton_left_arm, color=(0, 0, 0),background_color=(192,192,192))
 
     # Progress Bars
-    draw_progress_bar(frame, exercise="hammer_curl", value=(counter_right+counter_left)/2, position=(40, 170), size=(200, 20), color=(163, 245, 184, 1),background_color=(255,255,255))
-
-    text_right = "Right Gauge Meter"
-    text_left = "Left Gauge Meter"
+    draw_progress_bar_value(frame, exercise="hammer_curl", value=(counter_right+counter_left)/2, position=(40, 170), size=(200, 20), color=(163, 245, 184, 1))
 
     # Gauge Meters for Angles
-    draw_gauge_meter(frame, angle=angle_right,text=text_right, position=(1200,80), radius=50, color=(0, 102, 204))
-    draw_gauge_meter(frame, angle=angle_left,text=text_left, position=(1200,240), radius=50, color=(0, 102, 204))
+    draw_gauge_meter_value(frame, angle=angle_right, position=(1200,80), radius=50, color=(0, 102, 204))
+    draw_gauge_meter_value(frame, angle=angle_left, position=(1200,240), radius=50, color=(0, 102, 204))
     
     # Display movement suggestions at top center for long-distance visibility
     # Combine both arms' suggestions for better visibility
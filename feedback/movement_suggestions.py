@@ -3,15 +3,14 @@ Movement Suggestions Module
 Provides real-time coaching and form corrections based on pose analysis
 """
 
-def get_squat_suggestions(landmarks, angle, stage, frame):
+def get_squat_suggestions(pose, angle, stage):
     """
     Analyze squat form and provide real-time suggestions
     
     Args:
-        landmarks: MediaPipe pose landmarks
+        pose: PoseFrame of the current frame
         angle: Current knee angle
         stage: Current stage of the squat
-        frame: Video frame for coordinate calculations
     
     Returns:
         List of suggestion strings
@@ -19,15 +18,15 @@ def get_squat_suggestions(landmarks, angle, stage, frame):
     suggestions = []
     
     # Get landmark coordinates
-    hip_left = [int(landmarks[23].x * frame.shape[1]), int(landmarks[23].y * frame.shape[0])]
-    knee_left = [int(landmarks[25].x * frame.shape[1]), int(landmarks[25].y * frame.shape[0])]
-    ankle_left = [int(landmarks[27].x * frame.shape[1]), int(landmarks[27].y * frame.shape[0])]
-    shoulder_left = [int(landmarks[11].x * frame.shape[1]), int(landmarks[11].y * frame.shape[0])]
+    hip_left = pose.point(23)
+    knee_left = pose.point(25)
+    ankle_left = pose.point(27)
+    shoulder_left = pose.point(11)
     
-    hip_right = [int(landmarks[24].x * frame.shape[1]), int(landmarks[24].y * frame.shape[0])]
-    knee_right = [int(landmarks[26].x * frame.shape[1]), int(landmarks[26].y * frame.shape[0])]
-    ankle_right = [int(landmarks[28].x * frame.shape[1]), int(landmarks[28].y * frame.shape[0])]
-    shoulder_right = [int(landmarks[12].x * frame.shape[1]), int(landmarks[12].y * frame.shape[0])]
+    hip_right = pose.point(24)
+    knee_right = pose.point(26)
+    ankle_right = pose.point(28)
+    shoulder_right = pose.point(12)
     
     # Calculate key measurements
     knee_forward_left = knee_left[0] - ankle_left[0]  # Positive if knee is forward
@@ -79,15 +78,14 @@ def get_squat_suggestions(landmarks, angle, stage, frame):
     return suggestions
 
 
-def get_push_up_suggestions(landmarks, angle, stage, frame):
+def get_push_up_suggestions(pose, angle, stage):
     """
     Analyze push-up form and provide real-time suggestions
     
     Args:
-        landmarks: MediaPipe pose landmarks
+        pose: PoseFrame of the current frame
         angle: Current elbow angle
         stage: Current stage of the push-up
-        frame: Video frame for coordinate calculations
     
     Returns:
         List of suggestion strings
@@ -95,15 +93,15 @@ def get_push_up_suggestions(landmarks, angle, stage, frame):
     suggestions = []
     
     # Get landmark coordinates
-    shoulder_left = [int(landmarks[11].x * frame.shape[1]), int(landmarks[11].y * frame.shape[0])]
-    elbow_left = [int(landmarks[13].x * frame.shape[1]), int(landmarks[13].y * frame.shape[0])]
-    wrist_left = [int(landmarks[15].x * frame.shape[1]), int(landmarks[15].y * frame.shape[0])]
-    hip_left = [int(landmarks[23].x * frame.shape[1]), int(landmarks[23].y * frame.shape[0])]
-    ankle_left = [int(landmarks[27].x * frame.shape[1]), int(landmarks[27].y * frame.shape[0])]
+    shoulder_left = pose.point(11)
+    elbow_left = pose.point(13)
+    wrist_left = pose.point(15)
+    hip_left = pose.point(23)
+    ankle_left = pose.point(27)
     
-    shoulder_right = [int(landmarks[12].x * frame.shape[1]), int(landmarks[12].y * frame.shape[0])]
-    elbow_right = [int(landmarks[14].x * frame.shape[1]), int(landmarks[14].y * frame.shape[0])]
-    hip_right = [int(landmarks[24].x * frame.shape[1]), int(landmarks[24].y * frame.shape[0])]
+    shoulder_right = pose.point(12)
+    elbow_right = pose.point(14)
+    hip_right = pose.point(24)
     
     # Calculate body alignment
     body_alignment = abs((shoulder_left[1] + shoulder_right[1])/2 - (hip_left[1] + hip_right[1])/2)
@@ -156,17 +154,16 @@ def get_push_up_suggestions(landmarks, angle, stage, frame):
     return suggestions
 
 
-def get_hammer_curl_suggestions(landmarks, angle_counter, angle_alignment, stage, side, frame):
+def get_hammer_curl_suggestions(pose, angle_counter, angle_alignment, stage, side):
     """
     Analyze hammer curl form and provide real-time suggestions
     
     Args:
-        landmarks: MediaPipe pose landmarks
+        pose: PoseFrame of the current frame
         angle_counter: Elbow flexion angle for counting
         angle_alignment: Shoulder-elbow-hip alignment angle
         stage: Current stage (Flex, Up, Down)
         side: "left" or "right"
-        frame: Video frame for coordinate calculations
     
     Returns:
         List of suggestion strings
@@ -175,15 +172,15 @@ def get_hammer_curl_suggestions(landmarks, angle_counter, angle_alignment, stage
     
     # Select landmarks based on side
     if side == "right":
-        shoulder = [int(landmarks[12].x * frame.shape[1]), int(landmarks[12].y * frame.shape[0])]
-        elbow = [int(landmarks[14].x * frame.shape[1]), int(landmarks[14].y * frame.shape[0])]
-        wrist = [int(landmarks[16].x * frame.shape[1]), int(landmarks[16].y * frame.shape[0])]
-        hip = [int(landmarks[24].x * frame.shape[1]), int(landmarks[24].y * frame.shape[0])]
+        shoulder = pose.point(12)
+        elbow = pose.point(14)
+        wrist = pose.point(16)
+        hip = pose.point(24)
     else:  # left
-        shoulder = [int(landmarks[11].x * frame.shape[1]), int(landmarks[11].y * frame.shape[0])]
-        elbow = [int(landmarks[13].x * frame.shape[1]), int(landmarks[13].y * frame.shape[0])]
-        wrist = [int(landmarks[15].x * frame.shape[1]), int(landmarks[15].y * frame.shape[0])]
-        hip = [int(landmarks[23].x * frame.shape[1]), int(landmarks[23].y * frame.shape[0])]
+        shoulder = pose.point(11)
+        elbow = pose.point(13)
+        wrist = pose.point(15)
+        hip = pose.point(23)
     
     # Check arm position relative to body
     arm_away_from_body = abs(angle_alignment) > 30
@@ -223,3 +220,67 @@ def get_hammer_curl_suggestions(landmarks, angle_counter, angle_alignment, stage
         suggestions.append("→ Focus on the muscle contraction")
     
     return suggestions
+
+
+# Every string the functions above can return. Live clients drawing their own overlays get
+# this list once and are then sent indices into it instead of the strings.
+_HAMMER_CURL_SIDE_SUGGESTIONS = (
+    "✓ {Side} arm ready!",
+    "→ Extend your {side} arm fully",
+    "↑ Curl your {side} arm more",
+    "✓ Good {side} arm position!",
+    "⚠ Keep your {side} arm close to body",
+    "✓ Great {side} arm control!",
+    "↓ Lower your {side} arm slowly",
+    "→ Fully extend your {side} arm",
+    "→ Keep your {side} elbow stationary",
+)
+
+SUGGESTION_CATALOG = (
+    # Squat
+    "✓ Good starting position!",
+    "→ Stand up straight to begin",
+    "↓ Lower your hips more",
+    "→ Aim for thighs parallel to ground",
+    "✓ Good depth, keep going!",
+    "⚠ Keep knees behind toes",
+    "→ Push hips back more",
+    "→ Shift weight forward slightly",
+    "⚠ Keep your back straight",
+    "→ Chest up, core engaged",
+    "↑ Push through your heels",
+    "→ Drive hips up and forward",
+    "✓ Great form! Keep pushing up",
+    "→ Keep your core tight",
+    "→ Maintain steady breathing",
+    # Push-up
+    "⚠ Keep your body straight",
+    "→ Engage your core",
+    "→ Extend your arms fully",
+    "↓ Lower your body more",
+    "→ Aim for 90° elbow angle",
+    "✓ Good depth, almost there!",
+    "✓ Perfect depth!",
+    "⚠ Keep your body in a straight line",
+    "→ Tighten your core",
+    "✓ Great body alignment!",
+    "↑ Push up with control",
+    "→ Drive through your palms",
+    "✓ Keep pushing, you're doing great!",
+    "→ Fully extend your arms",
+    "→ Keep your head in line with your body",
+    "→ Breathe out on the way up",
+    # Hammer curl
+    "→ Bring weight to shoulder",
+    "→ Don't swing your arm",
+    "→ Control the negative movement",
+    "→ Focus on the muscle contraction",
+) + tuple(template.format(side=side, Side=side.title())
+          for side in ("right", "left") for template in _HAMMER_CURL_SIDE_SUGGESTIONS)
+
+_SUGGESTION_IDS = {suggestion: index for index, suggestion in enumerate(SUGGESTION_CATALOG)}
+
+
+def suggestion_ids(suggestions):
+    """Indices of suggestions in SUGGESTION_CATALOG; a string missing from it is kept as is."""
+    return [_SUGGESTION_IDS.get(suggestion, suggestion) for suggestion in suggestions]
@@ -1,5 +1,9 @@
+import time
+
 import cv2
 from pose_estimation.estimation import PoseEstimator
+from pose_estimation.landmarks import PoseFrame
+from pose_estimation.smoothing import create_pose_smoother
 from exercises.squat import Squat
 from exercises.hammer_curl import HammerCurl
 from exercises.push_up import PushUp
@@ -16,6 +20,7 @@ def main():
 
     cap = cv2.VideoCapture(0)
     pose_estimator = PoseEstimator()
+    pose_smoother = create_pose_smoother()
 
     if exercise_type == "hammer_curl":
         exercise = HammerCurl()
@@ -41,22 +46,24 @@ def main():
         if not ret:
             break
 
-        results = pose_estimator.estimate_pose(frame, exercise_type)
-        if results.pose_landmarks:
+        results = pose_estimator.estimate_pose(frame, exercise_type, draw=False)
+        pose = pose_smoother.smooth(PoseFrame.from_results(results, frame.shape), time.perf_counter())
+        if pose is not None:
+            pose_estimator.draw_exercise_lines(frame, exercise_type, pose)
             if exercise_type == "squat":
-                counter, angle, stage, suggestions = exercise.track_squat(results.pose_landmarks.landmark, frame)
+                counter, angle, stage, suggestions = exercise.track_squat(pose, frame)
                 layout_indicators(frame, exercise_type, (counter, angle, stage, suggestions))
             elif exercise_type == "hammer_curl":
                 (counter_right, angle_right, counter_left, angle_left,
                  warning_message_right, warning_message_left, progress_right, progress_left, 
                  stage_right, stage_left, suggestions_right, suggestions_left) = exercise.track_hammer_curl(
-                    results.pose_landmarks.landmark, frame)
+                    pose, frame)
                 layout_indicators(frame, exercise_type,
                                   (counter_right, angle_right, counter_left, angle_left,
                                    warning_message_right, warning_message_left, progress_right, progress_left, 
                                    stage_right, stage_left, suggestions_right, suggestions_left))
             elif exercise_type == "push_up":
-                counter, angle, stage, suggestions = exercise.track_push_up(results.pose_landmarks.landmark, frame)
+                counter, angle, stage, suggestions = exercise.track_push_up(pose, frame)
                 layout_indicators(frame, exercise_type, (counter, angle, stage, suggestions))
 
         draw_text_with_background(frame, f"Exercise: {exercise_info.get('name', 'N/A')}", (40, 50),
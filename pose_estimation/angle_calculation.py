@@ -5,6 +5,8 @@ Computes joint angles using geometric vector mathematics
 
 import math
 
+import numpy as np
+
 
 def calculate_angle(point_a, point_b, point_c):
     """
@@ -35,4 +37,40 @@ def calculate_angle(point_a, point_b, point_c):
     cosine_angle = max(-1.0, min(1.0, dot_product / (magnitude_ba * magnitude_bc)))
     angle = math.degrees(math.acos(cosine_angle))
     
-    return angle
\ No newline at end of file
+    return angle
+
+def calculate_angles(points, triples):
+    """
+    Calculate many joint angles in one vectorized pass.
+
+    Same formula and edge cases as calculate_angle (0 for a zero-length
+    vector, cosine clamped to [-1, 1]), evaluated for every (a, b, c) index
+    triple at once.
+
+    Args:
+        points: (33, 2) pixel coordinates of one frame, or a (frames, 33, 2)
+                stack of them
+        triples: Sequence of (a, b, c) landmark indices with the vertex at b
+
+    Returns:
+        Array of angles in degrees shaped (len(triples),) for one frame or
+        (frames, len(triples)) for a stack
+    """
+    points = np.asarray(points, dtype=np.float64)
+    triples = np.asarray(triples, dtype=np.intp).reshape(-1, 3)
+
+    point_a = points[..., triples[:, 0], :]
+    point_b = points[..., triples[:, 1], :]
+    point_c = points[..., triples[:, 2], :]
+    vector_ba = point_a - point_b
+    vector_bc = point_c - point_b
+
+    dot_product = vector_ba[..., 0] * vector_bc[..., 0] + vector_ba[..., 1] * vector_bc[..., 1]
+    magnitudes = (np.sqrt(vector_ba[..., 0] ** 2 + vector_ba[..., 1] ** 2) *
+                  np.sqrt(vector_bc[..., 0] ** 2 + vector_bc[..., 1] ** 2))
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cosine_angle = np.clip(dot_product / magnitudes, -1.0, 1.0)
+    angles = np.degrees(np.arccos(cosine_angle))
+    angles[magnitudes == 0] = 0.0
+    return angles
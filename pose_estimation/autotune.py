@@ -0,0 +1,247 @@
+"""
+Pose Autotune Module
+Picks the MediaPipe model complexity and inference size that fit a latency target on this host
+"""
+
+import logging
+import statistics
+import threading
+import weakref
+
+import numpy as np
+
+from pose_estimation.estimation import PoseEstimator
+
+logger = logging.getLogger(__name__)
+
+# (model_complexity, inference_width) pairs, most accurate first
+CANDIDATES = (
+    (2, 1280),
+    (1, 1280),
+    (1, 960),
+    (1, 640),
+    (0, 640),
+    (0, 480),
+    (0, 320),
+)
+
+DEFAULT_SETTINGS = (1, None)
+
+
+class PoseAutotuner:
+    """
+    Chooses PoseEstimator settings from latencies measured on the host.
+
+    calibrate() times every candidate once; the most accurate candidate
+    whose latency fits target_latency is then used. Each PoseEstimator
+    created with autotuner=... gets its own AutotuneTracker, which smooths
+    that estimator's latencies and moves it along the candidates; only the
+    calibration table and the target are shared. Concurrent sessions thus
+    each meet the per-inference target on their own, and one overloaded
+    session does not move the others.
+
+    Calibration frames without a person only exercise the detector, so the
+    startup choice is a first guess that the runtime drift check refines.
+
+    Until calibrate() has run, or without a target, the estimator defaults
+    (model complexity 1, full size) are used.
+
+    Args:
+        target_latency: Seconds one inference may take, or None to only calibrate
+        candidates: (model_complexity, inference_width) pairs, most accurate first
+        tolerance: Fraction the smoothed latency may drift from the target
+        window: Inferences between two adjustments
+    """
+
+    def __init__(self, target_latency=None, candidates=CANDIDATES, tolerance=0.25, window=30):
+        self.target_latency = target_latency
+        self.candidates = list(candidates)
+        self.tolerance = tolerance
+        self.window = window
+        self.latencies = {}
+        # Settings new estimators start from, and the ones all return to when the target changes
+        self.current = DEFAULT_SETTINGS
+        self.calibrated = False
+        # Bumped by calibrate() and set_target_latency() so trackers restart from current
+        self.generation = 0
+        self._trackers = weakref.WeakSet()
+        self._lock = threading.Lock()
+
+    @property
+    def settings(self):
+        return {'model_complexity': self.current[0], 'inference_width': self.current[1]}
+
+    def tracker(self):
+        """A new AutotuneTracker for one PoseEstimator."""
+        tracker = AutotuneTracker(self)
+        with self._lock:
+            self._trackers.add(tracker)
+        return tracker
+
+    def calibrate(self, frames=None, frame_shape=(720, 1280, 3), runs=10):
+        """
+        Time every candidate and pick the best one for the target.
+
+        Args:
+            frames: BGR frames to time on; a noise frame of frame_shape by default
+            runs: Timed inferences per candidate, after one warm-up inference
+        """
+        if frames is None:
+            frames = [np.random.default_rng(0).integers(0, 256, size=frame_shape, dtype=np.uint8)]
+
+        latencies = {}
+        unavailable = set()
+        for complexity, width in self.candidates:
+            if complexity in unavailable:
+                continue
+            try:
+                estimator = PoseEstimator(model_complexity=complexity, inference_width=width)
+            except Exception as e:
+                # Models other than the bundled one are downloaded on first use and may be unavailable
+                logger.warning(f"Skipping model_complexity={complexity}: {e}")
+                unavailable.add(complexity)
+                continue
+            try:
+                estimator.estimate_pose(frames[0], None, draw=False)
+                timings = []
+                for index in range(runs):
+                    estimator.estimate_pose(frames[index % len(frames)], None, draw=False)
+                    timings.append(estimator.last_latency)
+            finally:
+                estimator.close()
+            latencies[(complexity, width)] = statistics.median(timings)
+
+        with self._lock:
+            self.latencies = latencies
+            self.calibrated = bool(latencies)
+            if self.calibrated and self.target_latency:
+                self.current = self._best_fit(1.0, self.target_latency)
+            self.generation += 1
+        logger.info(f"Pose autotuner calibrated: {self._describe_table()}; using {self.settings}")
+
+    def set_target_latency(self, target_latency):
+        with self._lock:
+            if target_latency == self.target_latency:
+                return
+            self.target_latency = target_latency
+            if self.calibrated and target_latency:
+                self.current = self._best_fit(1.0, target_latency)
+            self.generation += 1
+
+    def status(self):
+        with self._lock:
+            return {
+                'calibrated': self.calibrated,
+                'target_latency_ms': round(self.target_latency * 1000, 2) if self.target_latency else None,
+                **self.settings,
+                'calibration': [
+                    {'model_complexity': complexity, 'inference_width': width,
+                     'latency_ms': round(latency * 1000, 2)}
+                    for (complexity, width), latency in self.latencies.items()
+                ],
+                'estimators': [tracker.snapshot() for tracker in self._trackers]
+            }
+
+    def _best_fit(self, drift, budget, candidates=None):
+        """Most accurate calibrated candidate predicted to fit budget, else the cheapest."""
+        available = [candidate for candidate in candidates or self.candidates if candidate in self.latencies]
+        for candidate in available:
+            if self.latencies[candidate] * drift <= budget:
+                return candidate
+        return available[-1]
+
+    def _describe_table(self):
+        return ", ".join(f"{candidate}: {latency * 1000:.1f} ms" for candidate, latency in self.latencies.items())
+
+
+class AutotuneTracker:
+    """
+    One PoseEstimator's settings under a PoseAutotuner.
+
+    The estimator reports each inference to observe(). When its smoothed
+    latency drifts more than the autotuner's tolerance away from the
+    target, the calibrated table is rescaled by the measured/calibrated
+    ratio and the tracker steps to the best candidate predicted to fit.
+    Stepping back up needs the prediction to clear the target by the same
+    tolerance, so a latency near the target does not make the settings flap.
+    """
+
+    def __init__(self, autotuner):
+        self.autotuner = autotuner
+        self.current = autotuner.current
+        self.adjustments = 0
+        self._generation = autotuner.generation
+        self._smoothed = None
+        self._observed = 0
+
+    def observe(self, latency):
+        """Record one inference latency in seconds, adjusting the settings once per window."""
+        autotuner = self.autotuner
+        with autotuner._lock:
+            if self._follow_autotuner():
+                return
+            if not autotuner.calibrated or not autotuner.target_latency or self.current not in autotuner.latencies:
+                return
+            target = autotuner.target_latency
+            tolerance = autotuner.tolerance
+            self._smoothed = latency if self._smoothed is None else 0.9 * self._smoothed + 0.1 * latency
+            self._observed += 1
+            if self._observed < autotuner.window:
+                return
+
+            drift = self._smoothed / autotuner.latencies[self.current]
+            rank = autotuner.candidates.index(self.current)
+            choice = self.current
+            if self._smoothed > target * (1 + tolerance):
+                cheaper = autotuner.candidates[rank + 1:]
+                if any(candidate in autotuner.latencies for candidate in cheaper):
+                    choice = autotuner._best_fit(drift, target, cheaper)
+            elif self._smoothed < target * (1 - tolerance):
+                better = autotuner._best_fit(drift, target * (1 - tolerance))
+                if autotuner.candidates.index(better) < rank:
+                    choice = better
+
+            if choice != self.current:
+                logger.info(f"Pose autotuner: {self._smoothed * 1000:.1f} ms against a "
+                            f"{target * 1000:.1f} ms target, switching from "
+                            f"{self.current} to {choice}")
+                self.current = choice
+                self.adjustments += 1
+                self._reset_window()
+            else:
+                self._observed = 0
+
+    def sync(self):
+        """Take up the autotuner's choice now if it was recalibrated or retargeted since the last inference."""
+        with self.autotuner._lock:
+            self._follow_autotuner()
+
+    def _follow_autotuner(self):
+        # Called with the autotuner's lock held
+        if self._generation == self.autotuner.generation:
+            return False
+        # Recalibrated or retargeted: start over from the autotuner's choice
+        self._generation = self.autotuner.generation
+        self.current = self.autotuner.current
+        self._reset_window()
+        return True
+
+    def snapshot(self):
+        # Called with the autotuner's lock held
+        return {
+            'measured_latency_ms': round(self._smoothed * 1000, 2) if self._smoothed is not None else None,
+            'adjustments': self.adjustments,
+            'model_complexity': self.current[0],
+            'inference_width': self.current[1]
+        }
+
+    def _reset_window(self):
+        self._smoothed = None
+        self._observed = 0
+
+
+def start_calibration(autotuner, **kwargs):
+    """Calibrate on a background thread so startup is not held up by the measurements."""
+    thread = threading.Thread(target=autotuner.calibrate, kwargs=kwargs, name="pose-autotune", daemon=True)
+    thread.start()
+    return thread
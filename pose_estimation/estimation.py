@@ -3,51 +3,211 @@ Pose Estimation Module
 Integrates MediaPipe for real-time body pose detection
 """
 
-"""
-Pose Estimation Module
-Integrates MediaPipe for real-time body pose detection
-"""
+import time
 
 import cv2
 import mediapipe as mp
 
+from pose_estimation.landmarks import PoseFrame, landmarks_to_array
+from pose_estimation.roi import MODEL_INPUT_SIZE, follow_roi
+from utils.buffer_pool import BufferPool
+
 
 class PoseEstimator:
+    """
+    MediaPipe pose estimation with optional body-crop tracking.
+
+    With roi_tracking, a padded box around the previous frame's landmarks
+    is cropped out and only the crop, shrunk to the model's input size, is
+    converted and passed to MediaPipe; the landmarks are mapped back to
+    full-frame coordinates. The box is kept while the body stays well
+    inside it, because MediaPipe's own tracking works in input-image
+    coordinates and is reset whenever the crop changes. The whole frame
+    is used again when the person is lost in the crop or the mean
+    landmark visibility drops below roi_min_visibility.
+    """
+
     def __init__(self, static_image_mode=False, model_complexity=1, enable_segmentation=False, 
-                 min_detection_confidence=0.5, min_tracking_confidence=0.5, use_gpu=False):
+                 min_detection_confidence=0.5, min_tracking_confidence=0.5, use_gpu=False,
+                 inference_width=None, autotuner=None, roi_tracking=False, roi_padding=0.4,
+                 roi_min_visibility=0.3):
+        # Each estimator follows the autotuner's calibration with its own latency window
+        self.autotune = autotuner.tracker() if autotuner is not None else None
+        if self.autotune is not None:
+            model_complexity, inference_width = self.autotune.current
         self.mp_pose = mp.solutions.pose
-        self.pose = self.mp_pose.Pose(
-            static_image_mode=static_image_mode,
-            model_complexity=model_complexity,
-            enable_segmentation=enable_segmentation,
-            min_detection_confidence=min_detection_confidence,
-            min_tracking_confidence=min_tracking_confidence,
-            smooth_landmarks=True
-        )
+        self._pose_options = {
+            'static_image_mode': static_image_mode,
+            'enable_segmentation': enable_segmentation,
+            'min_detection_confidence': min_detection_confidence,
+            'min_tracking_confidence': min_tracking_confidence,
+            'smooth_landmarks': True
+        }
+        self.pose = self.mp_pose.Pose(model_complexity=model_complexity, **self._pose_options)
         self.mp_drawing = mp.solutions.drawing_utils
-
-    def estimate_pose(self, frame, exercise_type):
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self.pose.process(rgb_frame)
-
+        # Frames wider than this are downscaled before inference; None feeds them at full size
+        self.inference_width = inference_width
+        self.last_latency = None
+        # Colour-converted and downscaled inference inputs, reused from frame to frame
+        self.buffers = BufferPool(max_free=4)
+        # The segmentation mask would cover only the crop, so cropping is off with segmentation
+        self.roi_tracking = roi_tracking and not enable_segmentation
+        self.roi_padding = roi_padding
+        self.roi_min_visibility = roi_min_visibility
+        self.roi = None
+        self.roi_counts = {'roi_frames': 0, 'full_frames': 0, 'roi_fallbacks': 0}
+        # Everything that changes the landmarks this estimator produces
+        self.settings = {
+            'static_image_mode': static_image_mode,
+            'model_complexity': model_complexity,
+            'enable_segmentation': enable_segmentation,
+            'min_detection_confidence': min_detection_confidence,
+            'min_tracking_confidence': min_tracking_confidence,
+            'inference_width': inference_width,
+            'roi_tracking': self.roi_tracking
+        }
+
+    def reset(self):
+        """Drop tracking state so the next frame is treated as the start of a new video."""
+        if self.autotune is not None:
+            # A new video starts on the autotuner's latest choice, not one picked mid-way through it
+            self.autotune.sync()
+            if self.autotune.current != (self.settings['model_complexity'], self.inference_width):
+                self.configure(*self.autotune.current)
+        self.pose.reset()
+        self.roi = None
+
+    def close(self):
+        self.pose.close()
+
+    def configure(self, model_complexity, inference_width):
+        """Switch model and inference size; the graph is only rebuilt when the model changes."""
+        if model_complexity != self.settings['model_complexity']:
+            self.pose.close()
+            self.pose = self.mp_pose.Pose(model_complexity=model_complexity, **self._pose_options)
+            self.settings['model_complexity'] = model_complexity
+        self.inference_width = inference_width
+        self.settings['inference_width'] = inference_width
+
+    def _resize(self, image, size):
+        """Shrink image to size (width, height) into a pooled buffer."""
+        buffer = self.buffers.acquire((size[1], size[0], image.shape[2]))
+        return cv2.resize(image, size, dst=buffer, interpolation=cv2.INTER_AREA)
+
+    def _inference_input(self, frame):
+        """The frame as fed to MediaPipe, and the pooled buffer holding it if one was used."""
+        width = frame.shape[1]
+        if self.inference_width is None or width <= self.inference_width:
+            return frame, None
+        height = round(frame.shape[0] * self.inference_width / width)
+        # Landmarks are normalised, so they need no rescaling afterwards
+        resized = self._resize(frame, (self.inference_width, height))
+        return resized, resized
+
+    def _crop_input(self, frame, roi):
+        x0, y0, x1, y1 = roi
+        crop = frame[y0:y1, x0:x1]
+        scale = MODEL_INPUT_SIZE / max(x1 - x0, y1 - y0)
+        if scale >= 1:
+            return crop, None
+        resized = self._resize(crop, (max(round((x1 - x0) * scale), 1), max(round((y1 - y0) * scale), 1)))
+        return resized, resized
+
+    def _process(self, image, scratch):
+        """Convert to RGB in a pooled buffer and run MediaPipe, which copies its input."""
+        rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=self.buffers.acquire(image.shape))
+        try:
+            return self.pose.process(rgb)
+        finally:
+            self.buffers.release(rgb)
+            self.buffers.release(scratch)
+
+    @staticmethod
+    def _map_to_frame(results, roi, frame_shape):
+        """Rewrite crop-relative landmarks in place as full-frame normalized coordinates."""
+        height, width = frame_shape[:2]
+        x0, y0, x1, y1 = roi
+        scale_x, scale_y = (x1 - x0) / width, (y1 - y0) / height
+        offset_x, offset_y = x0 / width, y0 / height
+        for landmark in results.pose_landmarks.landmark:
+            landmark.x = offset_x + landmark.x * scale_x
+            landmark.y = offset_y + landmark.y * scale_y
+            landmark.z = landmark.z * scale_x
+
+    def estimate_crop(self, frame, roi):
+        """
+        Run inference on frame[roi] only.
+
+        Landmarks come back in full-frame coordinates. The caller owns the
+        crop and must reset() whenever it moves it.
+        """
+        results = self._process(*self._crop_input(frame, roi))
         if results.pose_landmarks:
-            if exercise_type == "squat":
-                self.draw_squat_lines(frame, results.pose_landmarks.landmark)
-            elif exercise_type == "push_up":
-                self.draw_push_up_lines(frame, results.pose_landmarks.landmark)
-            elif exercise_type == "hammer_curl":
-                self.draw_hammerl_curl_lines(frame, results.pose_landmarks.landmark)
+            self._map_to_frame(results, roi, frame.shape)
+        return results
+
+    def _next_roi(self, results, frame_shape):
+        if not results.pose_landmarks:
+            return None
+        return follow_roi(self.roi, landmarks_to_array(results.pose_landmarks.landmark), frame_shape,
+                          self.roi_padding, self.roi_min_visibility)
+
+    def estimate_pose(self, frame, exercise_type, draw=True):
+        start = time.perf_counter()
+        results = None
+        if self.roi is not None:
+            results = self.estimate_crop(frame, self.roi)
+            if results.pose_landmarks:
+                self.roi_counts['roi_frames'] += 1
+            else:
+                # Lost the person inside the crop: search the whole frame right away
+                self.roi_counts['roi_fallbacks'] += 1
+                self.roi = None
+                self.pose.reset()
+                results = None
+        if results is None:
+            results = self._process(*self._inference_input(frame))
+            self.roi_counts['full_frames'] += 1
+        self.last_latency = time.perf_counter() - start
+
+        if self.roi_tracking:
+            roi = self._next_roi(results, frame.shape)
+            if roi != self.roi:
+                if roi is None:
+                    self.roi_counts['roi_fallbacks'] += 1
+                # MediaPipe tracks in input-image coordinates, which change with the crop
+                self.pose.reset()
+                self.roi = roi
+
+        if self.autotune is not None:
+            self.autotune.observe(self.last_latency)
+            if self.autotune.current != (self.settings['model_complexity'], self.inference_width):
+                self.configure(*self.autotune.current)
+
+        if draw and results.pose_landmarks:
+            self.draw_exercise_lines(frame, exercise_type, PoseFrame.from_results(results, frame.shape))
 
         return results
-    def draw_hammerl_curl_lines(self, frame, landmarks):
-        shoulder_right = [int(landmarks[11].x * frame.shape[1]), int(landmarks[11].y * frame.shape[0])]
-        elbow_right = [int(landmarks[13].x * frame.shape[1]), int(landmarks[13].y * frame.shape[0])]
-        hip_right = [int(landmarks[23].x * frame.shape[1]), int(landmarks[23].y * frame.shape[0])]
-        wrist_right = [int(landmarks[15].x * frame.shape[1]), int(landmarks[15].y * frame.shape[0])]
-        shoulder_left = [int(landmarks[12].x * frame.shape[1]), int(landmarks[12].y * frame.shape[0])]
-        elbow_left = [int(landmarks[14].x * frame.shape[1]), int(landmarks[14].y * frame.shape[0])]
-        hip_left = [int(landmarks[24].x * frame.shape[1]), int(landmarks[24].y * frame.shape[0])]
-        wrist_left = [int(landmarks[16].x * frame.shape[1]), int(landmarks[16].y * frame.shape[0])]
+
+    @staticmethod
+    def draw_exercise_lines(frame, exercise_type, pose):
+        if exercise_type == "squat":
+            PoseEstimator.draw_squat_lines(frame, pose)
+        elif exercise_type == "push_up":
+            PoseEstimator.draw_push_up_lines(frame, pose)
+        elif exercise_type == "hammer_curl":
+            PoseEstimator.draw_hammerl_curl_lines(frame, pose)
+
+    @staticmethod
+    def draw_hammerl_curl_lines(frame, pose):
+        shoulder_right = pose.point(11)
+        elbow_right = pose.point(13)
+        hip_right = pose.point(23)
+        wrist_right = pose.point(15)
+        shoulder_left = pose.point(12)
+        elbow_left = pose.point(14)
+        hip_left = pose.point(24)
+        wrist_left = pose.point(16)
 
         cv2.line(frame, shoulder_left, elbow_left, (0, 0, 255), 4, 2)
         cv2.line(frame, elbow_left, wrist_left, (0, 0, 255), 4,2)
@@ -57,28 +217,30 @@ class PoseEstimator:
 
 
 
-    def draw_squat_lines(self, frame, landmarks):
-        hip = [int(landmarks[23].x * frame.shape[1]), int(landmarks[23].y * frame.shape[0])]
-        knee = [int(landmarks[25].x * frame.shape[1]), int(landmarks[25].y * frame.shape[0])]
-        shoulder = [int(landmarks[11].x * frame.shape[1]), int(landmarks[11].y * frame.shape[0])]
+    @staticmethod
+    def draw_squat_lines(frame, pose):
+        hip = pose.point(23)
+        knee = pose.point(25)
+        shoulder = pose.point(11)
 
-        hip_right = [int(landmarks[24].x * frame.shape[1]), int(landmarks[24].y * frame.shape[0])]
-        knee_right = [int(landmarks[26].x * frame.shape[1]), int(landmarks[26].y * frame.shape[0])]
-        shoulder_right = [int(landmarks[12].x * frame.shape[1]), int(landmarks[12].y * frame.shape[0])]
+        hip_right = pose.point(24)
+        knee_right = pose.point(26)
+        shoulder_right = pose.point(12)
 
         cv2.line(frame, shoulder, hip, (178, 102, 255), 2)
         cv2.line(frame, hip, knee, (178, 102, 255), 2)
         cv2.line(frame, shoulder_right, hip_right, (51, 153, 255), 2)
         cv2.line(frame, hip_right, knee_right, (51, 153, 255), 2)
 
-    def draw_push_up_lines(self, frame, landmarks):
-        shoulder_left = [int(landmarks[11].x * frame.shape[1]), int(landmarks[11].y * frame.shape[0])]
-        elbow_left = [int(landmarks[13].x * frame.shape[1]), int(landmarks[13].y * frame.shape[0])]
-        wrist_left = [int(landmarks[15].x * frame.shape[1]), int(landmarks[15].y * frame.shape[0])]
+    @staticmethod
+    def draw_push_up_lines(frame, pose):
+        shoulder_left = pose.point(11)
+        elbow_left = pose.point(13)
+        wrist_left = pose.point(15)
 
-        shoulder_right = [int(landmarks[12].x * frame.shape[1]), int(landmarks[12].y * frame.shape[0])]
-        elbow_right = [int(landmarks[14].x * frame.shape[1]), int(landmarks[14].y * frame.shape[0])]
-        wrist_right = [int(landmarks[16].x * frame.shape[1]), int(landmarks[16].y * frame.shape[0])]
+        shoulder_right = pose.point(12)
+        elbow_right = pose.point(14)
+        wrist_right = pose.point(16)
 
         cv2.line(frame, shoulder_left, elbow_left, (0, 0, 255), 2)
         cv2.line(frame, elbow_left, wrist_left, (0, 0, 255), 2)
@@ -0,0 +1,111 @@
+"""
+Landmarks Module
+Converts MediaPipe pose landmarks to and from compact NumPy arrays
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from pose_estimation.angle_calculation import calculate_angles
+
+NUM_LANDMARKS = 33
+
+# Stand-in for MediaPipe's landmark message when reading a single landmark from a PoseFrame
+Landmark = namedtuple('Landmark', ['x', 'y', 'z', 'visibility'])
+
+
+def landmarks_to_array(landmarks):
+    """Pack MediaPipe landmarks into a (33, 4) float32 array of x, y, z, visibility."""
+    return np.array([(lm.x, lm.y, lm.z, lm.visibility) for lm in landmarks], dtype=np.float32)
+
+
+def empty_landmarks(frame_count):
+    """NaN-filled (frames, 33, 4) array; a NaN row marks a frame with no detected pose."""
+    return np.full((frame_count, NUM_LANDMARKS, 4), np.nan, dtype=np.float32)
+
+
+def has_pose(array):
+    return not np.isnan(array[0, 0])
+
+
+def pixel_points(array, frame_shape):
+    """
+    Integer pixel coordinates of (33, 4) landmarks or a (frames, 33, 4) stack.
+
+    The product is taken in float64 and truncated, so each point equals
+    int(landmark.x * width), int(landmark.y * height) exactly.
+    """
+    height, width = frame_shape[:2]
+    return (array[..., :2].astype(np.float64) * (width, height)).astype(np.int64)
+
+
+def quantize_landmarks(array):
+    """
+    (33, 4) landmarks as a flat list of 99 ints for streaming to clients.
+
+    Each landmark becomes x and y in thousandths of the frame's width and
+    height and its visibility in percent; z is left out.
+    """
+    values = np.rint(array[:, [0, 1, 3]] * (1000, 1000, 100)).astype(np.int64)
+    return values.ravel().tolist()
+
+
+class PoseFrame:
+    """
+    One frame's pose, shared by the trackers, skeleton drawing and suggestions.
+
+    Holds the landmarks as a (33, 4) array and converts all of them to pixel
+    coordinates in a single vectorized step the first time any consumer asks,
+    instead of each consumer repeating int(landmarks[i].x * width) itself.
+
+    Args:
+        array: (33, 4) array of normalized x, y, z, visibility
+        frame_shape: Shape of the frame the pose belongs to
+    """
+
+    __slots__ = ('array', 'height', 'width', '_pixels', '_points')
+
+    def __init__(self, array, frame_shape):
+        self.array = array
+        self.height, self.width = frame_shape[:2]
+        self._pixels = None
+        self._points = None
+
+    @classmethod
+    def from_landmarks(cls, landmarks, frame_shape):
+        return cls(landmarks_to_array(landmarks), frame_shape)
+
+    @classmethod
+    def from_results(cls, results, frame_shape):
+        """PoseFrame for a MediaPipe result, or None when no pose was detected."""
+        if not results.pose_landmarks:
+            return None
+        return cls.from_landmarks(results.pose_landmarks.landmark, frame_shape)
+
+    @property
+    def pixels(self):
+        """(33, 2) integer pixel coordinates of every landmark."""
+        if self._pixels is None:
+            self._pixels = pixel_points(self.array, (self.height, self.width))
+        return self._pixels
+
+    @property
+    def points(self):
+        """The pixel coordinates as [x, y] lists of Python ints, ready for OpenCV."""
+        if self._points is None:
+            self._points = self.pixels.tolist()
+        return self._points
+
+    def point(self, index):
+        return self.points[index]
+
+    def angles(self, triples):
+        """Angles in degrees at b for each (a, b, c) landmark triple, as Python floats."""
+        return calculate_angles(self.pixels, triples).tolist()
+
+    def __getitem__(self, index):
+        return Landmark(*self.array[index].tolist())
+
+    def __len__(self):
+        return len(self.array)
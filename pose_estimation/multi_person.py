@@ -0,0 +1,300 @@
+"""
+Multi-Person Pose Module
+Finds several people per frame and follows each one's pose on a crop of their own
+"""
+
+import itertools
+import logging
+import time
+
+import cv2
+
+from pose_estimation.estimation import PoseEstimator
+from pose_estimation.landmarks import PoseFrame
+from pose_estimation.roi import follow_roi, pad_box, landmark_bounds, box_area
+from utils.buffer_pool import BufferPool
+
+logger = logging.getLogger(__name__)
+
+
+def _intersection(a, b):
+    x0, y0 = max(a[0], b[0]), max(a[1], b[1])
+    x1, y1 = min(a[2], b[2]), min(a[3], b[3])
+    return max(x1 - x0, 0) * max(y1 - y0, 0)
+
+
+def coverage(crop, box):
+    """Fraction of box that lies inside crop."""
+    return _intersection(crop, box) / box_area(box)
+
+
+def tile_grid(frame_shape, columns, rows, overlap=0.25):
+    """(x0, y0, x1, y1) tiles covering the frame, each overlapping its neighbours by `overlap`."""
+    height, width = frame_shape[:2]
+    tile_width = min(int(width / columns * (1 + overlap)), width)
+    tile_height = min(int(height / rows * (1 + overlap)), height)
+    tiles = []
+    for row in range(rows):
+        y = 0 if rows == 1 else row * (height - tile_height) // (rows - 1)
+        for column in range(columns):
+            x = 0 if columns == 1 else column * (width - tile_width) // (columns - 1)
+            tiles.append((x, y, x + tile_width, y + tile_height))
+    return tiles
+
+
+class PersonDetector:
+    """
+    Finds up to max_people bodies with MediaPipe's own pose detector.
+
+    MediaPipe letterboxes its input to 224 px, so in a wide group shot each
+    person would be only a few pixels tall. The frame is therefore split
+    into a grid of overlapping tiles. On each tile the single-person graph
+    is run, the body it finds is painted over and the graph is run again
+    until nothing more is found. Bodies seen in two tiles are merged.
+
+    Unlike OpenCV's HOG people detector this also finds people who are only
+    visible from the waist up or lying down for push-ups.
+
+    Args:
+        max_people: Most bodies returned per call
+        grid: (columns, rows) of detection tiles
+        tile_width: Width each tile is shrunk to before detection
+        padding: Fraction of a body's size added around its box
+    """
+
+    def __init__(self, max_people=6, grid=(3, 2), tile_width=480, padding=0.25):
+        self.max_people = max_people
+        self.grid = grid
+        self.tile_width = tile_width
+        self.padding = padding
+        self.estimator = PoseEstimator(static_image_mode=True)
+        self.buffers = BufferPool(max_free=2)
+
+    def detect(self, frame):
+        """Padded (x0, y0, x1, y1) full-frame boxes of the bodies found, largest first."""
+        boxes = []
+        for tile in tile_grid(frame.shape, *self.grid):
+            boxes.extend(self._detect_tile(frame, tile))
+
+        merged = []
+        for box in sorted(boxes, key=box_area, reverse=True):
+            # A body cut by a tile edge shows up as a part of its box from the neighbouring tile
+            if all(_intersection(box, kept) < 0.6 * box_area(box) for kept in merged):
+                merged.append(box)
+        return merged[:self.max_people]
+
+    def _detect_tile(self, frame, tile):
+        x0, y0, x1, y1 = tile
+        scale = min(self.tile_width / (x1 - x0), 1.0)
+        size = (round((x1 - x0) * scale), round((y1 - y0) * scale))
+        work = cv2.resize(frame[y0:y1, x0:x1], size, dst=self.buffers.acquire((size[1], size[0], 3)),
+                          interpolation=cv2.INTER_AREA)
+        boxes = []
+        try:
+            for _ in range(self.max_people):
+                pose = PoseFrame.from_results(self.estimator.estimate_pose(work, None, draw=False), work.shape)
+                if pose is None:
+                    break
+                visible = pose.array[pose.array[:, 3] > 0.5]
+                if len(visible) == 0:
+                    break
+                # Guessed limbs outside the picture would reach into neighbours
+                bounds = landmark_bounds(visible, work.shape)
+                box = pad_box(bounds, self.padding, work.shape)
+                mask = pad_box(bounds, 0.05, work.shape)
+                if box is None or mask is None:
+                    break
+                work[mask[1]:mask[3], mask[0]:mask[2]] = 127
+                boxes.append((x0 + round(box[0] / scale), y0 + round(box[1] / scale),
+                              x0 + round(box[2] / scale), y0 + round(box[3] / scale)))
+        finally:
+            self.buffers.release(work)
+        return boxes
+
+
+class PersonTrack:
+    """
+    One person followed from frame to frame.
+
+    Has its own MediaPipe graph, run only on the person's crop, and its own
+    exercise tracker and landmark smoother, so no state ever mixes between
+    people.
+    """
+
+    def __init__(self, track_id, box, exercise, smoother=None):
+        self.id = track_id
+        self.box = box
+        self.exercise = exercise
+        self.smoother = smoother
+        self.estimator = PoseEstimator()
+        self.pose = None
+        self.missed = 0
+        self.age = 0
+        self.stale = 0
+        self.sets_completed = 0
+
+    def reseed(self, box):
+        """Move the crop to a fresh detection of this person."""
+        if box != self.box:
+            self.box = box
+            self.estimator.reset()
+
+    def update(self, frame, timestamp, padding, min_visibility):
+        results = self.estimator.estimate_crop(frame, self.box)
+        pose = PoseFrame.from_results(results, frame.shape)
+        self.stale = 0
+        if pose is None:
+            self.pose = None
+            self.missed += 1
+            return None
+        self.missed = 0
+        self.pose = self.smoother.smooth(pose, timestamp) if self.smoother is not None else pose
+        # The crop follows the raw landmarks so it keeps up with fast moves
+        box = follow_roi(self.box, pose.array, frame.shape, padding, min_visibility,
+                         max_fraction=1.0, visible_only=True)
+        if box is not None and box != self.box:
+            self.box = box
+            # MediaPipe tracks in crop coordinates, which just changed
+            self.estimator.reset()
+        return self.pose
+
+    def close(self):
+        self.estimator.close()
+
+
+class MultiPoseTracker:
+    """
+    Tracks the poses of several people on one camera.
+
+    Every detect_interval frames while a place is free or someone is
+    missing, and every empty_detect_interval frames while nobody is
+    tracked, the PersonDetector looks for bodies. A tiled detection pass
+    costs several full inferences, so an empty room is not searched on
+    every frame either. Each detection is matched to the track
+    whose crop covers most of it, unmatched ones start new tracks with
+    fresh ids, and tracks not seen for max_missed inferences are dropped.
+    In between, each track's pose runs on its own crop only; when two crops
+    drift onto the same person the younger track is dropped.
+
+    With more people than max_poses_per_frame, only the tracks that have
+    waited longest are inferred on a frame, so the cost of a frame stays
+    bounded and each person is sampled a little less often as the group
+    grows.
+
+    Args:
+        exercise_factory: Callable returning a new exercise tracker for a person
+        smoother_factory: Callable returning a new PoseSmoother for a person, or None
+        max_people: Most people tracked at once
+        detect_interval: Frames between two detection passes
+        empty_detect_interval: Frames between two detection passes while nobody is tracked
+        max_poses_per_frame: Most per-person inferences on one frame, or None for all
+        max_missed: Consecutive inferences without a pose before a track is dropped
+        match_threshold: Fraction of a detection a track's crop must cover to match it
+        padding: Fraction of a body's size added around its crop
+        min_visibility: Mean landmark visibility needed to move a crop
+    """
+
+    def __init__(self, exercise_factory, max_people=6, detect_interval=30, max_poses_per_frame=3,
+                 max_missed=10, match_threshold=0.5, padding=0.4, min_visibility=0.3, smoother_factory=None,
+                 empty_detect_interval=5):
+        self.exercise_factory = exercise_factory
+        self.smoother_factory = smoother_factory
+        self.max_people = max_people
+        self.detect_interval = detect_interval
+        self.empty_detect_interval = empty_detect_interval
+        self.max_poses_per_frame = max_poses_per_frame
+        self.max_missed = max_missed
+        self.match_threshold = match_threshold
+        self.padding = padding
+        self.min_visibility = min_visibility
+        self.detector = PersonDetector(max_people=max_people)
+        self.tracks = []
+        self.frame_index = 0
+        self.counts = {'detections': 0, 'pose_inferences': 0}
+        self._ids = itertools.count(1)
+
+    def process(self, frame, timestamp=None):
+        """
+        Update the tracks with a frame taken at timestamp seconds (now by default).
+
+        Returns:
+            The current tracks; track.pose is the person's PoseFrame on this
+            frame, or None if they were not inferred or not found
+        """
+        timestamp = time.perf_counter() if timestamp is None else timestamp
+        searching = len(self.tracks) < self.max_people or any(track.missed for track in self.tracks)
+        interval = self.detect_interval if self.tracks else self.empty_detect_interval
+        if searching and self.frame_index % interval == 0:
+            self._detect(frame)
+        self.frame_index += 1
+
+        for track in self.tracks:
+            track.pose = None
+            track.stale += 1
+            track.age += 1
+        for track in self._due_tracks():
+            track.update(frame, timestamp, self.padding, self.min_visibility)
+            self.counts['pose_inferences'] += 1
+
+        for track in [track for track in self.tracks if track.missed > self.max_missed]:
+            logger.info(f"Lost person {track.id}")
+            self._drop(track)
+        self._merge_converged()
+        return self.tracks
+
+    def _merge_converged(self):
+        """Drop the younger of two tracks whose crops drifted onto the same person."""
+        for older, younger in itertools.combinations(sorted(self.tracks, key=lambda track: -track.age), 2):
+            if older in self.tracks and younger in self.tracks and \
+                    older.pose is not None and younger.pose is not None and \
+                    coverage(older.box, younger.box) >= 0.8 and coverage(younger.box, older.box) >= 0.8:
+                logger.info(f"Person {younger.id} merged into person {older.id}")
+                self._drop(younger)
+
+    def _drop(self, track):
+        track.close()
+        self.tracks.remove(track)
+
+    def _due_tracks(self):
+        if self.max_poses_per_frame is None or len(self.tracks) <= self.max_poses_per_frame:
+            return list(self.tracks)
+        return sorted(self.tracks, key=lambda track: track.stale, reverse=True)[:self.max_poses_per_frame]
+
+    def _detect(self, frame):
+        boxes = self.detector.detect(frame)
+        self.counts['detections'] += 1
+
+        pairs = sorted(((coverage(track.box, box), index, track) for index, box in enumerate(boxes)
+                        for track in self.tracks), key=lambda pair: pair[0], reverse=True)
+        matched_boxes = set()
+        matched_tracks = set()
+        for overlap, index, track in pairs:
+            if overlap < self.match_threshold:
+                break
+            if index in matched_boxes or track.id in matched_tracks:
+                continue
+            matched_boxes.add(index)
+            matched_tracks.add(track.id)
+            # A track still following its person keeps its own crop
+            if track.missed:
+                track.reseed(boxes[index])
+
+        for index, box in enumerate(boxes):
+            if index in matched_boxes or len(self.tracks) >= self.max_people:
+                continue
+            # Skip bodies already inside someone's crop that were not paired up
+            if any(coverage(track.box, box) >= self.match_threshold for track in self.tracks):
+                continue
+            smoother = self.smoother_factory() if self.smoother_factory else None
+            track = PersonTrack(next(self._ids), box, self.exercise_factory(), smoother)
+            self.tracks.append(track)
+            logger.info(f"Tracking person {track.id}")
+
+    def stats(self):
+        return {'people': len(self.tracks), 'frames': self.frame_index, **self.counts}
+
+    def close(self):
+        for track in self.tracks:
+            track.close()
+        self.tracks = []
+        self.detector.estimator.close()
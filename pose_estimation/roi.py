@@ -0,0 +1,83 @@
+"""
+Region Of Interest Module
+Body bounding boxes used to run pose inference on a crop of the frame
+"""
+
+import numpy as np
+
+# Side length the pose landmark model resizes its input to
+MODEL_INPUT_SIZE = 256
+
+
+def landmark_bounds(array, frame_shape):
+    """Tight (x0, y0, x1, y1) pixel box around (33, 4) normalized landmarks, clipped to the frame."""
+    height, width = frame_shape[:2]
+    xy = np.clip(array[:, :2], 0, 1) * (width, height)
+    x0, y0 = xy.min(axis=0)
+    x1, y1 = xy.max(axis=0)
+    return x0, y0, x1, y1
+
+
+def pad_box(box, padding, frame_shape):
+    """
+    Grow a box by `padding` times its size on every side and clip it to the frame.
+
+    Returns:
+        Integer (x0, y0, x1, y1), or None if nothing of it is inside the frame
+    """
+    height, width = frame_shape[:2]
+    x0, y0, x1, y1 = box
+    pad = padding * max(x1 - x0, y1 - y0)
+    x0, y0 = max(int(x0 - pad), 0), max(int(y0 - pad), 0)
+    x1, y1 = min(int(np.ceil(x1 + pad)), width), min(int(np.ceil(y1 + pad)), height)
+    if x1 <= x0 or y1 <= y0:
+        return None
+    return x0, y0, x1, y1
+
+
+def box_area(box):
+    return (box[2] - box[0]) * (box[3] - box[1])
+
+
+def contains(outer, inner, margin, frame_shape):
+    """
+    Whether inner lies inside outer shrunk by `margin` times outer's size.
+
+    Sides of outer on the frame border need no margin, as the body cannot
+    be tracked past them anyway.
+    """
+    height, width = frame_shape[:2]
+    mx = margin * (outer[2] - outer[0])
+    my = margin * (outer[3] - outer[1])
+    return ((outer[0] == 0 or inner[0] >= outer[0] + mx) and
+            (outer[1] == 0 or inner[1] >= outer[1] + my) and
+            (outer[2] == width or inner[2] <= outer[2] - mx) and
+            (outer[3] == height or inner[3] <= outer[3] - my))
+
+
+def follow_roi(roi, array, frame_shape, padding, min_visibility, max_fraction=0.8, visible_only=False):
+    """
+    Crop box for the next frame given this frame's (33, 4) landmarks.
+
+    The current box is kept while the body stays inside it with a 5% margin
+    and it is not much larger than needed, because MediaPipe has to be reset
+    whenever its input crop moves. With visible_only, landmarks below
+    min_visibility (guessed limbs outside the picture) do not widen the box.
+
+    Returns:
+        The box, or None when the landmarks are too uncertain to crop on or
+        the box would cover more than max_fraction of the frame
+    """
+    if array[:, 3].mean() < min_visibility:
+        return None
+    if visible_only:
+        array = array[array[:, 3] >= min_visibility]
+    bounds = landmark_bounds(array, frame_shape)
+    if roi is not None and contains(roi, bounds, 0.05, frame_shape):
+        padded = pad_box(bounds, padding, frame_shape)
+        if padded is None or box_area(roi) <= 2 * box_area(padded):
+            return roi
+    roi = pad_box(bounds, padding, frame_shape)
+    if roi is None or box_area(roi) > max_fraction * frame_shape[0] * frame_shape[1]:
+        return None
+    return roi
@@ -0,0 +1,141 @@
+"""
+Landmark Smoothing Module
+Temporal filtering of pose landmarks between the pose estimator and the exercise trackers
+"""
+
+import math
+
+import numpy as np
+
+from pose_estimation.landmarks import PoseFrame, has_pose
+
+# Landmarks are in normalized image units, so beta is per image width per second
+DEFAULT_MIN_CUTOFF = 1.0
+DEFAULT_BETA = 20.0
+DEFAULT_D_CUTOFF = 1.0
+
+
+def _alpha(cutoff, elapsed):
+    """Exponential smoothing factor of a first-order low-pass filter at `cutoff` Hz."""
+    tau = 1.0 / (2 * math.pi * cutoff)
+    return 1.0 / (1.0 + tau / elapsed)
+
+
+class OneEuroFilter:
+    """
+    One Euro filter (Casiez et al., 2012) over an array of values at once.
+
+    A low-pass filter whose cutoff rises with the speed of each value: at
+    rest the cutoff is min_cutoff and jitter is removed, while fast motion
+    raises it by beta times the speed so the output does not lag behind.
+    Lowering min_cutoff removes more jitter; raising beta reduces lag.
+
+    Every element of the array is filtered independently, so all 33
+    landmarks of a frame cost a handful of NumPy operations.
+
+    Args:
+        min_cutoff: Cutoff frequency in Hz at rest
+        beta: Cutoff increase in Hz per unit of speed (values per second)
+        d_cutoff: Cutoff frequency in Hz of the speed estimate
+    """
+
+    def __init__(self, min_cutoff=DEFAULT_MIN_CUTOFF, beta=DEFAULT_BETA, d_cutoff=DEFAULT_D_CUTOFF):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.reset()
+
+    def reset(self):
+        self._value = None
+        self._speed = None
+        self._timestamp = None
+
+    def __call__(self, values, timestamp):
+        """Filtered copy of values, observed at timestamp seconds."""
+        values = np.asarray(values, dtype=np.float64)
+        if self._value is None or timestamp <= self._timestamp:
+            self._value = values.copy()
+            self._speed = np.zeros_like(values)
+            self._timestamp = timestamp
+            return values.copy()
+
+        elapsed = timestamp - self._timestamp
+        speed = (values - self._value) / elapsed
+        self._speed += _alpha(self.d_cutoff, elapsed) * (speed - self._speed)
+
+        cutoff = self.min_cutoff + self.beta * np.abs(self._speed)
+        tau = 1.0 / (2 * np.pi * cutoff)
+        self._value += (values - self._value) / (1.0 + tau / elapsed)
+        self._timestamp = timestamp
+        return self._value.copy()
+
+
+class PoseSmoother:
+    """
+    Smooths the landmark coordinates of successive PoseFrames of one person.
+
+    x, y and z are filtered; visibility is passed through unchanged. After
+    more than max_gap seconds without a pose the filter starts over, so a
+    person walking back into view is not dragged in from where they left.
+
+    Any object with the OneEuroFilter interface (called with an array and a
+    timestamp, and reset()) can be passed as landmark_filter, a Kalman
+    filter for example.
+
+    Args:
+        landmark_filter: Filter applied to the (33, 3) coordinates; a OneEuroFilter by default
+        max_gap: Seconds without a pose after which the filter is reset
+    """
+
+    def __init__(self, landmark_filter=None, max_gap=0.5):
+        self.filter = landmark_filter if landmark_filter is not None else OneEuroFilter()
+        self.max_gap = max_gap
+        self._last_seen = None
+
+    def reset(self):
+        self.filter.reset()
+        self._last_seen = None
+
+    def smooth(self, pose, timestamp):
+        """
+        Smoothed PoseFrame for this frame's pose.
+
+        Args:
+            pose: PoseFrame, or None when no pose was found
+            timestamp: Time of the frame in seconds
+
+        Returns:
+            A new PoseFrame, or None if pose is None
+        """
+        if pose is None:
+            return None
+        if self._last_seen is not None and timestamp - self._last_seen > self.max_gap:
+            self.filter.reset()
+        self._last_seen = timestamp
+
+        array = np.empty_like(pose.array)
+        array[:, :3] = self.filter(pose.array[:, :3], timestamp)
+        array[:, 3] = pose.array[:, 3]
+        return PoseFrame(array, (pose.height, pose.width))
+
+
+def create_pose_smoother(min_cutoff=DEFAULT_MIN_CUTOFF, beta=DEFAULT_BETA, d_cutoff=DEFAULT_D_CUTOFF):
+    """PoseSmoother with a One Euro filter, the default smoothing of every tracking path."""
+    return PoseSmoother(OneEuroFilter(min_cutoff, beta, d_cutoff))
+
+
+def smooth_landmark_series(landmarks, fps, smoother=None, first_frame=0):
+    """
+    Smoothed copy of a (frames, 33, 4) landmark stack, frames without a pose left as NaN rows.
+
+    The rows are filtered in order exactly as a PoseSmoother would see them
+    live, with row i at time (first_frame + i) / fps. Passing the same
+    smoother for consecutive stacks continues the filter across them.
+    """
+    smoother = smoother if smoother is not None else create_pose_smoother()
+    smoothed = landmarks.copy()
+    for index, row in enumerate(landmarks):
+        if has_pose(row):
+            pose = smoother.smooth(PoseFrame(row, (1, 1)), (first_frame + index) / fps)
+            smoothed[index] = pose.array
+    return smoothed
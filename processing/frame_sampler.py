@@ -0,0 +1,124 @@
+"""
+Frame Sampler Module
+Runs pose inference at an adaptive stride over a video and interpolates the
+landmarks of the frames in between
+"""
+
+import numpy as np
+
+from exercises.tracking import measure_counting_angles
+from pose_estimation.landmarks import PoseFrame, landmarks_to_array
+
+# Tracker attributes holding the angles at which the rep state machine changes stage
+THRESHOLD_ATTRIBUTES = ('angle_threshold_up', 'angle_threshold_down', 'angle_threshold_return')
+
+
+def stage_thresholds(exercise):
+    return [getattr(exercise, name) for name in THRESHOLD_ATTRIBUTES if hasattr(exercise, name)]
+
+
+class AdaptiveStrideSampler:
+    """
+    Decides which frames get real pose inference.
+
+    Every frame is inferred while a counting angle is within threshold_margin
+    degrees of a stage threshold, or while no pose is found. Elsewhere the
+    stride grows with the number of frames the angle needs, at its current
+    velocity, to reach that margin, capped at max_stride. Skipped frames get
+    landmarks linearly interpolated between the surrounding inferred frames,
+    so the state machine still sees every threshold crossing.
+    """
+
+    def __init__(self, pose_estimator, exercise, exercise_type, max_stride=4, threshold_margin=15.0):
+        self.pose_estimator = pose_estimator
+        self.exercise = exercise
+        self.exercise_type = exercise_type
+        self.max_stride = max(1, int(max_stride))
+        self.threshold_margin = threshold_margin
+        self.thresholds = stage_thresholds(exercise)
+        self.inferred_frames = 0
+        self.interpolated_frames = 0
+
+    def _infer(self, frame):
+        self.inferred_frames += 1
+        results = self.pose_estimator.estimate_pose(frame, self.exercise_type, draw=False)
+        if not results.pose_landmarks:
+            return None
+        return landmarks_to_array(results.pose_landmarks.landmark)
+
+    def next_stride(self, angles, velocity):
+        """Frames until the next inference given the last counting angles and their per-frame velocity."""
+        if angles is None or velocity is None or not self.thresholds:
+            return 1
+        distance = min(abs(angle - threshold) for angle in angles for threshold in self.thresholds)
+        headroom = distance - self.threshold_margin
+        if headroom <= 0:
+            return 1
+        speed = float(np.max(np.abs(velocity)))
+        if speed < 1e-6:
+            return self.max_stride
+        return int(min(self.max_stride, max(1, headroom // speed)))
+
+    def iter_landmarks(self, reader, decode_skipped=True):
+        """
+        Yield (frame, pose) for every frame of a VideoFrameReader in order.
+
+        pose is a PoseFrame, interpolated for skipped frames, or None when no
+        pose was found. With decode_skipped=False skipped frames are only
+        grabbed and come back as None frames.
+        """
+        last_pose = last_angles = velocity = None
+
+        while True:
+            stride = self.next_stride(last_angles, velocity)
+            skipped = []
+            ended = False
+            for _ in range(stride - 1):
+                if decode_skipped:
+                    frame = reader.read()
+                    ended = frame is None
+                else:
+                    ended = not reader.grab()
+                    frame = None
+                if ended:
+                    break
+                skipped.append(frame)
+
+            key_frame = None if ended else reader.read()
+            if key_frame is None:
+                # Video ended inside a skip; hold the last inferred pose
+                self.interpolated_frames += len(skipped)
+                for frame in skipped:
+                    yield frame, last_pose
+                return
+
+            array = self._infer(key_frame)
+            pose = PoseFrame(array, key_frame.shape) if array is not None else None
+            steps = len(skipped) + 1
+            self.interpolated_frames += len(skipped)
+            for offset, frame in enumerate(skipped, start=1):
+                if pose is None or last_pose is None:
+                    yield frame, None
+                else:
+                    weight = offset / steps
+                    yield frame, PoseFrame(last_pose.array + (array - last_pose.array) * weight, key_frame.shape)
+
+            yield key_frame, pose
+
+            if pose is None:
+                last_pose = last_angles = velocity = None
+                continue
+
+            angles = np.array(measure_counting_angles(self.exercise, pose))
+            if last_angles is not None:
+                velocity = (angles - last_angles) / steps
+            last_pose, last_angles = pose, angles
+
+    def stats(self):
+        total = self.inferred_frames + self.interpolated_frames
+        return {
+            'max_stride': self.max_stride,
+            'inferred_frames': self.inferred_frames,
+            'interpolated_frames': self.interpolated_frames,
+            'inference_ratio': round(self.inferred_frames / total, 3) if total else 0
+        }
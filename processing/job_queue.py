@@ -0,0 +1,266 @@
+"""
+Video Job Queue Module
+Bounded, prioritised queue of upload analyses run on a pool of worker processes
+"""
+
+import heapq
+import itertools
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+logger = logging.getLogger(__name__)
+
+# Per-worker-process state, set up once by _init_worker
+_worker_pose_estimator = None
+_worker_progress_queue = None
+_worker_landmark_cache = None
+_worker_autotuner = None
+_worker_time_budget = 0
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at capacity."""
+
+
+class JobActiveError(Exception):
+    """Raised when a job is submitted for a file whose previous job is still queued or processing."""
+
+
+def _init_worker(progress_queue, landmark_cache=None, time_budget=0, roi_tracking=False):
+    global _worker_pose_estimator, _worker_progress_queue, _worker_landmark_cache
+    global _worker_autotuner, _worker_time_budget
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    from processing.video_analysis import create_video_pose_estimator
+    _worker_progress_queue = progress_queue
+    _worker_landmark_cache = landmark_cache
+    _worker_time_budget = time_budget
+    if time_budget > 0:
+        from pose_estimation.autotune import PoseAutotuner
+        # Measured in the worker itself, under the same load its jobs will see
+        _worker_autotuner = PoseAutotuner()
+        _worker_autotuner.calibrate()
+    # Load the MediaPipe graph once per process instead of once per upload
+    _worker_pose_estimator = create_video_pose_estimator(autotuner=_worker_autotuner, roi_tracking=roi_tracking)
+
+
+def _video_fps(video_path):
+    import cv2
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    cap.release()
+    return fps or 30
+
+
+def _run_job(file_id, video_path, exercise_type, options, output_dir):
+    from processing.video_analysis import process_uploaded_video, analyze_uploaded_video
+    from processing.parallel_video import process_video_parallel
+    from processing.timeline import timeline_path
+
+    def update_progress(current_frame, total_frames):
+        if total_frames > 0:
+            _worker_progress_queue.put((file_id, int((current_frame / total_frames) * 100)))
+
+    max_stride = options.get('max_stride', 1)
+    start_time = options.get('start_time')
+    end_time = options.get('end_time')
+    timeline_file = timeline_path(output_dir, file_id)
+    if _worker_autotuner is not None:
+        _worker_autotuner.set_target_latency(_worker_time_budget / _video_fps(video_path))
+
+    if not options.get('render', True):
+        result = analyze_uploaded_video(video_path, exercise_type, update_progress,
+                                        pose_estimator=_worker_pose_estimator, max_stride=max_stride,
+                                        start_time=start_time, end_time=end_time,
+                                        landmark_cache=_worker_landmark_cache, timeline_path=timeline_file,
+                                        fill_cache=options.get('fill_cache', False))
+    elif options.get('segments', 1) > 1 and start_time is None and end_time is None:
+        result = process_video_parallel(video_path, exercise_type, file_id, output_dir, update_progress,
+                                        segments=options['segments'], timeline_path=timeline_file)
+    else:
+        result = process_uploaded_video(video_path, exercise_type, file_id, output_dir, update_progress,
+                                        pose_estimator=_worker_pose_estimator, max_stride=max_stride,
+                                        start_time=start_time, end_time=end_time,
+                                        landmark_cache=_worker_landmark_cache, timeline_path=timeline_file,
+                                        fill_cache=options.get('fill_cache', False))
+
+    result['timeline_url'] = f'/timeline/{file_id}'
+    if _worker_autotuner is not None:
+        result['autotune'] = {'worker_pid': os.getpid(), **_worker_autotuner.status()}
+    return result
+
+
+class VideoJobQueue:
+    """
+    Schedules uploaded-video analyses onto a fixed pool of worker processes.
+
+    Jobs wait in a priority heap (higher priority first, FIFO within a
+    priority) and are only handed to the pool when a worker is free, so
+    queue positions stay meaningful. Submitting beyond max_queued waiting
+    jobs raises QueueFullError. Jobs and their output files are keyed by
+    file id, so a file can have only one queued or running job at a time.
+
+    Args:
+        output_dir: Directory processed videos are written to
+        workers: Number of worker processes
+        max_queued: Maximum number of jobs waiting for a worker
+        landmark_cache: Optional LandmarkCache shared by the workers
+        time_budget: Seconds of processing allowed per second of video; above 0
+                     each worker autotunes its pose estimator to meet it
+        roi_tracking: Run the workers' pose inference on a crop around the body
+    """
+
+    def __init__(self, output_dir, workers=2, max_queued=8, landmark_cache=None, time_budget=0,
+                 roi_tracking=False):
+        self.output_dir = output_dir
+        self.landmark_cache = landmark_cache
+        self.time_budget = time_budget
+        self.roi_tracking = roi_tracking
+        # Latest autotuner status reported by each worker process, keyed by pid
+        self.worker_autotune = {}
+        self.workers = workers
+        self.max_queued = max_queued
+        self.jobs = {}
+        self._pending = []
+        self._sequence = itertools.count()
+        self._in_flight = 0
+        self._condition = threading.Condition()
+        self._context = multiprocessing.get_context('spawn')
+        self._progress_queue = None
+        self._executor = None
+        self._started = False
+
+    def submit(self, file_id, video_path, exercise_type, priority=0, options=None):
+        """
+        Queue an analysis job.
+
+        Args:
+            options: Optional dict of processing options: 'segments' to split
+                     the video across several processes, 'render': False to
+                     skip the annotated video and return only statistics,
+                     'max_stride' to let the adaptive sampler skip inference,
+                     'start_time'/'end_time' in seconds to analyse only part
+                     of the video (trimmed jobs always run serially),
+                     'fill_cache' to infer every frame on a landmark cache
+                     miss so the result can be cached
+
+        Raises:
+            QueueFullError: If max_queued jobs are already waiting
+            JobActiveError: If the file already has a job queued or processing
+        """
+        with self._condition:
+            previous = self.jobs.get(file_id)
+            if previous is not None and previous['status'] in ('queued', 'processing'):
+                raise JobActiveError(f"Video {file_id} is already {previous['status']}")
+            if len(self._pending) >= self.max_queued:
+                raise QueueFullError(f"Video queue is full ({self.max_queued} jobs waiting)")
+            self._start()
+            self.jobs[file_id] = {
+                'progress': 0,
+                'status': 'queued',
+                'result': None,
+                'error': None,
+                'priority': priority,
+                'submitted_at': time.time()
+            }
+            job = (file_id, video_path, exercise_type, options or {})
+            heapq.heappush(self._pending, (-priority, next(self._sequence), job))
+            self._condition.notify_all()
+        return self.queue_position(file_id)
+
+    def queue_position(self, file_id):
+        """1-based position among waiting jobs, or None if the job is not waiting."""
+        with self._condition:
+            ordered = sorted(self._pending)
+        for position, (_, _, job) in enumerate(ordered, start=1):
+            if job[0] == file_id:
+                return position
+        return None
+
+    def status(self, file_id):
+        job = self.jobs.get(file_id)
+        if job is None:
+            return None
+        status = dict(job)
+        if status['status'] == 'queued':
+            status['queue_position'] = self.queue_position(file_id)
+        return status
+
+    def _start(self):
+        if self._started:
+            return
+        self._started = True
+        self._progress_queue = self._context.Queue()
+        self._executor = self._create_executor()
+        threading.Thread(target=self._dispatch_loop, name="video-dispatch", daemon=True).start()
+        threading.Thread(target=self._progress_loop, name="video-progress", daemon=True).start()
+        logger.info(f"Started video job queue with {self.workers} worker processes")
+
+    def _create_executor(self):
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=self._context,
+                                   initializer=_init_worker,
+                                   initargs=(self._progress_queue, self.landmark_cache, self.time_budget,
+                                             self.roi_tracking))
+
+    def _dispatch_loop(self):
+        while True:
+            with self._condition:
+                while not self._pending or self._in_flight >= self.workers:
+                    self._condition.wait()
+                _, _, job = heapq.heappop(self._pending)
+                self._in_flight += 1
+            file_id = job[0]
+            self.jobs[file_id]['status'] = 'processing'
+
+            try:
+                future = self._executor.submit(_run_job, *job, self.output_dir)
+            except BrokenProcessPool:
+                logger.error("Video worker pool broke, restarting it")
+                try:
+                    self._executor = self._create_executor()
+                    future = self._executor.submit(_run_job, *job, self.output_dir)
+                except Exception as e:
+                    # Fail this job rather than the dispatch thread, which would leave it in flight forever
+                    self._job_failed(file_id, e)
+                    self._job_finished()
+                    continue
+            future.add_done_callback(lambda f, file_id=file_id: self._on_job_done(file_id, f))
+
+    def _on_job_done(self, file_id, future):
+        job = self.jobs[file_id]
+        try:
+            job['result'] = future.result()
+            if 'autotune' in job['result']:
+                self.worker_autotune[job['result']['autotune']['worker_pid']] = job['result']['autotune']
+            job['progress'] = 100
+            job['status'] = 'complete'
+        except Exception as e:
+            self._job_failed(file_id, e)
+        self._job_finished()
+
+    def _job_failed(self, file_id, error):
+        logger.error(f"Error processing video {file_id}: {error}")
+        job = self.jobs[file_id]
+        job['status'] = 'error'
+        job['error'] = str(error)
+
+    def _job_finished(self):
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+    def _progress_loop(self):
+        while True:
+            try:
+                file_id, progress = self._progress_queue.get()
+            except (EOFError, OSError, queue.Empty):
+                return
+            job = self.jobs.get(file_id)
+            if job is not None and job['status'] == 'processing':
+                job['progress'] = progress
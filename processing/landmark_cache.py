@@ -0,0 +1,115 @@
+"""
+Landmark Cache Module
+Stores per-frame pose landmarks of analysed videos so re-analysis skips inference
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def file_content_hash(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class LandmarkCache:
+    """
+    Directory of compressed (frames, 33, 4) landmark arrays, one .npz per video.
+
+    Entries are keyed by the video's content hash plus the estimator
+    settings and processing size, so a re-upload of the same file hits the
+    cache while a change of model or confidence does not. Whenever the
+    directory grows past max_bytes the least recently used entries are
+    removed; a hit refreshes an entry's modification time.
+
+    The cache holds no open handles and can be passed to worker processes.
+
+    Args:
+        cache_dir: Directory the .npz files are kept in
+        max_bytes: Total size the directory is trimmed back to
+    """
+
+    def __init__(self, cache_dir, max_bytes=1024 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, video_path, settings, size):
+        """Cache key for a video analysed with the given estimator settings at size (width, height)."""
+        description = json.dumps({'settings': settings, 'size': list(size)}, sort_keys=True)
+        settings_hash = hashlib.sha256(description.encode()).hexdigest()[:16]
+        return f"{file_content_hash(video_path)}_{settings_hash}"
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.npz")
+
+    def load(self, key):
+        """The cached landmarks for key, or None on a miss."""
+        path = self._path(key)
+        try:
+            with np.load(path) as data:
+                landmarks = data['landmarks']
+            os.utime(path)
+        except (OSError, KeyError, ValueError):
+            return None
+        logger.info(f"Landmark cache hit for {key} ({len(landmarks)} frames)")
+        return landmarks
+
+    def store(self, key, landmarks):
+        # Write to a temporary file first so concurrent workers never read a partial entry
+        fd, temp_path = tempfile.mkstemp(suffix='.tmp', dir=self.cache_dir)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez_compressed(f, landmarks=landmarks)
+            os.replace(temp_path, self._path(key))
+        except OSError as e:
+            logger.warning(f"Could not store landmarks for {key}: {e}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return
+        self.evict()
+
+    def entries(self):
+        """(path, size, mtime) of every entry, least recently used first."""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.npz'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((path, stat.st_size, stat.st_mtime))
+        return sorted(entries, key=lambda entry: entry[2])
+
+    def evict(self):
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                logger.info(f"Evicted {os.path.basename(path)} from landmark cache")
+            except OSError:
+                pass
+
+    def stats(self):
+        entries = self.entries()
+        return {
+            'entries': len(entries),
+            'size_bytes': sum(size for _, size, _ in entries),
+            'max_bytes': self.max_bytes
+        }
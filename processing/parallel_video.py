@@ -0,0 +1,270 @@
+"""
+Parallel Video Module
+Splits one uploaded video into segments and analyses them on several processes
+"""
+
+import copy
+import logging
+import math
+import multiprocessing
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+from pose_estimation.estimation import PoseEstimator
+from pose_estimation.landmarks import PoseFrame, landmarks_to_array, empty_landmarks, has_pose
+from pose_estimation.smoothing import create_pose_smoother, smooth_landmark_series
+from exercises.tracking import (create_exercise, track_exercise, exercise_reps,
+                                measure_counting_angle_series, history_angle)
+from processing.video_analysis import (create_video_pose_estimator, open_video, process_uploaded_video,
+                                       build_result)
+from processing.video_encoder import open_video_encoder, open_video_writer
+from processing.video_reader import open_at_frame
+from processing.timeline import TimelineWriter
+
+logger = logging.getLogger(__name__)
+
+# Per-worker-process estimator, set up once by _init_segment_worker
+_segment_pose_estimator = None
+
+
+def _init_segment_worker():
+    global _segment_pose_estimator
+    _segment_pose_estimator = create_video_pose_estimator()
+
+
+def plan_segments(total_frames, segments, overlap_frames):
+    """
+    Split [0, total_frames) into contiguous segments.
+
+    Returns:
+        List of (warmup_start, start, end) tuples. Frames from warmup_start to
+        start are only used to let MediaPipe's tracker settle; end is None for
+        the last segment so it reads to the real end of the file even when the
+        container's frame count is off.
+    """
+    length = math.ceil(total_frames / segments)
+    plan = []
+    for index in range(segments):
+        start = index * length
+        if start >= total_frames:
+            break
+        end = None if index == segments - 1 else min(start + length, total_frames)
+        plan.append((max(0, start - overlap_frames), start, end))
+    return plan
+
+
+def _read_frames(cap, first, end, size):
+    index = first
+    while end is None or index < end:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        if (frame.shape[1], frame.shape[0]) != size:
+            frame = cv2.resize(frame, size, interpolation=cv2.INTER_LINEAR)
+        yield index, frame
+        index += 1
+
+
+def _infer_segment(video_path, warmup_start, start, end, size, exercise_type):
+    """Pass 1: run pose inference over a segment and return its landmarks."""
+    pose_estimator = _segment_pose_estimator
+    pose_estimator.reset()
+    cap = open_at_frame(video_path, warmup_start)
+
+    rows = []
+    for index, frame in _read_frames(cap, warmup_start, end, size):
+        results = pose_estimator.estimate_pose(frame, exercise_type, draw=False)
+        if index < start:
+            continue
+        if results.pose_landmarks:
+            rows.append(landmarks_to_array(results.pose_landmarks.landmark))
+        else:
+            rows.append(empty_landmarks(1)[0])
+    cap.release()
+
+    return np.stack(rows) if rows else empty_landmarks(0)
+
+
+def _render_segment(video_path, start, landmarks, exercise, exercise_type, size, fps, segment_path):
+    """Pass 3: draw a segment's overlays from stored landmarks with a pre-seeded tracker."""
+    cap = open_at_frame(video_path, start)
+    out = open_video_encoder(segment_path, fps, size)
+
+    written = 0
+    try:
+        for index, frame in _read_frames(cap, start, start + len(landmarks), size):
+            row = landmarks[index - start]
+            if has_pose(row):
+                pose = PoseFrame(row, frame.shape)
+                PoseEstimator.draw_exercise_lines(frame, exercise_type, pose)
+                track_exercise(exercise, exercise_type, pose, frame)
+            out.write(frame)
+            written += 1
+        out.release()
+    finally:
+        cap.release()
+        out.close()
+    return written, out.stats()
+
+
+def concat_segments(segment_paths, output_path, fps, size, stream_copy):
+    """
+    Join segment files into one video.
+
+    Segments that ffmpeg already encoded with identical settings are joined
+    with a stream copy, so nothing is re-encoded; otherwise frames are
+    copied through an OpenCV writer.
+    """
+    ffmpeg_path = shutil.which('ffmpeg')
+    if stream_copy and ffmpeg_path:
+        list_path = output_path + '.segments.txt'
+        with open(list_path, 'w') as f:
+            for path in segment_paths:
+                f.write(f"file '{os.path.abspath(path)}'\n")
+        cmd = [
+            ffmpeg_path,
+            '-loglevel', 'error',
+            '-f', 'concat',
+            '-safe', '0',
+            '-i', list_path,
+            '-c', 'copy',
+            '-movflags', '+faststart',
+            '-y',
+            output_path
+        ]
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
+            if result.returncode == 0:
+                return
+            logger.warning(f"FFmpeg concat failed: {result.stderr}")
+        except Exception as e:
+            logger.warning(f"FFmpeg concat error: {e}")
+        finally:
+            os.remove(list_path)
+
+    out = open_video_writer(output_path, fps, size)
+    for path in segment_paths:
+        cap = cv2.VideoCapture(path)
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            out.write(frame)
+        cap.release()
+    out.release()
+
+
+def process_video_parallel(video_path, exercise_type, file_id, output_dir, progress_callback=None,
+                           segments=4, overlap_frames=30, timeline_path=None):
+    """
+    Analyse one video on several processes and return the same result as process_uploaded_video.
+
+    Pass 1 runs MediaPipe on each segment in parallel (starting overlap_frames
+    early so the tracker is settled at the segment boundary). Pass 2 replays
+    the rep state machine serially over the stitched angle series, which is
+    cheap, and snapshots the tracker at each boundary. Pass 3 renders the
+    segments in parallel from the stored landmarks with trackers seeded from
+    those snapshots, so overlays and counts match a single serial pass.
+    """
+    start_time = time.time()
+    cap, fps, width, height, total_frames, _ = open_video(video_path)
+    cap.release()
+
+    if segments <= 1 or total_frames < segments * overlap_frames * 2:
+        logger.info("Video too short to split, processing serially")
+        return process_uploaded_video(video_path, exercise_type, file_id, output_dir, progress_callback,
+                                      timeline_path=timeline_path)
+
+    size = (width, height)
+    plan = plan_segments(total_frames, segments, overlap_frames)
+    logger.info(f"Processing {total_frames} frames in {len(plan)} segments ({overlap_frames} frame overlap)")
+
+    def report(done_frames):
+        if progress_callback:
+            # Inference and rendering each count for half of the work
+            progress_callback(done_frames, total_frames * 2)
+
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=len(plan), mp_context=context,
+                             initializer=_init_segment_worker) as executor:
+        futures = [executor.submit(_infer_segment, video_path, *bounds, size, exercise_type) for bounds in plan]
+        segment_landmarks = []
+        done_frames = 0
+        for future in futures:
+            segment_landmarks.append(future.result())
+            done_frames += len(segment_landmarks[-1])
+            report(done_frames)
+
+        exercise = create_exercise(exercise_type)
+        seeds = []
+        angles_history = []
+        frames_with_landmarks = 0
+        timeline = TimelineWriter(timeline_path, fps, exercise_type) if timeline_path else None
+        frame_index = 0
+        smoother = create_pose_smoother()
+        for segment, landmarks in enumerate(segment_landmarks):
+            # Smoothed serially so the filter runs across segment boundaries; pass 3 draws these too
+            landmarks = smooth_landmark_series(landmarks, fps, smoother, first_frame=frame_index)
+            segment_landmarks[segment] = landmarks
+            seeds.append(copy.deepcopy(exercise))
+            detected, series = measure_counting_angle_series(exercise, landmarks, (height, width))
+            series = iter(series.tolist())
+            for row, has_landmarks in zip(landmarks, detected.tolist()):
+                angle = None
+                if has_landmarks:
+                    angles = next(series)
+                    exercise.update_stage(*angles)
+                    angle = history_angle(angles)
+                    angles_history.append(angle)
+                    frames_with_landmarks += 1
+                if timeline:
+                    pose = PoseFrame(row, (height, width)) if has_landmarks else None
+                    timeline.append(frame_index, pose, angle, exercise)
+                frame_index += 1
+        if timeline:
+            timeline.close()
+        total_reps = exercise_reps(exercise, exercise_type)
+
+        segment_dir = tempfile.mkdtemp(prefix=f"{file_id}_", dir=output_dir)
+        segment_paths = [os.path.join(segment_dir, f"segment_{index:03d}.mp4") for index in range(len(plan))]
+        futures = [executor.submit(_render_segment, video_path, bounds[1], landmarks, seed,
+                                   exercise_type, size, fps, path)
+                   for bounds, landmarks, seed, path in zip(plan, segment_landmarks, seeds, segment_paths)]
+        frame_count = 0
+        encode_stats = []
+        for future in futures:
+            written, stats = future.result()
+            frame_count += written
+            encode_stats.append(stats)
+            report(total_frames + frame_count)
+
+    output_filename = f"{file_id}_processed.mp4"
+    output_path = os.path.join(output_dir, output_filename)
+    stream_copy = all(stats['encoder'] == 'ffmpeg' for stats in encode_stats)
+    try:
+        concat_segments(segment_paths, output_path, fps, size, stream_copy)
+    finally:
+        shutil.rmtree(segment_dir, ignore_errors=True)
+
+    if not os.path.exists(output_path):
+        raise ValueError("Output video file was not created")
+
+    if progress_callback:
+        progress_callback(total_frames, total_frames)
+
+    encode_seconds = sum(stats['encode_time_seconds'] for stats in encode_stats)
+    combined_stats = {
+        'encoder': encode_stats[0]['encoder'],
+        'encoded_frames': frame_count,
+        'encode_time_seconds': round(encode_seconds, 2),
+        'encode_fps': round(frame_count / encode_seconds, 1) if encode_seconds > 0 else 0
+    }
+    return build_result(output_filename, exercise_type, angles_history, total_reps,
+                        frame_count, fps, start_time, frames_with_landmarks, combined_stats)
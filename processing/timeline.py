@@ -0,0 +1,181 @@
+"""
+Timeline Module
+Fixed-record on-disk timeline of an analysed video, memory-mapped for random access
+"""
+
+import os
+import struct
+
+import numpy as np
+
+from exercises.rep_counter import STAGE_NAMES
+from exercises.tracking import exercise_reps
+from pose_estimation.landmarks import NUM_LANDMARKS
+
+TIMELINE_MAGIC = b'HFTL'
+TIMELINE_VERSION = 1
+# magic, version, record size, record count, fps, exercise type; padded to HEADER_SIZE
+HEADER_STRUCT = struct.Struct('<4sHHIf16s')
+HEADER_SIZE = 64
+
+# One record per frame. Angles and stages have a slot per counting angle
+# (right, left for hammer curls); unused slots hold NaN and 0.
+TIMELINE_DTYPE = np.dtype([
+    ('frame', '<u4'),
+    ('timestamp', '<f4'),
+    ('landmarks', '<f4', (NUM_LANDMARKS, 4)),
+    ('angles', '<f4', (2,)),
+    ('stage', 'u1', (2,)),
+    ('reps', '<u2')
+])
+
+
+def timeline_path(output_dir, file_id):
+    return os.path.join(output_dir, f"{file_id}_timeline.bin")
+
+
+def stage_codes(exercise, exercise_type):
+    """0 before the first stage, then 1, 2, 3 for the start, descent and ascent stages."""
+    names = STAGE_NAMES[exercise_type]
+    if exercise_type == "hammer_curl":
+        stages = (exercise.stage_right, exercise.stage_left)
+    else:
+        stages = (exercise.stage,)
+    return [names.index(stage) + 1 if stage in names else 0 for stage in stages]
+
+
+class TimelineWriter:
+    """
+    Appends one record per frame and writes the header on close.
+
+    Records are buffered chunk_size at a time so the file is written in a
+    few large writes rather than one per frame.
+    """
+
+    def __init__(self, path, fps, exercise_type, chunk_size=256):
+        self.path = path
+        self.fps = fps
+        self.exercise_type = exercise_type
+        self.count = 0
+        self._chunk = np.zeros(chunk_size, dtype=TIMELINE_DTYPE)
+        self._filled = 0
+        self._file = open(path, 'wb')
+        self._file.write(b'\0' * HEADER_SIZE)
+
+    def append(self, frame_index, pose, angle, exercise):
+        """
+        Record a frame.
+
+        Args:
+            frame_index: Frame number in the source video
+            pose: PoseFrame of the frame, or None without a pose
+            angle: Counting angle as stored in angles_history, or None
+            exercise: Tracker after it has seen the frame
+        """
+        record = self._chunk[self._filled]
+        record['frame'] = frame_index
+        record['timestamp'] = frame_index / self.fps
+        record['landmarks'] = pose.array if pose is not None else np.nan
+        angles = record['angles']
+        angles[:] = np.nan
+        if angle is not None:
+            values = angle if isinstance(angle, tuple) else (angle,)
+            angles[:len(values)] = values
+        codes = stage_codes(exercise, self.exercise_type)
+        record['stage'][:] = 0
+        record['stage'][:len(codes)] = codes
+        record['reps'] = exercise_reps(exercise, self.exercise_type)
+
+        self._filled += 1
+        self.count += 1
+        if self._filled == len(self._chunk):
+            self._flush()
+
+    def _flush(self):
+        self._file.write(self._chunk[:self._filled].tobytes())
+        self._filled = 0
+
+    def close(self):
+        self._flush()
+        header = HEADER_STRUCT.pack(TIMELINE_MAGIC, TIMELINE_VERSION, TIMELINE_DTYPE.itemsize, self.count,
+                                    float(self.fps), self.exercise_type.encode()[:16])
+        self._file.seek(0)
+        self._file.write(header)
+        self._file.close()
+
+
+def read_timeline_header(path):
+    """
+    Raises:
+        ValueError: If the file is not a timeline this version can read
+    """
+    with open(path, 'rb') as f:
+        data = f.read(HEADER_STRUCT.size)
+    if len(data) < HEADER_STRUCT.size:
+        raise ValueError("Timeline file is truncated")
+    magic, version, record_size, count, fps, exercise_type = HEADER_STRUCT.unpack(data)
+    if magic != TIMELINE_MAGIC or version != TIMELINE_VERSION or record_size != TIMELINE_DTYPE.itemsize:
+        raise ValueError("Unsupported timeline file")
+    return {
+        'count': count,
+        'fps': fps,
+        'exercise_type': exercise_type.rstrip(b'\0').decode()
+    }
+
+
+def open_timeline(path):
+    """
+    Map a timeline file read-only.
+
+    Returns:
+        (header, records) where records is a memmap of TIMELINE_DTYPE; only
+        the pages a caller touches are read from disk
+    """
+    header = read_timeline_header(path)
+    if header['count'] == 0:
+        return header, np.zeros(0, dtype=TIMELINE_DTYPE)
+    records = np.memmap(path, dtype=TIMELINE_DTYPE, mode='r', offset=HEADER_SIZE, shape=(header['count'],))
+    return header, records
+
+
+def iter_record_bytes(records, chunk_bytes=64 * 1024):
+    """
+    Yield records as bytes chunks of about chunk_bytes.
+
+    WSGI servers only accept bytes, so a memmap slice is copied out a chunk
+    at a time instead of all at once.
+    """
+    step = max(chunk_bytes // records.dtype.itemsize, 1)
+    for start in range(0, len(records), step):
+        yield records[start:start + step].tobytes()
+
+
+def timeline_layout():
+    """Byte layout of one record, for clients decoding the binary range responses."""
+    return {
+        'record_size': TIMELINE_DTYPE.itemsize,
+        'byte_order': 'little',
+        'fields': [
+            {
+                'name': name,
+                'offset': offset,
+                'dtype': field_dtype.base.str,
+                'shape': list(field_dtype.shape)
+            }
+            for name, (field_dtype, offset) in TIMELINE_DTYPE.fields.items()
+        ]
+    }
+
+
+def records_to_json(records):
+    return [
+        {
+            'frame': int(record['frame']),
+            'timestamp': round(float(record['timestamp']), 3),
+            'landmarks': None if np.isnan(record['landmarks'][0, 0]) else record['landmarks'].round(5).tolist(),
+            'angles': [None if np.isnan(a) else round(float(a), 2) for a in record['angles']],
+            'stage': record['stage'].tolist(),
+            'reps': int(record['reps'])
+        }
+        for record in records
+    ]
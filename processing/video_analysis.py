@@ -0,0 +1,406 @@
+"""
+Video Analysis Module
+Runs exercise tracking over uploaded videos and writes the annotated result
+"""
+
+import logging
+import os
+import time
+
+import cv2
+import numpy as np
+
+from pose_estimation.estimation import PoseEstimator
+from pose_estimation.landmarks import PoseFrame, empty_landmarks, has_pose
+from pose_estimation.smoothing import create_pose_smoother
+from exercises.tracking import (create_exercise, track_exercise, exercise_reps, measure_counting_angles,
+                                history_angle)
+from exercises.rep_counter import count_exercise_reps
+from processing.video_encoder import open_video_encoder
+from processing.frame_sampler import AdaptiveStrideSampler
+from processing.video_reader import VideoFrameReader, frame_range
+from processing.timeline import TimelineWriter
+
+logger = logging.getLogger(__name__)
+
+
+def create_video_pose_estimator(autotuner=None, roi_tracking=False):
+    return PoseEstimator(
+        static_image_mode=False,
+        model_complexity=1,
+        enable_segmentation=False,
+        min_detection_confidence=0.5,
+        min_tracking_confidence=0.5,
+        autotuner=autotuner,
+        roi_tracking=roi_tracking
+    )
+
+
+def open_video(video_path):
+    """
+    Open a video and work out its processing size.
+
+    Returns:
+        (cap, fps, width, height, total_frames, scale_factor) where width and
+        height are already downscaled for videos wider than 1280
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise ValueError("Could not open video file")
+
+    fps = int(cap.get(cv2.CAP_PROP_FPS)) or 30
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+
+    scale_factor = 1.0
+    if width > 1280:
+        scale_factor = 1280.0 / width
+        width = int(width * scale_factor)
+        height = int(height * scale_factor)
+        logger.info(f"Downscaling video to {width}x{height} for faster processing")
+
+    return cap, fps, width, height, total_frames, scale_factor
+
+
+def open_video_reader(video_path, start_time=None, end_time=None):
+    """
+    Open a video for sequential processing of an optional time window.
+
+    Returns:
+        (reader, fps, width, height, range_frames) where range_frames is the
+        expected number of frames in the window
+    """
+    cap, fps, width, height, total_frames, _ = open_video(video_path)
+    try:
+        start_frame, end_frame = frame_range(fps, total_frames, start_time, end_time)
+    except ValueError:
+        cap.release()
+        raise
+    reader = VideoFrameReader(cap, video_path, (width, height), start_frame, end_frame)
+    range_frames = (end_frame if end_frame is not None else total_frames) - start_frame
+    if start_frame or end_frame is not None:
+        logger.info(f"Processing frames {start_frame} to {end_frame or total_frames} of {total_frames}")
+    return reader, fps, width, height, max(range_frames, 0)
+
+
+
+class PoseSource:
+    """
+    Yields every frame's pose for an upload, from the landmark cache when possible.
+
+    On a cache hit the stored landmarks are replayed and MediaPipe never
+    runs. On a miss the landmarks are written back by finish() when every
+    frame was inferred: runs with max_stride 1, or with fill_cache, which
+    gives up the adaptive sampler's skipping so the stored landmarks suit
+    every exercise. Trimmed runs use a cached video but never store one.
+
+    The key names the estimator's settings at the start of the run. If the
+    autotuner moves the estimator to other settings during the run, the
+    landmarks are a mix and are not stored.
+    """
+
+    def __init__(self, video_path, reader, pose_estimator, exercise, exercise_type, frame_shape,
+                 max_stride=1, landmark_cache=None, fill_cache=False):
+        self.reader = reader
+        self.pose_estimator = pose_estimator
+        self.frame_shape = frame_shape
+        self.landmark_cache = landmark_cache
+        self.cache_key = None
+        self.cached = None
+        self.recorded = None
+
+        if landmark_cache is not None:
+            self.key_settings = dict(pose_estimator.settings)
+            self.key_adjustments = self._adjustments()
+            self.cache_key = landmark_cache.key(video_path, self.key_settings,
+                                                (frame_shape[1], frame_shape[0]))
+            self.cached = landmark_cache.load(self.cache_key)
+            if self.cached is None and reader.start_frame == 0 and reader.end_frame is None \
+                    and (fill_cache or max_stride <= 1):
+                self.recorded = []
+                max_stride = 1
+
+        self.sampler = AdaptiveStrideSampler(pose_estimator, exercise, exercise_type, max_stride)
+
+    def iter_poses(self, decode_all=True):
+        """
+        Yield (frame, pose) for every frame in the reader's range.
+
+        With decode_all=False, frames that no inference needs come back as
+        None; a cache hit then decodes nothing at all.
+        """
+        if self.cached is not None:
+            for row in self.cached[self.reader.start_frame:self.reader.end_frame]:
+                frame = None
+                if decode_all:
+                    frame = self.reader.read()
+                    if frame is None:
+                        return
+                yield frame, PoseFrame(row, self.frame_shape) if has_pose(row) else None
+            return
+
+        for frame, pose in self.sampler.iter_landmarks(self.reader, decode_all):
+            if self.recorded is not None:
+                self.recorded.append(pose.array if pose is not None else empty_landmarks(1)[0])
+            yield frame, pose
+
+    def _adjustments(self):
+        autotune = self.pose_estimator.autotune
+        return autotune.adjustments if autotune is not None else 0
+
+    def finish(self):
+        if not self.recorded:
+            return
+        if self.pose_estimator.settings != self.key_settings or self._adjustments() != self.key_adjustments:
+            logger.info("Pose settings changed during the run, not caching its landmarks")
+            return
+        self.landmark_cache.store(self.cache_key, np.stack(self.recorded))
+
+    def stats(self):
+        if self.landmark_cache is None:
+            cache_status = 'off'
+        else:
+            cache_status = 'hit' if self.cached is not None else 'miss'
+        stats = {**self.sampler.stats(), 'landmark_cache': cache_status}
+        if self.pose_estimator.roi_tracking:
+            stats.update(self.pose_estimator.roi_counts)
+        return stats
+
+def process_uploaded_video(video_path, exercise_type, file_id, output_dir, progress_callback=None,
+                           pose_estimator=None, max_stride=1, start_time=None, end_time=None,
+                           landmark_cache=None, timeline_path=None, fill_cache=False):
+    """
+    Run pose tracking over an uploaded video and write the annotated copy.
+
+    Args:
+        video_path: Path of the uploaded video
+        exercise_type: "squat", "push_up" or "hammer_curl"
+        file_id: Upload id, used to name the processed file
+        output_dir: Directory the processed video is written to
+        progress_callback: Optional callable(current_frame, total_frames)
+        pose_estimator: Optional warm PoseEstimator to reuse; a fresh one is built otherwise
+        max_stride: Largest gap between inferred frames; above 1, pose inference
+                    is skipped where the angles are far from a stage threshold
+        start_time: Optional second to start at; earlier frames are seeked past, not read
+        end_time: Optional second to stop at
+        landmark_cache: Optional LandmarkCache to replay landmarks from and record them into
+        timeline_path: Optional path to write the per-frame timeline file to
+        fill_cache: On a cache miss, infer every frame (ignoring max_stride) so the landmarks can be stored
+
+    Returns:
+        Result dict with the processed video URL and statistics
+    """
+    logger.info(f"Starting video processing for {exercise_type}")
+    processing_start = time.time()
+    
+    if pose_estimator is None:
+        pose_estimator = create_video_pose_estimator()
+    else:
+        pose_estimator.reset()
+    
+    exercise = create_exercise(exercise_type)
+    
+    reader, fps, width, height, total_frames = open_video_reader(video_path, start_time, end_time)
+    
+    logger.info(f"Video properties: {total_frames} frames, {fps} FPS, {width}x{height}")
+    
+    output_filename = f"{file_id}_processed.mp4"
+    output_path = os.path.join(output_dir, output_filename)
+    
+    out = open_video_encoder(output_path, fps, (width, height))
+    
+    total_reps = 0
+    frame_count = 0
+    angles_history = []
+    last_log_time = time.time()
+    frames_with_landmarks = 0
+    frames_without_landmarks = 0
+    
+    logger.info(f"Processing {total_frames} frames...")
+    
+    poses = PoseSource(video_path, reader, pose_estimator, exercise, exercise_type, (height, width),
+                       max_stride, landmark_cache, fill_cache)
+    
+    timeline = TimelineWriter(timeline_path, fps, exercise_type) if timeline_path else None
+    smoother = create_pose_smoother()
+    
+    # ffmpeg must not outlive a failed job in this long-lived worker
+    try:
+        for frame, pose in poses.iter_poses():
+            frame_count += 1
+            frame_index = reader.start_frame + frame_count - 1
+            pose = smoother.smooth(pose, frame_index / fps)
+        
+            angle = None
+            if pose is not None:
+                frames_with_landmarks += 1
+                pose_estimator.draw_exercise_lines(frame, exercise_type, pose)
+                _, total_reps, angle = track_exercise(exercise, exercise_type, pose, frame)
+                angles_history.append(angle)
+            else:
+                frames_without_landmarks += 1
+        
+            if timeline:
+                timeline.append(frame_index, pose, angle, exercise)
+        
+            out.write(frame)
+        
+            if progress_callback and frame_count % 10 == 0:
+                progress_callback(frame_count, total_frames)
+        
+            current_time = time.time()
+            if current_time - last_log_time >= 5.0:
+                progress = (frame_count / total_frames) * 100 if total_frames > 0 else 0
+                fps_processing = frame_count / (current_time - processing_start)
+                logger.info(f"Progress: {progress:.1f}% ({frame_count}/{total_frames} frames, {fps_processing:.1f} FPS)")
+                logger.info(f"Landmarks detected: {frames_with_landmarks}/{frame_count} frames, Reps: {total_reps}")
+                last_log_time = current_time
+    
+        out.release()
+    finally:
+        reader.release()
+        out.close()
+    poses.finish()
+    if timeline:
+        timeline.close()
+    
+    if not os.path.exists(output_path):
+        raise ValueError("Output video file was not created")
+    
+    output_size = os.path.getsize(output_path)
+    logger.info(f"Output video size: {output_size / 1024 / 1024:.2f} MB")
+    logger.info(f"Encoding: {out.stats()}")
+    logger.info(f"Sampling: {poses.stats()}")
+    
+    if progress_callback:
+        progress_callback(total_frames, total_frames)
+    
+    return build_result(output_filename, exercise_type, angles_history, total_reps,
+                        frame_count, fps, processing_start, frames_with_landmarks,
+                        {**out.stats(), **poses.stats(), **reader.stats()})
+
+
+def exercise_stage(exercise, exercise_type):
+    if exercise_type == "hammer_curl":
+        return [exercise.stage_right, exercise.stage_left]
+    return exercise.stage
+
+
+def analyze_uploaded_video(video_path, exercise_type, progress_callback=None, pose_estimator=None,
+                           max_stride=1, start_time=None, end_time=None, landmark_cache=None,
+                           timeline_path=None, fill_cache=False):
+    """
+    Count reps in an uploaded video without rendering or encoding anything.
+
+    Only decoding, pose estimation and the rep state machine run; no
+    overlays, suggestions or output video are produced, and frames the
+    sampler skips are grabbed without being retrieved.
+
+    Returns:
+        Result dict with the same statistics as process_uploaded_video, a
+        per-frame 'timeline' of time, counting angle(s), stage and reps, and
+        'rep_analysis' with each rep's boundaries, angle range and tempo
+    """
+    logger.info(f"Starting analysis-only processing for {exercise_type}")
+    processing_start = time.time()
+
+    if pose_estimator is None:
+        pose_estimator = create_video_pose_estimator()
+    else:
+        pose_estimator.reset()
+
+    exercise = create_exercise(exercise_type)
+    reader, fps, width, height, total_frames = open_video_reader(video_path, start_time, end_time)
+
+    total_reps = 0
+    frame_count = 0
+    angles_history = []
+    timeline = []
+    angle_series = []
+    frames_with_landmarks = 0
+
+    poses = PoseSource(video_path, reader, pose_estimator, exercise, exercise_type, (height, width),
+                       max_stride, landmark_cache, fill_cache)
+    timeline_file = TimelineWriter(timeline_path, fps, exercise_type) if timeline_path else None
+    smoother = create_pose_smoother()
+
+    try:
+        for _, pose in poses.iter_poses(decode_all=False):
+            frame_index = reader.start_frame + frame_count
+            pose = smoother.smooth(pose, frame_index / fps)
+            angle = None
+            if pose is not None:
+                frames_with_landmarks += 1
+                angles = measure_counting_angles(exercise, pose)
+                exercise.update_stage(*angles)
+                total_reps = exercise_reps(exercise, exercise_type)
+                angle = history_angle(angles)
+                angles_history.append(angle)
+            angle_series.append(angles if angle is not None else [float('nan')] * len(exercise.COUNTING_JOINTS))
+
+            if timeline_file:
+                timeline_file.append(frame_index, pose, angle, exercise)
+            timeline.append({
+                'frame': frame_index,
+                'time': round(frame_index / fps, 3),
+                'angle': [round(a, 2) for a in angle] if isinstance(angle, tuple) else
+                         (round(angle, 2) if angle is not None else None),
+                'stage': exercise_stage(exercise, exercise_type),
+                'reps': total_reps
+            })
+            frame_count += 1
+
+            if progress_callback and frame_count % 10 == 0:
+                progress_callback(frame_count, total_frames)
+    finally:
+        reader.release()
+    poses.finish()
+    if timeline_file:
+        timeline_file.close()
+
+    if progress_callback:
+        progress_callback(total_frames, total_frames)
+
+    result = build_result(None, exercise_type, angles_history, total_reps,
+                          frame_count, fps, processing_start, frames_with_landmarks,
+                          {**poses.stats(), **reader.stats()})
+    result['timeline'] = timeline
+    result['rep_analysis'] = count_exercise_reps(exercise_type, angle_series, fps, reader.start_frame)
+    return result
+
+
+def build_result(output_filename, exercise_type, angles_history, total_reps, frame_count, fps,
+                 start_time, frames_with_landmarks, extra_stats=None):
+    if exercise_type == "hammer_curl" and angles_history:
+        if isinstance(angles_history[0], tuple):
+            avg_angle_right = sum(a[0] for a in angles_history) / len(angles_history)
+            avg_angle_left = sum(a[1] for a in angles_history) / len(angles_history)
+            avg_angle = (round(avg_angle_right, 2), round(avg_angle_left, 2))
+        else:
+            avg_angle = round(sum(angles_history) / len(angles_history), 2) if angles_history else 0
+    else:
+        avg_angle = round(sum(angles_history) / len(angles_history), 2) if angles_history else 0
+    
+    duration = frame_count / fps if fps > 0 else 0
+    processing_time = time.time() - start_time
+    processing_fps = frame_count / processing_time if processing_time > 0 else 0
+    
+    logger.info(f"Video processing completed in {processing_time:.2f} seconds")
+    logger.info(f"Processing speed: {processing_fps:.1f} FPS (video: {fps} FPS)")
+    logger.info(f"Pose detection: {frames_with_landmarks}/{frame_count} frames ({100*frames_with_landmarks/frame_count:.1f}%)")
+    logger.info(f"Total reps counted: {total_reps}")
+    
+    return {
+        'success': True,
+        'processed_video': f'/processed/{output_filename}' if output_filename else None,
+        'statistics': {
+            'total_reps': total_reps,
+            'duration_seconds': round(duration, 2),
+            'total_frames': frame_count,
+            'average_angle': round(avg_angle, 2) if isinstance(avg_angle, (int, float)) else avg_angle,
+            'processing_time_seconds': round(processing_time, 2),
+            'processing_fps': round(processing_fps, 1),
+            **(extra_stats or {})
+        }
+    }
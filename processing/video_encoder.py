@@ -0,0 +1,152 @@
+"""
+Video Encoder Module
+Writes annotated frames straight to browser-ready H.264, piping into ffmpeg when available
+"""
+
+import logging
+import shutil
+import subprocess
+import time
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def open_video_writer(output_path, fps, size):
+    """Open an H.264 VideoWriter, falling back to mp4v when avc1 is unavailable."""
+    fourcc = cv2.VideoWriter_fourcc(*'avc1')
+    out = cv2.VideoWriter(output_path, fourcc, fps, size)
+
+    if not out.isOpened():
+        logger.warning("H.264 codec not available, using mp4v")
+        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+        out = cv2.VideoWriter(output_path, fourcc, fps, size)
+
+    return out
+
+
+class _EncoderStats:
+    def __init__(self):
+        self.frames = 0
+        self.encode_seconds = 0.0
+
+    def stats(self):
+        return {
+            'encoder': self.backend,
+            'encoded_frames': self.frames,
+            'encode_time_seconds': round(self.encode_seconds, 2),
+            'encode_fps': round(self.frames / self.encode_seconds, 1) if self.encode_seconds > 0 else 0
+        }
+
+
+class FFmpegPipeEncoder(_EncoderStats):
+    """
+    Streams raw BGR frames into a single ffmpeg process over stdin.
+
+    The output is H.264/yuv420p with the moov atom moved to the front, so
+    it plays in browsers without a second encoding pass. If ffmpeg exits
+    early, write() and release() raise ValueError with what it printed.
+    """
+
+    backend = 'ffmpeg'
+
+    def __init__(self, ffmpeg_path, output_path, fps, size):
+        super().__init__()
+        width, height = size
+        cmd = [
+            ffmpeg_path,
+            '-loglevel', 'error',
+            '-f', 'rawvideo',
+            '-pix_fmt', 'bgr24',
+            '-s', f'{width}x{height}',
+            '-r', str(fps),
+            '-i', '-',
+            '-an',
+            # libx264 with yuv420p needs even dimensions
+            '-vf', 'scale=trunc(iw/2)*2:trunc(ih/2)*2',
+            '-c:v', 'libx264',
+            '-preset', 'fast',
+            '-crf', '23',
+            '-pix_fmt', 'yuv420p',
+            '-movflags', '+faststart',
+            '-y',
+            output_path
+        ]
+        self.output_path = output_path
+        self.process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL,
+                                        stderr=subprocess.PIPE)
+        self.released = False
+
+    def write(self, frame):
+        start = time.perf_counter()
+        try:
+            self.process.stdin.write(np.ascontiguousarray(frame).data)
+        except BrokenPipeError:
+            # ffmpeg is gone (bad build, disk full...); release() reports why
+            self.release()
+            raise ValueError("FFmpeg exited before all frames were written")
+        self.encode_seconds += time.perf_counter() - start
+        self.frames += 1
+
+    def release(self):
+        if self.released:
+            return
+        self.released = True
+        start = time.perf_counter()
+        try:
+            self.process.stdin.close()
+        except BrokenPipeError:
+            pass
+        stderr = self.process.stderr.read()
+        self.process.stderr.close()
+        self.process.wait()
+        self.encode_seconds += time.perf_counter() - start
+        if self.process.returncode != 0:
+            raise ValueError(f"FFmpeg encoding failed: {stderr.decode(errors='replace').strip()}")
+
+    def close(self):
+        """Stop ffmpeg without finishing the file if release() has not run, e.g. after an error."""
+        if self.released:
+            return
+        self.released = True
+        self.process.kill()
+        self.process.wait()
+        for pipe in (self.process.stdin, self.process.stderr):
+            try:
+                pipe.close()
+            except BrokenPipeError:
+                pass
+
+
+class OpenCVEncoder(_EncoderStats):
+    """cv2.VideoWriter fallback for hosts without ffmpeg."""
+
+    backend = 'opencv'
+
+    def __init__(self, output_path, fps, size):
+        super().__init__()
+        self.output_path = output_path
+        self.writer = open_video_writer(output_path, fps, size)
+
+    def write(self, frame):
+        start = time.perf_counter()
+        self.writer.write(frame)
+        self.encode_seconds += time.perf_counter() - start
+        self.frames += 1
+
+    def release(self):
+        self.writer.release()
+
+    def close(self):
+        self.writer.release()
+
+
+def open_video_encoder(output_path, fps, size):
+    """Return an ffmpeg pipe encoder when ffmpeg is installed, else an OpenCV one."""
+    ffmpeg_path = shutil.which('ffmpeg')
+    if ffmpeg_path:
+        return FFmpegPipeEncoder(ffmpeg_path, output_path, fps, size)
+    logger.warning("FFmpeg not found. Video may not play in all browsers.")
+    return OpenCVEncoder(output_path, fps, size)
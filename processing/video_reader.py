@@ -0,0 +1,103 @@
+"""
+Video Reader Module
+Seeks to a time window and only decodes the frames that are analysed
+"""
+
+import cv2
+
+
+def open_at_frame(video_path, frame_index, cap=None):
+    """Return a capture positioned at frame_index, reusing cap when given."""
+    if cap is None:
+        cap = cv2.VideoCapture(video_path)
+    if frame_index > 0:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, frame_index)
+        if int(cap.get(cv2.CAP_PROP_POS_FRAMES)) != frame_index:
+            # Container does not support accurate seeking; walk forward instead
+            cap.release()
+            cap = cv2.VideoCapture(video_path)
+            for _ in range(frame_index):
+                cap.grab()
+    return cap
+
+
+def frame_range(fps, total_frames, start_time=None, end_time=None):
+    """
+    Convert an optional [start_time, end_time) window in seconds to frame indices.
+
+    Returns:
+        (start_frame, end_frame); end_frame is None when the window runs to the end
+
+    Raises:
+        ValueError: If the window is empty or starts past the end of the video
+    """
+    start_frame = int(round(float(start_time) * fps)) if start_time is not None else 0
+    end_frame = int(round(float(end_time) * fps)) if end_time is not None else None
+
+    if start_frame < 0 or (end_frame is not None and end_frame <= start_frame):
+        raise ValueError("Invalid time range")
+    if total_frames > 0 and start_frame >= total_frames:
+        raise ValueError("Start time is past the end of the video")
+    if end_frame is not None and total_frames > 0 and end_frame >= total_frames:
+        end_frame = None
+    return start_frame, end_frame
+
+
+class VideoFrameReader:
+    """
+    Sequential access to the frames in [start_frame, end_frame) of a video.
+
+    grab() steps over a frame without retrieving it, so skipped frames never
+    pay for colour conversion, the copy into a Python array or the
+    downscale; read() retrieves and resizes the frame it steps onto.
+
+    Args:
+        cap: Open capture; it is seeked to start_frame (or reopened if the
+             container cannot seek accurately)
+        video_path: Path cap was opened from, used to reopen it
+        size: (width, height) frames are returned at
+        start_frame: First frame to return
+        end_frame: Frame to stop before, or None to read to the end
+    """
+
+    def __init__(self, cap, video_path, size, start_frame=0, end_frame=None):
+        self.cap = open_at_frame(video_path, start_frame, cap)
+        self.size = size
+        self.start_frame = start_frame
+        self.end_frame = end_frame
+        self.position = start_frame
+        self.grabbed = 0
+        self.retrieved = 0
+
+    def grab(self):
+        if self.end_frame is not None and self.position >= self.end_frame:
+            return False
+        if not self.cap.grab():
+            return False
+        self.position += 1
+        self.grabbed += 1
+        return True
+
+    def read(self):
+        if not self.grab():
+            return None
+        ret, frame = self.cap.retrieve()
+        if not ret:
+            return None
+        self.retrieved += 1
+        if (frame.shape[1], frame.shape[0]) != self.size:
+            frame = cv2.resize(frame, self.size, interpolation=cv2.INTER_LINEAR)
+        return frame
+
+    def __iter__(self):
+        while (frame := self.read()) is not None:
+            yield frame
+
+    def release(self):
+        self.cap.release()
+
+    def stats(self):
+        return {
+            'decoded_frames': self.grabbed,
+            'retrieved_frames': self.retrieved
+        }
@@ -0,0 +1,269 @@
+"""
+Exercise Session Module
+Holds one user's live workout: tracker, pose estimator and set/rep counters
+"""
+
+import threading
+import time
+
+import cv2
+
+from pose_estimation.estimation import PoseEstimator
+from pose_estimation.landmarks import PoseFrame, quantize_landmarks
+from pose_estimation.multi_person import MultiPoseTracker
+from pose_estimation.smoothing import create_pose_smoother
+from exercises.tracking import (EXERCISE_TYPES, create_exercise, track_exercise, reset_exercise_counter,
+                                exercise_reps, exercise_metrics, measure_counting_angles)
+from feedback.information import get_exercise_info
+from feedback.movement_suggestions import suggestion_ids
+from streaming.pose_stream import PoseStream
+from utils.draw_text_with_background import draw_text_with_background
+from utils.overlay_cache import apply_static_overlay
+
+
+class ExerciseSession:
+    """
+    One live workout.
+
+    With multi_person, everybody in front of the camera (up to max_people)
+    is tracked with a MultiPoseTracker and counts their own sets and reps;
+    counter and sets_completed then follow whoever is furthest ahead.
+
+    Landmarks are smoothed by a PoseSmoother from smoother_factory before
+    they reach the trackers; pass None to count on the raw landmarks.
+
+    While anyone listens on pose_stream, every processed frame also sends
+    a compact message with the landmarks, angles, stages, suggestion ids
+    and status. With client_overlay the client draws everything from
+    those messages over its own camera preview, and nothing is drawn onto
+    the frames here.
+
+    close() releases the session's MediaPipe graphs; stop() and the
+    registry call it, and frames processed afterwards pass through as they
+    are.
+    """
+
+    def __init__(self, session_id, exercise_type, sets_goal, reps_goal, autotuner=None, roi_tracking=False,
+                 multi_person=False, max_people=6, smoother_factory=create_pose_smoother, client_overlay=False):
+        self.id = session_id
+        self.exercise_type = exercise_type
+        if multi_person:
+            # Every person gets their own tracker from the group; none is built until someone shows up
+            if exercise_type not in EXERCISE_TYPES:
+                raise ValueError(f"Invalid exercise type: {exercise_type}")
+            self.exercise = None
+            self.pose_estimator = None
+            self.group = MultiPoseTracker(lambda: create_exercise(exercise_type), max_people=max_people,
+                                          smoother_factory=smoother_factory)
+        else:
+            self.exercise = create_exercise(exercise_type)
+            self.pose_estimator = PoseEstimator(autotuner=autotuner, roi_tracking=roi_tracking)
+            self.group = None
+        self.smoother = smoother_factory() if smoother_factory and not multi_person else None
+        self.people = []
+        self.client_overlay = client_overlay
+        self.pose_stream = PoseStream()
+        # FrameIngestor feeding the session with frames uploaded by the browser, if any
+        self.ingestor = None
+        self.frame_index = 0
+        self.sets_goal = sets_goal
+        self.reps_goal = reps_goal
+        self.counter = 0
+        self.sets_completed = 0
+        self.running = True
+        self.start_time = time.time()
+        self.last_seen = self.start_time
+        self.closed = False
+        # Keeps close() from releasing a graph while a frame is being inferred on another thread
+        self._inference_lock = threading.Lock()
+
+    def touch(self):
+        self.last_seen = time.time()
+
+    def stop(self):
+        """
+        End the workout.
+
+        Returns:
+            Workout summary for the workout logger, or None if it was not running
+        """
+        if not self.running:
+            self.close()
+            return None
+        self.running = False
+        self.pose_stream.publish({'frame': self.frame_index, **self.status()})
+        self.close()
+        return {
+            'exercise_type': self.exercise_type,
+            'sets': self.sets_completed + (1 if self.counter > 0 else 0),
+            'reps': self.reps_goal,
+            'duration_seconds': int(time.time() - self.start_time)
+        }
+
+    def status(self):
+        status = {
+            'exercise_running': self.running,
+            'current_reps': self.counter,
+            'current_set': self.sets_completed + 1 if self.running else 0,
+            'total_sets': self.sets_goal,
+            'rep_goal': self.reps_goal
+        }
+        if self.group is not None:
+            status['people'] = self.people
+        return status
+
+    def _stream(self, frame, message):
+        """Send this frame's message to the pose stream's clients, ending their streams once the workout is over."""
+        self.frame_index += 1
+        if self.pose_stream.active:
+            height, width = frame.shape[:2]
+            self.pose_stream.publish({'frame': self.frame_index, 'size': [width, height], **self.status(), **message})
+        if not self.running:
+            self._close_streams()
+
+    def _close_streams(self):
+        """End the pose stream and stop taking uploaded frames."""
+        self.pose_stream.close()
+        if self.ingestor is not None:
+            self.ingestor.close()
+
+    def _draw_goals(self, frame):
+        """Draw the exercise name and goals from an overlay rendered once for the session's settings."""
+        apply_static_overlay(frame, ('session_goals', self.exercise_type, self.reps_goal, self.sets_goal),
+                             self._draw_goals_static)
+
+    def _draw_goals_static(self, frame):
+        exercise_info = get_exercise_info(self.exercise_type)
+        draw_text_with_background(frame, f"Exercise: {exercise_info.get('name', 'N/A')}", (40, 50),
+                                  cv2.FONT_HERSHEY_DUPLEX, 0.7, (255, 255, 255), (118, 29, 14), 1)
+        draw_text_with_background(frame, f"Reps Goal: {self.reps_goal}", (40, 80),
+                                  cv2.FONT_HERSHEY_DUPLEX, 0.7, (255, 255, 255), (118, 29, 14), 1)
+        draw_text_with_background(frame, f"Sets Goal: {self.sets_goal}", (40, 110),
+                                  cv2.FONT_HERSHEY_DUPLEX, 0.7, (255, 255, 255), (118, 29, 14), 1)
+
+    def process_frame(self, frame, timestamp=None):
+        """
+        Run pose tracking for this session on a frame and draw the overlays in place.
+
+        timestamp is when the frame was captured, in seconds on any clock
+        that is consistent for the session; now by default.
+        """
+        timestamp = time.perf_counter() if timestamp is None else timestamp
+        with self._inference_lock:
+            if self.closed:
+                return frame
+            if self.group is not None:
+                return self._process_group_frame(frame, timestamp)
+            return self._process_single_frame(frame, timestamp)
+
+    def close(self):
+        """End the streams and release the pose estimator's or group tracker's graphs; safe to call again."""
+        self._close_streams()
+        with self._inference_lock:
+            if self.closed:
+                return
+            self.closed = True
+            if self.pose_estimator is not None:
+                self.pose_estimator.close()
+            if self.group is not None:
+                self.group.close()
+
+    def _process_single_frame(self, frame, timestamp):
+        results = self.pose_estimator.estimate_pose(frame, self.exercise_type, draw=False)
+        pose = PoseFrame.from_results(results, frame.shape)
+        if self.smoother is not None:
+            pose = self.smoother.smooth(pose, timestamp)
+
+        draw = not self.client_overlay
+        message = {'landmarks': None}
+        if pose is not None:
+            if draw:
+                self.pose_estimator.draw_exercise_lines(frame, self.exercise_type, pose)
+            exercise_data, self.counter, _ = track_exercise(self.exercise, self.exercise_type, pose,
+                                                            frame if draw else None)
+            if self.pose_stream.active:
+                metrics = exercise_metrics(self.exercise_type, exercise_data)
+                metrics['angles'] = [round(angle, 1) for angle in metrics['angles']]
+                metrics['suggestions'] = suggestion_ids(metrics['suggestions'])
+                message = {'landmarks': quantize_landmarks(pose.array), **metrics}
+
+            # Display exercise information
+            if draw:
+                self._draw_goals(frame)
+                draw_text_with_background(frame, f"Current Set: {self.sets_completed + 1}", (40, 140),
+                                          cv2.FONT_HERSHEY_DUPLEX, 0.7, (255, 255, 255), (118, 29, 14), 1)
+
+            # Check if rep goal is reached for current set
+            if self.counter >= self.reps_goal:
+                self.sets_completed += 1
+                self.counter = 0
+                reset_exercise_counter(self.exercise, self.exercise_type)
+
+                # Check if all sets are completed
+                if self.sets_completed >= self.sets_goal:
+                    self.running = False
+                    message['event'] = 'workout_complete'
+                    if draw:
+                        draw_text_with_background(frame, "WORKOUT COMPLETE!",
+                                                  (frame.shape[1]//2 - 150, frame.shape[0]//2),
+                                                  cv2.FONT_HERSHEY_DUPLEX, 1.2, (255, 255, 255), (0, 200, 0), 2)
+                else:
+                    message['event'] = 'set_complete'
+                    if draw:
+                        draw_text_with_background(frame, f"SET {self.sets_completed} COMPLETE! Rest for 30 sec",
+                                                  (frame.shape[1]//2 - 200, frame.shape[0]//2),
+                                                  cv2.FONT_HERSHEY_DUPLEX, 1.0, (255, 255, 255), (0, 0, 200), 2)
+
+        self._stream(frame, message)
+
+        return frame
+
+    def _process_group_frame(self, frame, timestamp):
+        """Count reps for every tracked person and label each one with their progress."""
+        tracks = self.group.process(frame, timestamp)
+        draw = not self.client_overlay
+        if draw:
+            self._draw_goals(frame)
+
+        people = []
+        streamed = []
+        for track in tracks:
+            reps = exercise_reps(track.exercise, self.exercise_type)
+            if track.pose is not None and track.sets_completed < self.sets_goal:
+                if draw:
+                    PoseEstimator.draw_exercise_lines(frame, self.exercise_type, track.pose)
+                track.exercise.update_stage(*measure_counting_angles(track.exercise, track.pose))
+                reps = exercise_reps(track.exercise, self.exercise_type)
+                if reps >= self.reps_goal:
+                    track.sets_completed += 1
+                    reps = 0
+                    reset_exercise_counter(track.exercise, self.exercise_type)
+
+            if draw:
+                label = (f"#{track.id} DONE" if track.sets_completed >= self.sets_goal else
+                         f"#{track.id} Set {track.sets_completed + 1}: {reps}/{self.reps_goal}")
+                draw_text_with_background(frame, label, (track.box[0] + 10, track.box[1] + 30),
+                                          cv2.FONT_HERSHEY_DUPLEX, 0.7, (255, 255, 255), (118, 29, 14), 1)
+            person = {'id': track.id, 'reps': reps, 'sets_completed': track.sets_completed}
+            people.append(person)
+            if self.pose_stream.active:
+                streamed.append({**person, 'box': list(track.box),
+                                 'landmarks': quantize_landmarks(track.pose.array) if track.pose is not None else None})
+
+        self.people = people
+        message = {}
+        if people:
+            self.counter = max(person['reps'] for person in people)
+            self.sets_completed = max(person['sets_completed'] for person in people)
+            if all(person['sets_completed'] >= self.sets_goal for person in people):
+                self.running = False
+                message['event'] = 'workout_complete'
+                if draw:
+                    draw_text_with_background(frame, "WORKOUT COMPLETE!", (frame.shape[1]//2 - 150, frame.shape[0]//2),
+                                              cv2.FONT_HERSHEY_DUPLEX, 1.2, (255, 255, 255), (0, 200, 0), 2)
+
+        if streamed:
+            message['people'] = streamed
+        self._stream(frame, message)
+
+        return frame
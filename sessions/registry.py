@@ -0,0 +1,149 @@
+"""
+Session Registry Module
+Tracks live exercise sessions per user with idle eviction and a concurrency cap
+"""
+
+import logging
+import threading
+import time
+
+from pose_estimation.smoothing import create_pose_smoother
+from sessions.exercise_session import ExerciseSession
+from streaming.frame_ingest import FrameIngestor
+
+logger = logging.getLogger(__name__)
+
+
+class SessionLimitError(Exception):
+    """Raised when a new session would exceed the configured cap."""
+
+
+class SessionRegistry:
+    """
+    Maps session ids to ExerciseSession objects.
+
+    Args:
+        max_sessions: Maximum number of concurrent sessions on this process
+        idle_timeout: Seconds without activity before a session is evicted
+        autotuner: Optional PoseAutotuner the sessions' pose estimators follow
+        roi_tracking: Run the sessions' pose inference on a crop around the body
+        max_people: Most people a multi-person session tracks
+        smoother_factory: Callable returning the sessions' landmark PoseSmoothers, or None for raw landmarks
+        ingest_queue_size: Uploaded frames a browser-fed session queues before dropping the oldest
+        ingest_max_frame_bytes: Largest uploaded frame accepted
+        ingest_max_frame_pixels: Most pixels an uploaded frame may have
+    """
+
+    def __init__(self, max_sessions=4, idle_timeout=300, autotuner=None, roi_tracking=False, max_people=6,
+                 smoother_factory=create_pose_smoother, ingest_queue_size=2, ingest_max_frame_bytes=1024 * 1024,
+                 ingest_max_frame_pixels=1920 * 1080):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.autotuner = autotuner
+        self.roi_tracking = roi_tracking
+        self.max_people = max_people
+        self.smoother_factory = smoother_factory
+        self.ingest_queue_size = ingest_queue_size
+        self.ingest_max_frame_bytes = ingest_max_frame_bytes
+        self.ingest_max_frame_pixels = ingest_max_frame_pixels
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def get(self, session_id, touch=True):
+        """Return the session for session_id, or None if there is none."""
+        self.evict_idle()
+        with self._lock:
+            session = self._sessions.get(session_id)
+        if session is not None and touch:
+            session.touch()
+        return session
+
+    def create(self, session_id, exercise_type, sets_goal, reps_goal, multi_person=False, client_overlay=False,
+               browser_frames=False):
+        """
+        Start a new session, replacing any existing one with the same id.
+
+        With multi_person, every person in view counts their own reps. With
+        client_overlay, the client draws the overlays from the session's
+        pose stream and none are drawn onto the frames. With browser_frames,
+        the session is fed the frames the client uploads to its ingestor
+        instead of the server camera's, and the client draws the overlays.
+
+        Raises:
+            ValueError: If the exercise type is unknown
+            SessionLimitError: If max_sessions sessions are already active
+        """
+        self.evict_idle()
+        with self._lock:
+            if session_id not in self._sessions and len(self._sessions) >= self.max_sessions:
+                raise SessionLimitError(f"Session limit of {self.max_sessions} reached")
+        session = ExerciseSession(session_id, exercise_type, sets_goal, reps_goal, autotuner=self.autotuner,
+                                  roi_tracking=self.roi_tracking, multi_person=multi_person,
+                                  max_people=self.max_people, smoother_factory=self.smoother_factory,
+                                  client_overlay=client_overlay or browser_frames)
+        if browser_frames:
+            session.ingestor = FrameIngestor(session.process_frame, queue_size=self.ingest_queue_size,
+                                             max_frame_bytes=self.ingest_max_frame_bytes,
+                                             max_frame_pixels=self.ingest_max_frame_pixels)
+        with self._lock:
+            # Re-check: another request may have taken the last slot meanwhile
+            full = session_id not in self._sessions and len(self._sessions) >= self.max_sessions
+            if not full:
+                previous = self._sessions.get(session_id)
+                self._sessions[session_id] = session
+        if full:
+            session.close()
+            raise SessionLimitError(f"Session limit of {self.max_sessions} reached")
+        if previous is not None:
+            previous.close()
+        logger.info(f"Started {exercise_type} session {session_id} ({len(self._sessions)} active)")
+        return session
+
+    def remove(self, session_id, session=None):
+        """
+        Drop a session and release its slot and pose graphs.
+
+        With session given, it is only dropped if it is still the one
+        registered, so a session started since under the same id stays.
+        """
+        with self._lock:
+            current = self._sessions.get(session_id)
+            if current is None or (session is not None and current is not session):
+                return None
+            del self._sessions[session_id]
+        current.close()
+        logger.info(f"Removed session {session_id} ({len(self._sessions)} active)")
+        return current
+
+    def evict_idle(self):
+        now = time.time()
+        with self._lock:
+            expired = [sid for sid, session in self._sessions.items()
+                       if now - session.last_seen > self.idle_timeout]
+            evicted = [self._sessions.pop(session_id) for session_id in expired]
+        for session_id, session in zip(expired, evicted):
+            session.close()
+            logger.info(f"Evicted idle session {session_id}")
+        return expired
+
+    def ingest_stats(self):
+        """
+        Uploaded-frame stats of every browser-fed session on this process.
+
+        total_utilization is the number of cores their workers keep busy,
+        the figure to size worker processes by.
+        """
+        with self._lock:
+            fed = [(session_id, session.ingestor) for session_id, session in self._sessions.items()
+                   if session.ingestor is not None]
+        stats = [{'session': session_id[:8], **ingestor.snapshot()} for session_id, ingestor in fed]
+        return {
+            'sessions': stats,
+            'total_utilization': round(sum(entry['utilization'] for entry in stats), 3),
+            'total_received': sum(entry['received'] for entry in stats),
+            'total_dropped': sum(entry['dropped'] for entry in stats)
+        }
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
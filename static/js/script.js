@@ -8,11 +8,23 @@ document.addEventListener('DOMContentLoaded', function() {
     const currentExercise = document.getElementById('current-exercise');
     const currentSet = document.getElementById('current-set');
     const currentReps = document.getElementById('current-reps');
+    const videoFeed = document.getElementById('video');
+    const localPreview = document.getElementById('local-preview');
+    const overlayCanvas = document.getElementById('overlay-canvas');
+    const clientOverlayInput = document.getElementById('client-overlay');
+    const browserCameraInput = document.getElementById('browser-camera');
+    const videoFeedUrl = videoFeed.getAttribute('src');
     
     // Variables
     let selectedExercise = null;
     let workoutRunning = false;
     let statusCheckInterval = null;
+    let activeExercise = null;
+    let poseSource = null;
+    let previewStream = null;
+    let suggestionCatalog = [];
+    let banner = null;
+    let uploadingFrames = false;
     
     // Select exercise
     exerciseOptions.forEach(option => {
@@ -50,7 +62,9 @@ document.addEventListener('DOMContentLoaded', function() {
             body: JSON.stringify({
                 exercise_type: selectedExercise,
                 sets: sets,
-                reps: reps
+                reps: reps,
+                client_overlay: clientOverlayInput.checked,
+                frame_source: browserCameraInput.checked ? 'browser' : 'server'
             }),
         })
         .then(response => response.json())
@@ -64,9 +78,15 @@ document.addEventListener('DOMContentLoaded', function() {
                 currentExercise.textContent = selectedExercise.replace('_', ' ').toUpperCase();
                 currentSet.textContent = `1 / ${sets}`;
                 currentReps.textContent = `0 / ${reps}`;
+                activeExercise = selectedExercise;
                 
-                // Start status polling
-                statusCheckInterval = setInterval(checkStatus, 1000);
+                if (clientOverlayInput.checked || browserCameraInput.checked) {
+                    // Status arrives with every pose stream message, no polling needed
+                    startClientOverlay(browserCameraInput.checked);
+                } else {
+                    // Start status polling
+                    statusCheckInterval = setInterval(checkStatus, 1000);
+                }
             } else {
                 alert('Failed to start exercise: ' + (data.error || 'Unknown error'));
             }
@@ -100,22 +120,24 @@ document.addEventListener('DOMContentLoaded', function() {
     function checkStatus() {
         fetch('/get_status')
         .then(response => response.json())
-        .then(data => {
-            if (!data.exercise_running && workoutRunning) {
-                // Workout has ended
-                resetWorkoutUI();
-                return;
-            }
-            
-            // Update status display
-            currentSet.textContent = `${data.current_set} / ${data.total_sets}`;
-            currentReps.textContent = `${data.current_reps} / ${data.rep_goal}`;
-        })
+        .then(updateStatus)
         .catch(error => {
             console.error('Error checking status:', error);
         });
     }
     
+    function updateStatus(data) {
+        if (!data.exercise_running && workoutRunning) {
+            // Workout has ended
+            resetWorkoutUI();
+            return;
+        }
+        
+        // Update status display
+        currentSet.textContent = `${data.current_set} / ${data.total_sets}`;
+        currentReps.textContent = `${data.current_reps} / ${data.rep_goal}`;
+    }
+    
     // Reset UI after workout ends
     function resetWorkoutUI() {
         workoutRunning = false;
@@ -126,12 +148,303 @@ document.addEventListener('DOMContentLoaded', function() {
             clearInterval(statusCheckInterval);
             statusCheckInterval = null;
         }
+        stopClientOverlay();
         
         currentExercise.textContent = 'None';
         currentSet.textContent = '0 / 0';
         currentReps.textContent = '0 / 0';
     }
     
+    // ========== Client-Side Overlays ==========
+    // The server streams landmarks and metrics (a few hundred bytes per frame) over
+    // Server-Sent Events and the overlays are drawn here over the local camera preview.
+    const SKELETON = [[11, 12], [11, 13], [13, 15], [12, 14], [14, 16], [11, 23], [12, 24],
+                      [23, 24], [23, 25], [25, 27], [24, 26], [26, 28]];
+    // Joints of the angles each exercise measures, in the colors the server draws them with
+    const EXERCISE_JOINTS = {
+        squat: [[[11, 23, 25], 'rgb(255, 102, 178)'], [[12, 24, 26], 'rgb(255, 153, 51)']],
+        push_up: [[[11, 13, 15], 'rgb(255, 0, 0)'], [[12, 14, 16], 'rgb(0, 0, 102)']],
+        hammer_curl: [[[11, 13, 15], 'rgb(255, 0, 0)'], [[12, 14, 16], 'rgb(255, 0, 0)']]
+    };
+    const GAUGE_LABELS = {squat: ['Squat'], push_up: ['Push-up'], hammer_curl: ['Right', 'Left']};
+    const MIN_VISIBILITY = 50;
+    
+    function startClientOverlay(uploadFrames) {
+        // Stop downloading the MJPEG feed; the preview comes from the browser's own camera
+        videoFeed.removeAttribute('src');
+        videoFeed.hidden = true;
+        localPreview.hidden = false;
+        overlayCanvas.hidden = false;
+        
+        fetch('/suggestion_catalog')
+        .then(response => response.json())
+        .then(catalog => { suggestionCatalog = catalog; })
+        .catch(error => console.error('Error loading suggestions:', error));
+        
+        if (navigator.mediaDevices && navigator.mediaDevices.getUserMedia) {
+            navigator.mediaDevices.getUserMedia({video: true, audio: false})
+            .then(stream => {
+                previewStream = stream;
+                localPreview.srcObject = stream;
+                if (uploadFrames) {
+                    uploadingFrames = true;
+                    uploadNextFrame();
+                }
+            })
+            .catch(error => {
+                if (uploadFrames) {
+                    alert('Camera access is needed to send frames to the server.');
+                }
+                console.warn('No local camera preview, drawing overlays only:', error);
+            });
+        }
+        
+        poseSource = new EventSource('/pose_stream');
+        poseSource.onmessage = event => {
+            const data = JSON.parse(event.data);
+            drawOverlay(data);
+            updateStatus(data);
+        };
+        poseSource.onerror = () => {
+            // EventSource reconnects on its own unless the server refused the stream
+            if (poseSource && poseSource.readyState === EventSource.CLOSED) {
+                console.error('Pose stream closed');
+            }
+        };
+    }
+    
+    function stopClientOverlay() {
+        uploadingFrames = false;
+        if (poseSource) {
+            poseSource.close();
+            poseSource = null;
+        }
+        if (previewStream) {
+            previewStream.getTracks().forEach(track => track.stop());
+            previewStream = null;
+            localPreview.srcObject = null;
+        }
+        if (!videoFeed.hidden) {
+            return;
+        }
+        overlayCanvas.getContext('2d').clearRect(0, 0, overlayCanvas.width, overlayCanvas.height);
+        overlayCanvas.hidden = true;
+        localPreview.hidden = true;
+        videoFeed.hidden = false;
+        videoFeed.src = videoFeedUrl;
+        banner = null;
+    }
+    
+    // Frames sent to /ingest_frame when the camera is on this device: scaled down and
+    // JPEG-compressed, one request in flight at a time; the server drops what it cannot keep up with
+    const UPLOAD_WIDTH = 640;
+    const UPLOAD_FPS = 15;
+    const UPLOAD_QUALITY = 0.7;
+    const uploadCanvas = document.createElement('canvas');
+    
+    function uploadNextFrame() {
+        if (!uploadingFrames) {
+            return;
+        }
+        const capturedAt = performance.now();
+        const scheduleNext = () => setTimeout(uploadNextFrame,
+            Math.max(0, 1000 / UPLOAD_FPS - (performance.now() - capturedAt)));
+        if (!localPreview.videoWidth) {
+            // Preview not playing yet
+            setTimeout(uploadNextFrame, 100);
+            return;
+        }
+        
+        const scale = Math.min(1, UPLOAD_WIDTH / localPreview.videoWidth);
+        uploadCanvas.width = Math.round(localPreview.videoWidth * scale);
+        uploadCanvas.height = Math.round(localPreview.videoHeight * scale);
+        uploadCanvas.getContext('2d').drawImage(localPreview, 0, 0, uploadCanvas.width, uploadCanvas.height);
+        uploadCanvas.toBlob(blob => {
+            fetch('/ingest_frame', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'image/jpeg',
+                    'X-Frame-Timestamp': String(capturedAt)
+                },
+                body: blob
+            })
+            .then(response => {
+                // The session is over or gone
+                if (response.status === 404) {
+                    uploadingFrames = false;
+                }
+            })
+            .catch(error => console.error('Error uploading frame:', error))
+            .finally(scheduleNext);
+        }, 'image/jpeg', UPLOAD_QUALITY);
+    }
+    
+    function drawOverlay(data) {
+        const ctx = overlayCanvas.getContext('2d');
+        // Keep the drawing buffer at the displayed size so lines stay sharp
+        if (overlayCanvas.width !== overlayCanvas.clientWidth || overlayCanvas.height !== overlayCanvas.clientHeight) {
+            overlayCanvas.width = overlayCanvas.clientWidth;
+            overlayCanvas.height = overlayCanvas.clientHeight;
+        }
+        const width = overlayCanvas.width;
+        const height = overlayCanvas.height;
+        ctx.clearRect(0, 0, width, height);
+        
+        if (data.event === 'set_complete') {
+            banner = {text: `SET ${data.current_set - 1} COMPLETE! Rest for 30 sec`, color: 'rgb(200, 0, 0)',
+                      until: performance.now() + 3000};
+        } else if (data.event === 'workout_complete') {
+            banner = {text: 'WORKOUT COMPLETE!', color: 'rgb(0, 200, 0)', until: performance.now() + 3000};
+        }
+        
+        if (data.people) {
+            // Group session: a skeleton and progress label per person
+            data.people.forEach(person => {
+                if (person.landmarks) {
+                    drawSkeleton(ctx, person.landmarks, width, height);
+                }
+                const label = person.sets_completed >= data.total_sets ? `#${person.id} DONE` :
+                    `#${person.id} Set ${person.sets_completed + 1}: ${person.reps}/${data.rep_goal}`;
+                const x = person.box[0] / data.size[0] * width;
+                const y = person.box[1] / data.size[1] * height;
+                drawLabel(ctx, label, x + 10, y + 10, 'rgb(14, 29, 118)');
+            });
+        } else if (data.landmarks) {
+            drawSkeleton(ctx, data.landmarks, width, height);
+            drawExerciseJoints(ctx, data.landmarks, data.angles, width, height);
+            drawLabel(ctx, `Reps: ${data.current_reps} / ${data.rep_goal}`, 20, 20, 'rgb(14, 29, 118)');
+            const stages = data.stages || [];
+            stages.forEach((stage, index) => {
+                const prefix = stages.length > 1 ? `${GAUGE_LABELS[activeExercise][index]} stage` : 'Stage';
+                drawLabel(ctx, `${prefix}: ${stage || '-'}`, 20, 56 + 36 * index, 'rgb(14, 29, 118)');
+            });
+            drawProgress(ctx, data.current_reps / data.rep_goal, 20, 56 + 36 * stages.length, 200, 14);
+            (data.angles || []).forEach((angle, index) => {
+                drawGauge(ctx, angle, GAUGE_LABELS[activeExercise][index], width - 70, 70 + 120 * index, 45);
+            });
+            drawSuggestions(ctx, data.suggestions || [], width);
+        }
+        
+        if (banner && performance.now() < banner.until) {
+            ctx.font = 'bold 28px Roboto, sans-serif';
+            const textWidth = ctx.measureText(banner.text).width;
+            drawLabel(ctx, banner.text, (width - textWidth) / 2 - 10, height / 2 - 20, banner.color, 28);
+        }
+    }
+    
+    function landmarkPoint(landmarks, index, width, height) {
+        // Flat [x, y, visibility, ...]: x and y in thousandths of the frame, visibility in percent
+        return {
+            x: landmarks[3 * index] / 1000 * width,
+            y: landmarks[3 * index + 1] / 1000 * height,
+            visible: landmarks[3 * index + 2] >= MIN_VISIBILITY
+        };
+    }
+    
+    function drawSkeleton(ctx, landmarks, width, height) {
+        ctx.strokeStyle = 'rgba(255, 255, 255, 0.8)';
+        ctx.lineWidth = 3;
+        SKELETON.forEach(([from, to]) => {
+            const a = landmarkPoint(landmarks, from, width, height);
+            const b = landmarkPoint(landmarks, to, width, height);
+            if (a.visible && b.visible) {
+                ctx.beginPath();
+                ctx.moveTo(a.x, a.y);
+                ctx.lineTo(b.x, b.y);
+                ctx.stroke();
+            }
+        });
+    }
+    
+    function drawExerciseJoints(ctx, landmarks, angles, width, height) {
+        (EXERCISE_JOINTS[activeExercise] || []).forEach(([joints, color], index) => {
+            const points = joints.map(joint => landmarkPoint(landmarks, joint, width, height));
+            ctx.strokeStyle = color;
+            ctx.fillStyle = color;
+            ctx.lineWidth = 4;
+            ctx.beginPath();
+            ctx.moveTo(points[0].x, points[0].y);
+            points.slice(1).forEach(point => ctx.lineTo(point.x, point.y));
+            ctx.stroke();
+            points.forEach(point => {
+                ctx.beginPath();
+                ctx.arc(point.x, point.y, 7, 0, 2 * Math.PI);
+                ctx.fill();
+            });
+            // The first two angles are the ones measured at these joints
+            if (angles && index < angles.length) {
+                ctx.font = 'bold 14px Roboto, sans-serif';
+                ctx.fillStyle = 'white';
+                ctx.textBaseline = 'alphabetic';
+                ctx.fillText(`${Math.round(angles[index])}°`, points[1].x + 10, points[1].y - 10);
+            }
+        });
+    }
+    
+    function drawLabel(ctx, text, x, y, background, size = 18) {
+        ctx.font = `bold ${size}px Roboto, sans-serif`;
+        const textWidth = ctx.measureText(text).width;
+        ctx.fillStyle = background;
+        ctx.fillRect(x, y, textWidth + 20, size + 14);
+        ctx.fillStyle = 'white';
+        ctx.textBaseline = 'top';
+        ctx.fillText(text, x + 10, y + 7);
+    }
+    
+    function drawProgress(ctx, fraction, x, y, width, height) {
+        ctx.fillStyle = 'white';
+        ctx.fillRect(x, y, width, height);
+        ctx.fillStyle = 'rgb(184, 245, 163)';
+        ctx.fillRect(x, y, width * Math.min(Math.max(fraction, 0), 1), height);
+    }
+    
+    function drawGauge(ctx, angle, label, x, y, radius) {
+        ctx.lineWidth = 10;
+        ctx.strokeStyle = 'rgba(255, 255, 255, 0.6)';
+        ctx.beginPath();
+        ctx.arc(x, y, radius, Math.PI, 2 * Math.PI);
+        ctx.stroke();
+        ctx.strokeStyle = 'rgb(204, 102, 0)';
+        ctx.beginPath();
+        ctx.arc(x, y, radius, Math.PI, Math.PI + Math.PI * Math.min(Math.max(angle, 0), 180) / 180);
+        ctx.stroke();
+        ctx.fillStyle = 'white';
+        ctx.textAlign = 'center';
+        ctx.textBaseline = 'alphabetic';
+        ctx.font = 'bold 16px Roboto, sans-serif';
+        ctx.fillText(`${Math.round(angle)}°`, x, y);
+        ctx.font = '12px Roboto, sans-serif';
+        ctx.fillText(label, x, y + 18);
+        ctx.textAlign = 'start';
+    }
+    
+    function drawSuggestions(ctx, suggestions, width) {
+        // Ids index the suggestion catalog; a string is a suggestion the catalog lacks
+        const texts = suggestions.slice(0, 4)
+            .map(id => typeof id === 'number' ? suggestionCatalog[id] : id)
+            .filter(text => text);
+        if (texts.length === 0) {
+            return;
+        }
+        ctx.font = 'bold 20px Roboto, sans-serif';
+        const panelWidth = Math.max(...texts.map(text => ctx.measureText(text).width)) + 40;
+        const panelHeight = texts.length * 30 + 46;
+        const x = (width - panelWidth) / 2;
+        ctx.fillStyle = 'rgba(0, 0, 0, 0.75)';
+        ctx.fillRect(x, 10, panelWidth, panelHeight);
+        ctx.textAlign = 'center';
+        ctx.textBaseline = 'top';
+        ctx.fillStyle = 'white';
+        ctx.font = 'bold 16px Roboto, sans-serif';
+        ctx.fillText('MOVEMENT GUIDANCE', width / 2, 20);
+        ctx.font = 'bold 20px Roboto, sans-serif';
+        texts.forEach((text, index) => {
+            ctx.fillStyle = text.startsWith('⚠') ? 'rgb(255, 165, 0)' : 'rgb(250, 206, 135)';
+            ctx.fillText(text, width / 2, 46 + 30 * index);
+        });
+        ctx.textAlign = 'start';
+    }
+    
     // ========== Video Upload Mode ==========
     const modeTabs = document.querySelectorAll('.mode-tab');
     const liveMode = document.getElementById('live-mode');
@@ -309,6 +622,10 @@ document.addEventListener('DOMContentLoaded', function() {
                             analyzeBtn.disabled = false;
                             analyzeBtn.textContent = 'Analyze Video';
                             uploadProgress.style.display = 'none';
+                        } else if (data.status === 'queued') {
+                            // Waiting for a free worker
+                            progressFill.style.width = '0%';
+                            progressText.textContent = `Waiting in queue (position ${data.queue_position})...`;
                         } else {
                             // Update progress
                             progressFill.style.width = data.progress + '%';
@@ -381,9 +698,11 @@ document.addEventListener('DOMContentLoaded', function() {
         
         resultsContent.innerHTML = statsHTML;
         
-        // Show processed video
-        processedVideo.src = data.processed_video;
-        processedVideo.style.display = 'block';
+        // Show processed video (absent for analysis-only requests)
+        if (data.processed_video) {
+            processedVideo.src = data.processed_video;
+            processedVideo.style.display = 'block';
+        }
         analysisResults.style.display = 'block';
         
         analyzeBtn.disabled = false;
@@ -0,0 +1,257 @@
+"""
+Frame Broadcaster Module
+Runs one live pipeline and fans encoded frames out to every /video_feed viewer
+"""
+
+import collections
+import itertools
+import logging
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from streaming.ring_buffer import RingBuffer
+from streaming.stream_encoder import QUALITY_TIERS, QualityController, TieredEncoder
+
+logger = logging.getLogger(__name__)
+
+
+def render_placeholder_frame(text="Waiting for camera...", size=(640, 480)):
+    """Encode a static JPEG shown to viewers while no live frames are flowing."""
+    width, height = size
+    frame = np.full((height, width, 3), 30, dtype=np.uint8)
+    (text_width, _), _ = cv2.getTextSize(text, cv2.FONT_HERSHEY_DUPLEX, 0.8, 1)
+    cv2.putText(frame, text, ((width - text_width) // 2, height // 2),
+                cv2.FONT_HERSHEY_DUPLEX, 0.8, (255, 255, 255), 1)
+    ret, buffer = cv2.imencode('.jpg', frame)
+    return buffer.tobytes()
+
+
+class Subscriber:
+    """
+    A single viewer with its own small frame buffer, quality tier and frame-rate cap.
+
+    Args:
+        subscriber_id: Id shown in the stats
+        quality: QualityController choosing the viewer's tier
+        buffer_size: Frames held for the viewer
+        max_fps: Most frames per second sent to the viewer, or 0 for every frame
+    """
+
+    # Seconds over which the delivered frame and byte rates are measured
+    RATE_WINDOW = 5.0
+
+    def __init__(self, subscriber_id, quality, buffer_size=1, max_fps=0):
+        self.id = subscriber_id
+        self.frames = RingBuffer(buffer_size)
+        self.quality = quality
+        self.min_interval = 1.0 / max_fps if max_fps else 0.0
+        self.bytes_sent = 0
+        self._last_published = None
+        self._sent = collections.deque()
+        self._lock = threading.Lock()
+
+    @property
+    def skipped(self):
+        return self.frames.dropped
+
+    @property
+    def tier(self):
+        return self.quality.tier
+
+    def due(self, now):
+        """Whether the frame-rate cap lets a frame be sent now."""
+        return self._last_published is None or now - self._last_published >= self.min_interval
+
+    def push(self, frame_bytes, now):
+        self._last_published = now
+        # A frame still waiting here when the next one arrives is one the viewer could not drain in time
+        evicted = self.frames.put(frame_bytes)
+        self.quality.observe(evicted is not None)
+
+    def next_frame(self, timeout=None):
+        return self.frames.get(timeout)
+
+    def record_sent(self, size):
+        """Account for a frame the server finished writing to the viewer."""
+        now = time.perf_counter()
+        with self._lock:
+            self.bytes_sent += size
+            self._sent.append((now, size))
+            while self._sent[0][0] < now - self.RATE_WINDOW:
+                self._sent.popleft()
+
+    def snapshot(self):
+        with self._lock:
+            sent = list(self._sent)
+            bytes_sent = self.bytes_sent
+        window = self.RATE_WINDOW
+        if sent:
+            window = min(window, max(time.perf_counter() - sent[0][0], 1e-3))
+        return {
+            'id': self.id,
+            'skipped_frames': self.skipped,
+            'tier': self.quality.tier,
+            'downgrades': self.quality.downgrades,
+            'upgrades': self.quality.upgrades,
+            'fps': round(len(sent) / window, 1),
+            'bytes_per_sec': round(sum(size for _, size in sent) / window),
+            'bytes_sent': bytes_sent
+        }
+
+
+class FrameBroadcaster:
+    """
+    Shares a single LiveEngine between any number of subscribers.
+
+    Inference happens once per captured frame no matter how many viewers
+    are connected. Each subscriber only ever holds the newest frame, so a
+    slow client skips frames instead of stalling the others.
+
+    Every viewer has a tier of resolution and JPEG quality (QUALITY_TIERS)
+    that steps down while it keeps skipping frames and back up once it
+    keeps up, so a viewer on a weak link gets smaller frames rather than a
+    stutter. A frame is encoded once per tier in use, only for the viewers
+    whose frame-rate cap lets them have it, which also means less encoding
+    when every viewer is capped below the camera's rate.
+
+    While no frames arrive (no camera yet, or reads failing) each viewer
+    blocks on its buffer and is sent a cached placeholder at placeholder_fps.
+
+    The pipeline can also run with no viewer at all (start_engine), for
+    sessions followed only through their pose stream; frames are then not
+    JPEG-encoded. Once there is no viewer and keep_running says no session
+    consumes the frames either, the engine is stopped on its next frame, so
+    capture and inference do not run for nobody. The next viewer or
+    start_engine() starts it again.
+
+    Args:
+        engine_factory: Callable building the LiveEngine on first subscription
+        placeholder_fps: Rate at which the placeholder is repeated while idle
+        max_fps: Most frames per second sent to any viewer, or 0 for every frame
+        tiers: (scale, quality) ladder viewers move along, best first
+        keep_running: Callable telling whether something other than a viewer
+                      needs the processed frames; None stops the engine as
+                      soon as no viewer is connected
+    """
+
+    def __init__(self, engine_factory, placeholder_fps=1.0, max_fps=0, tiers=QUALITY_TIERS, keep_running=None):
+        self.engine_factory = engine_factory
+        self.keep_running = keep_running
+        self.engine = None
+        self.max_fps = max_fps
+        self.encoder = TieredEncoder(tiers)
+        self.placeholder_interval = 1.0 / placeholder_fps
+        self._placeholder = None
+        self._subscribers = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _ensure_engine(self):
+        # Called with the lock held
+        if self.engine is None:
+            self.engine = self.engine_factory()
+            self.engine.encode = self.encode
+            self.engine.sink = self.publish
+            self.engine.demand = self._demand
+        return self.engine
+
+    def start_engine(self):
+        """Run the live pipeline without subscribing, for clients that only follow the pose stream."""
+        with self._lock:
+            self._ensure_engine().start()
+
+    def has_subscribers(self):
+        return bool(self._subscribers)
+
+    def _demand(self):
+        """Whether frames should be encoded; stops the engine once nothing needs its frames."""
+        with self._lock:
+            if self._subscribers:
+                return True
+            # Checked under the lock so a viewer joining now cannot be left with a stopped engine
+            if self.keep_running is None or not self.keep_running():
+                logger.info("No viewers and no session consuming frames, stopping the live engine")
+                self.engine.stop()
+        return False
+
+    def subscribe(self, buffer_size=1, max_fps=None, tier=None):
+        """
+        Add a viewer.
+
+        Args:
+            buffer_size: Frames held for the viewer
+            max_fps: The viewer's frame-rate cap; only lowers the broadcaster's max_fps
+            tier: Index into the tiers to keep the viewer at, or None to adapt from the best one
+        """
+        caps = [fps for fps in (self.max_fps, max_fps) if fps]
+        tier_count = len(self.encoder.tiers)
+        quality = QualityController(tier_count, tier=min(tier or 0, tier_count - 1), fixed=tier is not None)
+        with self._lock:
+            subscriber = Subscriber(next(self._ids), quality, buffer_size, max_fps=min(caps) if caps else 0)
+            self._subscribers[subscriber.id] = subscriber
+            self._ensure_engine().start()
+        logger.info(f"Viewer {subscriber.id} joined ({len(self._subscribers)} connected)")
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.pop(subscriber.id, None)
+        subscriber.frames.close()
+        logger.info(f"Viewer {subscriber.id} left ({len(self._subscribers)} connected)")
+
+    def encode(self, frame):
+        """
+        Encode a processed frame for the viewers due a frame, once per tier among them.
+
+        Returns:
+            (subscriber, JPEG bytes) pairs for publish(), or None if no viewer is due
+        """
+        now = time.perf_counter()
+        with self._lock:
+            due = [subscriber for subscriber in self._subscribers.values() if subscriber.due(now)]
+        if not due:
+            return None
+        encoded = {}
+        for tier in {subscriber.tier for subscriber in due}:
+            encoded[tier] = self.encoder.encode(frame, tier)
+        return [(subscriber, encoded[subscriber.tier]) for subscriber in due
+                if encoded[subscriber.tier] is not None]
+
+    def publish(self, deliveries):
+        now = time.perf_counter()
+        for subscriber, frame_bytes in deliveries:
+            subscriber.push(frame_bytes, now)
+
+    def stream(self, max_fps=None, tier=None):
+        """Yield multipart MJPEG chunks for one viewer until it disconnects."""
+        subscriber = self.subscribe(max_fps=max_fps, tier=tier)
+        try:
+            while True:
+                frame = subscriber.next_frame(timeout=self.placeholder_interval)
+                if frame is None:
+                    frame = self.placeholder()
+                yield (b'--frame\r\n'
+                       b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n')
+                # Resumed once the server has written the chunk to the viewer
+                subscriber.record_sent(len(frame))
+        finally:
+            self.unsubscribe(subscriber)
+
+    def placeholder(self):
+        if self._placeholder is None:
+            self._placeholder = render_placeholder_frame()
+        return self._placeholder
+
+    def snapshot(self):
+        with self._lock:
+            subscribers = list(self._subscribers.values())
+            engine = self.engine
+        return {
+            'engine_running': engine is not None and engine.running,
+            'pipeline': engine.snapshot() if engine is not None else None,
+            'encoder': self.encoder.snapshot(),
+            'subscribers': [subscriber.snapshot() for subscriber in subscribers]
+        }
@@ -0,0 +1,217 @@
+"""
+Frame Ingest Module
+Runs a session's pose tracking on compressed frames uploaded by the browser instead of a server camera
+"""
+
+import logging
+import struct
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from streaming.live_engine import StageStats
+from streaming.ring_buffer import RingBuffer
+
+logger = logging.getLogger(__name__)
+
+
+class FrameTooLargeError(Exception):
+    """Raised when an uploaded frame exceeds the configured size or pixel limit."""
+
+
+class UnsupportedFrameError(Exception):
+    """Raised when an uploaded frame is not a JPEG, PNG or WebP image whose size can be read."""
+
+
+# JPEG start-of-frame markers; C4 (DHT), C8 (JPG) and CC (DAC) share the range but carry no size
+_JPEG_SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def image_size(data):
+    """
+    Width and height from a JPEG, PNG or WebP header, without decoding the image.
+
+    Returns:
+        (width, height), or None if the format is not recognised or the header is cut short
+    """
+    if data[:8] == b'\x89PNG\r\n\x1a\n' and data[12:16] == b'IHDR':
+        return struct.unpack('>II', data[16:24]) if len(data) >= 24 else None
+
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP' and len(data) >= 30:
+        chunk = data[12:16]
+        if chunk == b'VP8 ':
+            width, height = struct.unpack('<HH', data[26:30])
+            return width & 0x3FFF, height & 0x3FFF
+        if chunk == b'VP8L':
+            bits = int.from_bytes(data[21:25], 'little')
+            return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        if chunk == b'VP8X':
+            return int.from_bytes(data[24:27], 'little') + 1, int.from_bytes(data[27:30], 'little') + 1
+        return None
+
+    if data[:2] == b'\xff\xd8':
+        offset = 2
+        while offset + 4 <= len(data):
+            if data[offset] != 0xFF:
+                return None
+            marker = data[offset + 1]
+            if marker == 0xFF:
+                # Fill byte before a marker
+                offset += 1
+                continue
+            if marker == 0x01 or 0xD0 <= marker <= 0xD9:
+                offset += 2
+                continue
+            length = struct.unpack('>H', data[offset + 2:offset + 4])[0]
+            if marker in _JPEG_SOF_MARKERS:
+                if offset + 9 > len(data):
+                    return None
+                height, width = struct.unpack('>HH', data[offset + 5:offset + 9])
+                return width, height
+            offset += 2 + length
+    return None
+
+
+class FrameIngestor:
+    """
+    Bounded queue of uploaded JPEG/PNG/WebP frames and the worker that processes them.
+
+    submit() only queues the compressed bytes; a worker thread decodes the
+    newest frame and runs process_frame on it. When inference falls behind
+    the queue drops its oldest frame, so the session always works on what
+    the camera sees now instead of on a growing backlog, and frames that
+    are dropped are never decoded.
+
+    The worker starts with the first frame and exits after idle_exit
+    seconds without one, so an abandoned session leaves no thread behind.
+
+    The stats are meant for sizing: utilization is the fraction of wall
+    time the worker spent decoding and processing, so the sum over all
+    sessions is how many cores ingestion keeps busy.
+
+    Frames are checked before they are queued: the compressed size against
+    max_frame_bytes and the dimensions in the image header against
+    max_frame_pixels, so a small file declaring a huge image is never
+    decoded.
+
+    Args:
+        process_frame: Callable taking a BGR frame and its capture timestamp in seconds
+        queue_size: Frames waiting for the worker before the oldest is dropped
+        max_frame_bytes: Largest compressed frame accepted
+        max_frame_pixels: Most pixels (width * height) an accepted frame may have
+        idle_exit: Seconds without frames after which the worker exits
+    """
+
+    def __init__(self, process_frame, queue_size=2, max_frame_bytes=1024 * 1024, max_frame_pixels=1920 * 1080,
+                 idle_exit=5.0):
+        self.process_frame = process_frame
+        self.max_frame_bytes = max_frame_bytes
+        self.max_frame_pixels = max_frame_pixels
+        self.idle_exit = idle_exit
+        self.queue = RingBuffer(queue_size)
+        self.stats = {name: StageStats(name) for name in ('queue_wait', 'decode', 'inference')}
+        self.latency = StageStats('end_to_end')
+        self.received = 0
+        self.bytes_received = 0
+        self.decode_errors = 0
+        self.busy_seconds = 0.0
+        self.started_at = time.perf_counter()
+        self._worker = None
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def submit(self, data, timestamp=None):
+        """
+        Queue one compressed frame captured at timestamp seconds (arrival time by default).
+
+        Returns:
+            True if an older frame was dropped to make room
+
+        Raises:
+            FrameTooLargeError: If data is larger than max_frame_bytes or the image
+                                has more than max_frame_pixels
+            UnsupportedFrameError: If the image size cannot be read from data
+        """
+        self.check_length(len(data))
+        size = image_size(data)
+        if size is None:
+            raise UnsupportedFrameError("Frame is not a JPEG, PNG or WebP image")
+        if size[0] * size[1] > self.max_frame_pixels:
+            raise FrameTooLargeError(f"Frame of {size[0]}x{size[1]} pixels exceeds {self.max_frame_pixels}")
+        received_at = time.perf_counter()
+        with self._lock:
+            if self._closed:
+                return False
+            self.received += 1
+            self.bytes_received += len(data)
+            # Queued under the lock so an idle worker cannot exit between the put and the check below
+            evicted = self.queue.put((received_at, received_at if timestamp is None else timestamp, data))
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="frame-ingest", daemon=True)
+                self._worker.start()
+        return evicted is not None
+
+    def check_length(self, length):
+        """
+        Raises:
+            FrameTooLargeError: If a frame of length bytes would be refused
+        """
+        if length > self.max_frame_bytes:
+            raise FrameTooLargeError(f"Frame of {length} bytes exceeds {self.max_frame_bytes}")
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+        self.queue.close()
+
+    def _run(self):
+        while True:
+            item = self.queue.get(timeout=self.idle_exit)
+            if item is None:
+                with self._lock:
+                    # A frame may have been queued between the timeout and taking the lock
+                    if self._closed or not len(self.queue):
+                        self._worker = None
+                        return
+                continue
+            self._process(*item)
+
+    def _process(self, received_at, timestamp, data):
+        start = time.perf_counter()
+        self.stats['queue_wait'].record((start - received_at) * 1000)
+        frame = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        decoded = time.perf_counter()
+        if frame is None:
+            self.decode_errors += 1
+            return
+        self.stats['decode'].record((decoded - start) * 1000)
+
+        try:
+            self.process_frame(frame, timestamp)
+        except Exception as e:
+            logger.error(f"Error processing uploaded frame: {e}")
+            return
+        finished = time.perf_counter()
+        self.stats['inference'].record((finished - decoded) * 1000)
+        self.latency.record((finished - received_at) * 1000)
+        self.busy_seconds += finished - start
+
+    def snapshot(self):
+        """Counts, per-stage latency and drops, and worker utilization."""
+        elapsed = time.perf_counter() - self.started_at
+        stats = {name: stage.snapshot() for name, stage in self.stats.items()}
+        stats['end_to_end'] = self.latency.snapshot()
+        with self._lock:
+            stats.update({
+                'received': self.received,
+                'bytes_received': self.bytes_received,
+                'dropped': self.queue.dropped,
+                'decode_errors': self.decode_errors,
+                'queued': len(self.queue),
+                'worker_running': self._worker is not None,
+                'received_fps': round(self.received / elapsed, 2) if elapsed > 0 else 0.0,
+                'utilization': round(self.busy_seconds / elapsed, 3) if elapsed > 0 else 0.0
+            })
+        return stats
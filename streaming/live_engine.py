@@ -0,0 +1,248 @@
+"""
+Live Engine Module
+Pipelines camera capture, pose inference and JPEG encoding on separate threads
+"""
+
+import logging
+import threading
+import time
+
+import cv2
+
+from streaming.ring_buffer import RingBuffer
+from utils.buffer_pool import BufferPool
+
+logger = logging.getLogger(__name__)
+
+
+def encode_jpeg(frame):
+    """JPEG bytes of frame at OpenCV's default quality, or None if encoding failed."""
+    ret, buffer = cv2.imencode('.jpg', frame)
+    return buffer.tobytes() if ret else None
+
+
+class StageStats:
+    """Latency and drop counters for a single pipeline stage."""
+
+    def __init__(self, name):
+        self.name = name
+        self.frames = 0
+        self.drops = 0
+        self.last_ms = 0.0
+        self.avg_ms = 0.0
+        self.max_ms = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, elapsed_ms):
+        with self._lock:
+            self.frames += 1
+            self.last_ms = elapsed_ms
+            self.max_ms = max(self.max_ms, elapsed_ms)
+            # Moving average so the figure follows load changes instead of the whole history
+            self.avg_ms = elapsed_ms if self.frames == 1 else 0.9 * self.avg_ms + 0.1 * elapsed_ms
+
+    def record_drop(self, count=1):
+        with self._lock:
+            self.drops += count
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'frames': self.frames,
+                'drops': self.drops,
+                'last_ms': round(self.last_ms, 2),
+                'avg_ms': round(self.avg_ms, 2),
+                'max_ms': round(self.max_ms, 2)
+            }
+
+
+class LiveEngine:
+    """
+    Three-stage live pipeline: capture -> inference -> encode.
+
+    Stages run on their own threads and are joined by small ring buffers that
+    drop the oldest frame when the next stage falls behind, so capture never
+    waits on MediaPipe and the encoder never waits on the camera.
+
+    Captured frames are read into arrays from frame_pool and handed back
+    to it once encoded or dropped, so a steady stream reuses the same few
+    frame buffers instead of allocating one per frame. process_frame must
+    therefore not keep a reference to the frame it is given.
+
+    Args:
+        camera_source: Callable returning the current cv2.VideoCapture (or None)
+        process_frame: Callable taking a BGR frame and returning the annotated frame
+        buffer_size: Capacity of each ring buffer between stages
+        sink: Callable receiving each encoded frame; defaults to the engine's own
+              output buffer
+        encode: Callable turning a processed frame into what sink receives, or
+                None to skip the frame; encode_jpeg by default
+        demand: Callable telling whether anyone wants the encoded frames; while
+                it returns False frames are still processed but not encoded
+        camera_ready: threading.Event set while a camera is open; capture blocks
+                      on it instead of polling when there is no camera
+    """
+
+    STAGES = ('capture', 'inference', 'encode')
+    MIN_READ_BACKOFF = 0.01
+    MAX_READ_BACKOFF = 1.0
+
+    def __init__(self, camera_source, process_frame, buffer_size=2, sink=None, camera_ready=None, demand=None,
+                 encode=encode_jpeg):
+        self.camera_source = camera_source
+        self.camera_ready = camera_ready
+        self.process_frame = process_frame
+        self.captured = RingBuffer(buffer_size)
+        self.processed = RingBuffer(buffer_size)
+        self.encoded = RingBuffer(buffer_size)
+        self.sink = sink or self.encoded.put
+        self.encode = encode
+        self.demand = demand
+        self.unwatched_frames = 0
+        self.stats = {name: StageStats(name) for name in self.STAGES}
+        # Enough for every frame that can be in flight: two per ring buffer plus one per stage
+        self.frame_pool = BufferPool(max_free=3 * buffer_size + len(self.STAGES))
+        self._frame_shape = None
+        self.latency = StageStats('end_to_end')
+        self._running = threading.Event()
+        # Bumped by every start() so stage threads left over from an earlier run exit
+        self._generation = 0
+        self._threads = []
+        self._last_log_time = time.time()
+
+    @property
+    def running(self):
+        return self._running.is_set()
+
+    def start(self):
+        """Start the stage threads; an engine stopped earlier starts again with empty buffers."""
+        if self._running.is_set():
+            return
+        for buffer in (self.captured, self.processed, self.encoded):
+            buffer.reopen()
+        self._generation += 1
+        self._running.set()
+        loops = (self._capture_loop, self._inference_loop, self._encode_loop)
+        for name, target in zip(self.STAGES, loops):
+            thread = threading.Thread(target=target, args=(self._generation,), name=f"live-{name}",
+                                      daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info("Live engine started")
+
+    def stop(self):
+        if not self._running.is_set():
+            return
+        self._running.clear()
+        for buffer in (self.captured, self.processed, self.encoded):
+            buffer.close()
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout=1.0)
+        self._threads = []
+        logger.info(f"Live engine stopped: {self.snapshot()}")
+
+    def snapshot(self):
+        """Per-stage latency and drop counts."""
+        stats = {name: stage.snapshot() for name, stage in self.stats.items()}
+        stats['end_to_end'] = self.latency.snapshot()
+        stats['output_drops'] = self.encoded.dropped
+        stats['unwatched_frames'] = self.unwatched_frames
+        stats['frame_pool'] = self.frame_pool.stats()
+        return stats
+
+    def _active(self, generation):
+        return self._running.is_set() and self._generation == generation
+
+    def _wait_for_camera(self):
+        if self.camera_ready is not None:
+            # Timeout only so stop() is noticed; a camera arriving wakes us immediately
+            self.camera_ready.wait(timeout=0.5)
+        else:
+            time.sleep(0.5)
+
+    def _capture_loop(self, generation):
+        backoff = self.MIN_READ_BACKOFF
+        while self._active(generation):
+            camera = self.camera_source()
+            if camera is None:
+                self._wait_for_camera()
+                continue
+
+            start = time.perf_counter()
+            buffer = self.frame_pool.acquire(self._frame_shape) if self._frame_shape else None
+            success, frame = camera.read(buffer)
+            if frame is not buffer:
+                # First frame or a resolution change: the camera allocated a new array
+                self.frame_pool.release(buffer)
+                if success:
+                    self._frame_shape = frame.shape
+            if not success:
+                self.frame_pool.release(frame)
+                if backoff == self.MIN_READ_BACKOFF:
+                    logger.warning("Camera read failed, backing off")
+                time.sleep(backoff)
+                backoff = min(backoff * 2, self.MAX_READ_BACKOFF)
+                continue
+            backoff = self.MIN_READ_BACKOFF
+
+            captured_at = time.perf_counter()
+            self.stats['capture'].record((captured_at - start) * 1000)
+            # A frame evicted here was never seen by inference
+            evicted = self.captured.put((captured_at, frame))
+            if evicted is not None:
+                self.stats['inference'].record_drop()
+                self.frame_pool.release(evicted[1])
+
+    def _inference_loop(self, generation):
+        while self._active(generation):
+            item = self.captured.get(timeout=0.5)
+            if item is None:
+                continue
+            captured_at, frame = item
+
+            start = time.perf_counter()
+            try:
+                annotated = self.process_frame(frame)
+            except Exception as e:
+                logger.error(f"Error processing live frame: {e}")
+                self.frame_pool.release(frame)
+                continue
+            self.stats['inference'].record((time.perf_counter() - start) * 1000)
+            if annotated is not frame:
+                self.frame_pool.release(frame)
+
+            evicted = self.processed.put((captured_at, annotated))
+            if evicted is not None:
+                self.stats['encode'].record_drop()
+                self.frame_pool.release(evicted[1])
+
+    def _encode_loop(self, generation):
+        while self._active(generation):
+            item = self.processed.get(timeout=0.5)
+            if item is None:
+                continue
+            captured_at, frame = item
+            if self.demand is not None and not self.demand():
+                # Only pose stream clients are following the session, nobody watches the video
+                self.frame_pool.release(frame)
+                self.unwatched_frames += 1
+                continue
+
+            start = time.perf_counter()
+            encoded = self.encode(frame)
+            self.frame_pool.release(frame)
+            if encoded is None:
+                continue
+            finished = time.perf_counter()
+            self.stats['encode'].record((finished - start) * 1000)
+            self.latency.record((finished - captured_at) * 1000)
+
+            self.sink(encoded)
+            self._log_stats()
+
+    def _log_stats(self):
+        current_time = time.time()
+        if current_time - self._last_log_time >= 5.0:
+            logger.info(f"Live engine stats: {self.snapshot()}")
+            self._last_log_time = current_time
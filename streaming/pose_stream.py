@@ -0,0 +1,110 @@
+"""
+Pose Stream Module
+Fans a session's compact per-frame pose and metrics messages out to Server-Sent Events clients
+"""
+
+import itertools
+import json
+import logging
+import threading
+
+from streaming.ring_buffer import RingBuffer
+
+logger = logging.getLogger(__name__)
+
+
+def encode_event(message):
+    """One Server-Sent Events `data:` event holding message as compact JSON."""
+    return f"data: {json.dumps(message, separators=(',', ':'))}\n\n".encode()
+
+
+class PoseStream:
+    """
+    Sends a session's per-frame messages to any number of SSE subscribers.
+
+    The counterpart of FrameBroadcaster for clients that draw the overlays
+    over their own camera preview: instead of a JPEG per frame they receive
+    a few hundred bytes of landmarks and metrics. A message is serialized
+    once however many clients listen, and each client only keeps the
+    newest buffer_size messages, so a slow one skips frames.
+
+    Args:
+        buffer_size: Messages kept per subscriber before the oldest is dropped
+        keepalive: Seconds of silence after which a comment is sent so
+                   proxies keep the connection open
+    """
+
+    def __init__(self, buffer_size=2, keepalive=15.0):
+        self.buffer_size = buffer_size
+        self.keepalive = keepalive
+        self.messages = 0
+        self.bytes_sent = 0
+        self._closed = False
+        self._subscribers = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    @property
+    def active(self):
+        """Whether anyone is listening; lets the session skip building messages otherwise."""
+        return bool(self._subscribers)
+
+    def subscribe(self):
+        buffer = RingBuffer(self.buffer_size)
+        with self._lock:
+            subscriber_id = next(self._ids)
+            self._subscribers[subscriber_id] = buffer
+            if self._closed:
+                buffer.close()
+        return subscriber_id, buffer
+
+    def unsubscribe(self, subscriber_id):
+        with self._lock:
+            buffer = self._subscribers.pop(subscriber_id, None)
+        if buffer is not None:
+            buffer.close()
+
+    def publish(self, message):
+        """Send a JSON-serializable message to every subscriber."""
+        with self._lock:
+            buffers = list(self._subscribers.values())
+        if not buffers:
+            return
+        event = encode_event(message)
+        for buffer in buffers:
+            buffer.put(event)
+        with self._lock:
+            self.messages += 1
+            self.bytes_sent += len(event) * len(buffers)
+
+    def stream(self):
+        """Yield text/event-stream chunks for one subscriber until it disconnects or close() is called."""
+        subscriber_id, buffer = self.subscribe()
+        try:
+            yield b": connected\n\n"
+            while True:
+                event = buffer.get(timeout=self.keepalive)
+                if event is None:
+                    if buffer.closed:
+                        return
+                    event = b": keepalive\n\n"
+                yield event
+        finally:
+            self.unsubscribe(subscriber_id)
+
+    def close(self):
+        """End every subscriber's stream once its pending messages are sent, and any later one at once."""
+        with self._lock:
+            self._closed = True
+            buffers = list(self._subscribers.values())
+        for buffer in buffers:
+            buffer.close()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'subscribers': [{'id': subscriber_id, 'skipped_messages': buffer.dropped}
+                                for subscriber_id, buffer in self._subscribers.items()],
+                'messages': self.messages,
+                'bytes_sent': self.bytes_sent
+            }
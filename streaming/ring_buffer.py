@@ -0,0 +1,70 @@
+"""
+Ring Buffer Module
+Bounded, thread-safe buffers that drop stale frames instead of blocking producers
+"""
+
+import collections
+import threading
+
+
+class RingBuffer:
+    def __init__(self, capacity=2):
+        self.capacity = capacity
+        self.dropped = 0
+        self._items = collections.deque()
+        self._condition = threading.Condition()
+        self._closed = False
+
+    def put(self, item):
+        """
+        Append an item, evicting the oldest one when the buffer is full.
+
+        Returns:
+            The evicted item, or None if nothing was dropped
+        """
+        evicted = None
+        with self._condition:
+            if len(self._items) >= self.capacity:
+                evicted = self._items.popleft()
+                self.dropped += 1
+            self._items.append(item)
+            self._condition.notify()
+        return evicted
+
+    def get(self, timeout=None):
+        """
+        Pop the oldest item, waiting up to timeout seconds for one to arrive.
+
+        Returns:
+            The item, or None on timeout or after close()
+        """
+        with self._condition:
+            if not self._items and not self._closed:
+                self._condition.wait(timeout)
+            if not self._items:
+                return None
+            return self._items.popleft()
+
+    def clear(self):
+        with self._condition:
+            self._items.clear()
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def reopen(self):
+        """Empty a closed buffer and let get() wait for items again."""
+        with self._condition:
+            self._items.clear()
+            self._closed = False
+
+    @property
+    def closed(self):
+        with self._condition:
+            return self._closed
+
+    def __len__(self):
+        with self._condition:
+            return len(self._items)
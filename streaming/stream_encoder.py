@@ -0,0 +1,145 @@
+"""
+Stream Encoder Module
+JPEG encoding of live frames at a ladder of resolution and quality tiers, adapted per viewer
+"""
+
+import threading
+
+import cv2
+
+from utils.buffer_pool import BufferPool
+
+# (scale, JPEG quality) from best to cheapest, each step cutting the bytes by a third to a half.
+# Halving and quartering keep cv2.INTER_AREA on its fast integer-factor path.
+QUALITY_TIERS = (
+    (1.0, 80),
+    (1.0, 60),
+    (0.5, 75),
+    (0.5, 50),
+    (0.25, 60),
+    (0.25, 40),
+)
+
+
+class TierStats:
+    """Encode time and output size of one tier."""
+
+    def __init__(self):
+        self.frames = 0
+        self.avg_ms = 0.0
+        self.avg_bytes = 0.0
+
+    def record(self, elapsed_ms, size):
+        self.frames += 1
+        # Moving averages, like StageStats, so the figures follow scene changes
+        if self.frames == 1:
+            self.avg_ms, self.avg_bytes = elapsed_ms, float(size)
+        else:
+            self.avg_ms = 0.9 * self.avg_ms + 0.1 * elapsed_ms
+            self.avg_bytes = 0.9 * self.avg_bytes + 0.1 * size
+
+
+class TieredEncoder:
+    """
+    Encodes a frame as JPEG at one of the QUALITY_TIERS.
+
+    Downscaled tiers are resized into arrays from a BufferPool, so after
+    the first frames no resize allocates. Encoding runs on the live
+    pipeline's encode thread only.
+
+    Args:
+        tiers: (scale, quality) pairs, best first
+    """
+
+    def __init__(self, tiers=QUALITY_TIERS):
+        self.tiers = tiers
+        self.buffers = BufferPool(max_free=len(tiers))
+        self.stats = [TierStats() for _ in tiers]
+        self._lock = threading.Lock()
+
+    def encode(self, frame, tier):
+        """
+        JPEG bytes of frame at the given tier index.
+
+        Returns:
+            The bytes, or None if encoding failed
+        """
+        scale, quality = self.tiers[tier]
+        start = cv2.getTickCount()
+        image = frame
+        if scale < 1.0:
+            height, width = frame.shape[:2]
+            size = (max(round(width * scale), 1), max(round(height * scale), 1))
+            image = cv2.resize(frame, size, dst=self.buffers.acquire((size[1], size[0], 3)),
+                               interpolation=cv2.INTER_AREA)
+        ret, buffer = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        if image is not frame:
+            self.buffers.release(image)
+        if not ret:
+            return None
+        elapsed_ms = (cv2.getTickCount() - start) * 1000 / cv2.getTickFrequency()
+        with self._lock:
+            self.stats[tier].record(elapsed_ms, len(buffer))
+        return buffer.tobytes()
+
+    def snapshot(self):
+        with self._lock:
+            return [{'scale': scale, 'quality': quality, 'frames': stats.frames,
+                     'avg_encode_ms': round(stats.avg_ms, 2), 'avg_kb': round(stats.avg_bytes / 1024, 1)}
+                    for (scale, quality), stats in zip(self.tiers, self.stats)]
+
+
+class QualityController:
+    """
+    Picks a viewer's tier from how well it keeps up with the frames sent to it.
+
+    A viewer holds only its newest frame; when a new one arrives before it
+    took the last one, that frame was skipped because the connection (or
+    the client) is too slow for this tier. After `window` frames with more
+    than `max_skip_ratio` of them skipped the viewer steps down one tier;
+    after `recover_after` frames in a row without a skip it steps back up.
+
+    Args:
+        tier_count: Number of tiers
+        tier: Starting tier
+        window: Frames over which the skip ratio is measured
+        max_skip_ratio: Skip ratio above which the viewer steps down
+        recover_after: Frames without a skip before the viewer steps up
+        fixed: Keep the starting tier
+    """
+
+    def __init__(self, tier_count, tier=0, window=30, max_skip_ratio=0.2, recover_after=150, fixed=False):
+        self.tier_count = tier_count
+        self.tier = tier
+        self.window = window
+        self.max_skip_ratio = max_skip_ratio
+        self.recover_after = recover_after
+        self.fixed = fixed
+        self.downgrades = 0
+        self.upgrades = 0
+        self._frames = 0
+        self._skips = 0
+        self._streak = 0
+
+    def observe(self, skipped):
+        """Record whether the previous frame was skipped; returns the tier for the next one."""
+        if self.fixed:
+            return self.tier
+        self._frames += 1
+        if skipped:
+            self._skips += 1
+            self._streak = 0
+        else:
+            self._streak += 1
+
+        if self._frames >= self.window:
+            if self._skips > self.max_skip_ratio * self._frames and self.tier < self.tier_count - 1:
+                self.tier += 1
+                self.downgrades += 1
+                self._streak = 0
+            self._frames = self._skips = 0
+        if self._streak >= self.recover_after and self.tier > 0:
+            self.tier -= 1
+            self.upgrades += 1
+            self._streak = 0
+        return self.tier
@@ -0,0 +1,63 @@
+"""
+Buffer Pool Utility
+Reuses frame-sized NumPy arrays instead of allocating new ones for every frame
+"""
+
+import collections
+import threading
+
+import numpy as np
+
+
+class BufferPool:
+    """
+    Thread-safe free list of arrays, handed out again by shape and dtype.
+
+    acquire() returns a free array of the requested shape or allocates one;
+    release() hands an array back, including arrays the pool did not
+    allocate itself (a camera frame, for example). At most max_free arrays
+    are kept; beyond that the oldest free array is dropped, so a change of
+    resolution does not leave stale buffers behind for long.
+
+    The contents of an acquired array are whatever it held last; callers
+    are expected to overwrite it completely, typically as an OpenCV dst.
+
+    Args:
+        max_free: Number of released arrays kept for reuse
+    """
+
+    def __init__(self, max_free=8):
+        self.max_free = max_free
+        self.allocations = 0
+        self.reuses = 0
+        self._free = collections.deque()
+        self._lock = threading.Lock()
+
+    def acquire(self, shape, dtype=np.uint8):
+        shape = tuple(shape)
+        dtype = np.dtype(dtype)
+        with self._lock:
+            for index, array in enumerate(self._free):
+                if array.shape == shape and array.dtype == dtype:
+                    del self._free[index]
+                    self.reuses += 1
+                    return array
+            self.allocations += 1
+        return np.empty(shape, dtype=dtype)
+
+    def release(self, array):
+        # Views and read-only arrays could be shared with someone else
+        if array is None or array.base is not None or not array.flags.writeable:
+            return
+        with self._lock:
+            self._free.append(array)
+            if len(self._free) > self.max_free:
+                self._free.popleft()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'allocations': self.allocations,
+                'reuses': self.reuses,
+                'free': len(self._free)
+            }
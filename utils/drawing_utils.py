@@ -2,6 +2,7 @@ import cv2
 import numpy as np
 import math
 from utils.draw_text_with_background import draw_text_with_background
+from utils.overlay_cache import draw_cached_text, text_size
 
 def display_counter(frame, counter, position=(40, 240), color=(0, 0, 0), background_color=(192, 192, 192)):
     """Display the repetition counter."""
@@ -15,28 +16,40 @@ def display_stage(frame, stage, label="Stage", position=(40, 270), color=(0, 0,
     draw_text_with_background(frame, text, position, 
                              cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, background_color, 1)
 
-def draw_progress_bar(frame, exercise, value, position, size=(200, 20), color=(0, 255, 0), background_color=(255, 255, 255)):
-    """Draw a progress bar for tracking exercise repetitions."""
-    x, y = position
-    width, height = size
-    
-    # Get max value for the exercise type
-    max_value = 10  # Default
+def progress_bar_max(exercise):
+    """Reps a full progress bar stands for."""
     if exercise == "squat":
-        max_value = 15
+        return 15
     elif exercise == "push_up":
-        max_value = 10
+        return 10
     elif exercise == "hammer_curl":
-        max_value = 12
+        return 12
+    return 10
+
+def draw_progress_bar_static(frame, exercise, position, size=(200, 20), background_color=(255, 255, 255)):
+    """Draw the parts of a progress bar that do not depend on its value: background, border and label."""
+    x, y = position
+    width, height = size
+
+    # Draw background
+    cv2.rectangle(frame, (x, y), (x + width, y + height), background_color, -1)
+    cv2.rectangle(frame, (x, y), (x + width, y + height), (0, 0, 0), 1)
+
+    # Draw label above the progress bar
+    label = f"{exercise.replace('_', ' ').title()} Progress"
+    draw_text_with_background(frame, label, (x, y - 10), 
+                             cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), (118, 29, 14), 1)
+
+def draw_progress_bar_value(frame, exercise, value, position, size=(200, 20), color=(0, 255, 0)):
+    """Draw the fill and value text of a progress bar over its static parts."""
+    x, y = position
+    width, height = size
+    max_value = progress_bar_max(exercise)
     
     # Calculate fill width
     fill_width = int((value / max_value) * width)
     fill_width = min(fill_width, width)  # Ensure it doesn't exceed max width
     
-    # Draw background
-    cv2.rectangle(frame, (x, y), (x + width, y + height), background_color, -1)
-    cv2.rectangle(frame, (x, y), (x + width, y + height), (0, 0, 0), 1)
-    
     # Draw fill
     if fill_width > 0:
         cv2.rectangle(frame, (x, y), (x + fill_width, y + height), color, -1)
@@ -47,21 +60,29 @@ def draw_progress_bar(frame, exercise, value, position, size=(200, 20), color=(0
     text_x = x + (width - text_size[0]) // 2
     text_y = y + (height + text_size[1]) // 2
     cv2.putText(frame, text, (text_x, text_y), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 0), 1)
-    
-    # Draw label above the progress bar
-    label = f"{exercise.replace('_', ' ').title()} Progress"
-    draw_text_with_background(frame, label, (x, y - 10), 
-                             cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), (118, 29, 14), 1)
 
-def draw_gauge_meter(frame, angle, text, position, radius=50, color=(0, 0, 255)):
-    """Draw a gauge meter visualization showing the angle."""
+def draw_progress_bar(frame, exercise, value, position, size=(200, 20), color=(0, 255, 0), background_color=(255, 255, 255)):
+    """Draw a progress bar for tracking exercise repetitions."""
+    draw_progress_bar_static(frame, exercise, position, size, background_color)
+    draw_progress_bar_value(frame, exercise, value, position, size, color)
+
+def draw_gauge_meter_static(frame, text, position, radius=50):
+    """Draw the parts of a gauge meter that do not depend on the angle: outline and title."""
     x, y = position
-    start_angle = 180
-    end_angle = 0
     
     # Draw outer circle
     cv2.circle(frame, (x, y), radius, (200, 200, 200), 2)
     
+    # Draw title
+    cv2.putText(frame, text, (x - radius, y - radius - 10),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 0), 1)
+
+def draw_gauge_meter_value(frame, angle, position, radius=50, color=(0, 0, 255)):
+    """Draw the needle and angle text of a gauge meter over its static parts."""
+    x, y = position
+    start_angle = 180
+    end_angle = 0
+    
     # Calculate the angle position on the gauge
     gauge_angle = start_angle - (angle * (start_angle - end_angle) / 180)
     gauge_angle = max(min(gauge_angle, start_angle), end_angle) # Constrain angle
@@ -82,10 +103,11 @@ def draw_gauge_meter(frame, angle, text, position, radius=50, color=(0, 0, 255))
     # Draw text
     cv2.putText(frame, f"{int(angle)}°", (x - 20, y + radius + 20), 
                 cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
-    
-    # Draw title
-    cv2.putText(frame, text, (x - radius, y - radius - 10),
-                cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 0), 1)
+
+def draw_gauge_meter(frame, angle, text, position, radius=50, color=(0, 0, 255)):
+    """Draw a gauge meter visualization showing the angle."""
+    draw_gauge_meter_static(frame, text, position, radius)
+    draw_gauge_meter_value(frame, angle, position, radius, color)
 
 def display_suggestions(frame, suggestions, position=None, max_suggestions=3):
     """
@@ -122,7 +144,7 @@ def display_suggestions(frame, suggestions, position=None, max_suggestions=3):
     # Calculate panel width based on longest suggestion
     max_text_width = 0
     for suggestion in suggestions_to_show:
-        (text_width, _), _ = cv2.getTextSize(suggestion, cv2.FONT_HERSHEY_SIMPLEX, font_scale, thickness)
+        (text_width, _), _ = text_size(suggestion, cv2.FONT_HERSHEY_SIMPLEX, font_scale, thickness)
         max_text_width = max(max_text_width, text_width)
     
     panel_width = max_text_width + 80  # Add padding
@@ -132,14 +154,12 @@ def display_suggestions(frame, suggestions, position=None, max_suggestions=3):
     panel_x = (frame_width - panel_width) // 2
     panel_y = start_y
     
-    # Draw semi-transparent dark background for better visibility
-    # Create overlay
-    overlay = frame.copy()
-    cv2.rectangle(overlay, (panel_x - 20, panel_y - 40), 
-                  (panel_x + panel_width + 20, panel_y + panel_height), 
-                  (0, 0, 0), -1)  # Black background
-    # Blend overlay with original frame
-    cv2.addWeighted(overlay, 0.75, frame, 0.25, 0, frame)
+    # Draw semi-transparent dark background for better visibility: the 75% black blend is
+    # applied to the panel's own pixels only, so its cost does not grow with the frame size
+    panel = frame[max(panel_y - 40, 0):max(panel_y + panel_height + 1, 0),
+                  max(panel_x - 20, 0):max(panel_x + panel_width + 21, 0)]
+    if panel.size:
+        cv2.addWeighted(panel, 0.25, panel, 0, 0, dst=panel)
     
     # Draw bright border for visibility
     cv2.rectangle(frame, (panel_x - 20, panel_y - 40), 
@@ -150,12 +170,12 @@ def display_suggestions(frame, suggestions, position=None, max_suggestions=3):
     title_text = "MOVEMENT GUIDANCE"
     title_font_scale = 1.0
     title_thickness = 2
-    (title_width, title_height), _ = cv2.getTextSize(title_text, cv2.FONT_HERSHEY_DUPLEX, title_font_scale, title_thickness)
+    (title_width, title_height), _ = text_size(title_text, cv2.FONT_HERSHEY_DUPLEX, title_font_scale, title_thickness)
     title_x = panel_x + (panel_width - title_width) // 2
     title_y = panel_y - 10
     
-    cv2.putText(frame, title_text, (title_x, title_y), 
-                cv2.FONT_HERSHEY_DUPLEX, title_font_scale, (255, 255, 255), title_thickness)
+    draw_cached_text(frame, title_text, (title_x, title_y), 
+                     cv2.FONT_HERSHEY_DUPLEX, title_font_scale, (255, 255, 255), title_thickness)
     
     # Draw each suggestion - centered
     for i, suggestion in enumerate(suggestions_to_show):
@@ -174,13 +194,9 @@ def display_suggestions(frame, suggestions, position=None, max_suggestions=3):
             text_color = (135, 206, 250)  # Light blue for tips
         
         # Calculate text width for centering
-        (text_width, text_height), _ = cv2.getTextSize(suggestion, cv2.FONT_HERSHEY_SIMPLEX, font_scale, thickness)
+        (text_width, text_height), _ = text_size(suggestion, cv2.FONT_HERSHEY_SIMPLEX, font_scale, thickness)
         text_x = panel_x + (panel_width - text_width) // 2
         
-        # Draw text with shadow for better visibility
-        # Shadow
-        cv2.putText(frame, suggestion, (text_x + 2, y_pos + 2), 
-                    cv2.FONT_HERSHEY_SIMPLEX, font_scale, (0, 0, 0), thickness + 1)
-        # Main text
-        cv2.putText(frame, suggestion, (text_x, y_pos), 
-                    cv2.FONT_HERSHEY_SIMPLEX, font_scale, text_color, thickness)
+        # Draw text with shadow for better visibility, from a bitmap rendered once per string
+        draw_cached_text(frame, suggestion, (text_x, y_pos), cv2.FONT_HERSHEY_SIMPLEX, font_scale,
+                         text_color, thickness, shadow_color=(0, 0, 0))
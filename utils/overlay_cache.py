@@ -0,0 +1,182 @@
+"""
+Overlay Cache Utility
+Pre-renders the static parts of the on-frame indicators once and blits them onto every frame
+"""
+
+import collections
+import functools
+import threading
+
+import cv2
+import numpy as np
+
+
+class StaticOverlay:
+    """
+    A BGRA layer drawn once and composited onto frames of one size.
+
+    `draw(canvas)` is called twice, on a black and on a white BGR canvas;
+    a pixel that comes out the same on both is fully covered, one that
+    differs is partly covered (anti-aliased edges) and its alpha follows
+    from the difference. Drawing code therefore needs no alpha-aware
+    colors and can be the same code that draws onto frames.
+
+    The layer is kept as tight patches around the drawn regions, each with
+    its color and alpha planes and an opaque mask, so compositing only
+    touches the pixels that were drawn.
+
+    Args:
+        frame_shape: Shape of the frames the layer is composited onto
+        draw: Callable drawing the static elements onto a BGR image
+    """
+
+    def __init__(self, frame_shape, draw):
+        height, width = frame_shape[:2]
+        black = np.zeros((height, width, 3), np.uint8)
+        white = np.full((height, width, 3), 255, np.uint8)
+        draw(black)
+        draw(white)
+
+        # On black a pixel is alpha * color, on white alpha * color + (1 - alpha) * 255
+        coverage = 255 - (white.astype(np.int16) - black).max(axis=2)
+        alpha = np.clip(coverage, 0, 255).astype(np.uint8)
+
+        self.patches = []
+        drawn = (alpha > 0).astype(np.uint8)
+        # Group nearby pixels (the glyphs of one label) into one patch
+        groups = cv2.dilate(drawn, np.ones((9, 9), np.uint8))
+        count, _, stats, _ = cv2.connectedComponentsWithStats(groups)
+        for x, y, w, h, _ in stats[1:count]:
+            region = (slice(y, y + h), slice(x, x + w))
+            patch_alpha = alpha[region]
+            opaque = patch_alpha == 255
+            partial = np.nonzero((patch_alpha > 0) & ~opaque)
+            self.patches.append({
+                'region': region,
+                'color': np.ascontiguousarray(black[region]),
+                'alpha': patch_alpha,
+                'opaque': opaque.astype(np.uint8),
+                'partial': partial,
+                # Premultiplied color (plus 0.5 to round) and 1 - alpha of the anti-aliased pixels
+                'partial_color': black[region][partial].astype(np.float32) + 0.5,
+                'partial_keep': (1.0 - patch_alpha[partial] / 255.0)[:, None].astype(np.float32),
+            })
+
+    def apply(self, frame, origin=(0, 0)):
+        """Composite the layer onto frame in place, its top left corner at origin."""
+        origin_x, origin_y = origin
+        height, width = frame.shape[:2]
+        for patch in self.patches:
+            rows, columns = patch['region']
+            y0, y1 = rows.start + origin_y, rows.stop + origin_y
+            x0, x1 = columns.start + origin_x, columns.stop + origin_x
+            if y0 < 0 or x0 < 0 or y1 > height or x1 > width:
+                self._apply_clipped(frame, patch, x0, y0)
+                continue
+            target = frame[y0:y1, x0:x1]
+            # Much faster than np.copyto(..., where=) with a broadcast mask
+            cv2.copyTo(patch['color'], patch['opaque'], target)
+            partial = patch['partial']
+            if len(partial[0]):
+                blended = target[partial] * patch['partial_keep'] + patch['partial_color']
+                target[partial] = blended.astype(np.uint8)
+
+    @staticmethod
+    def _apply_clipped(frame, patch, x0, y0):
+        """Slow path for a patch that sticks out of the frame."""
+        patch_height, patch_width = patch['opaque'].shape
+        top, left = max(-y0, 0), max(-x0, 0)
+        bottom = min(patch_height, frame.shape[0] - y0)
+        right = min(patch_width, frame.shape[1] - x0)
+        if bottom <= top or right <= left:
+            return
+        target = frame[y0 + top:y0 + bottom, x0 + left:x0 + right]
+        crop = (slice(top, bottom), slice(left, right))
+        cv2.copyTo(np.ascontiguousarray(patch['color'][crop]), np.ascontiguousarray(patch['opaque'][crop]), target)
+        rows, columns = patch['partial']
+        inside = (rows >= top) & (rows < bottom) & (columns >= left) & (columns < right)
+        if inside.any():
+            partial = (rows[inside] - top, columns[inside] - left)
+            blended = target[partial] * patch['partial_keep'][inside] + patch['partial_color'][inside]
+            target[partial] = blended.astype(np.uint8)
+
+
+class OverlayCache:
+    """
+    StaticOverlays by frame size and a caller-chosen key, least recently used dropped first.
+
+    Args:
+        max_entries: Overlays kept at once
+    """
+
+    def __init__(self, max_entries=16):
+        self.max_entries = max_entries
+        self.renders = 0
+        self.hits = 0
+        self._overlays = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, frame_shape, draw):
+        """The overlay for key at this frame size, rendering it with draw(canvas) on first use."""
+        cache_key = (key, tuple(frame_shape[:2]))
+        with self._lock:
+            overlay = self._overlays.get(cache_key)
+            if overlay is not None:
+                self._overlays.move_to_end(cache_key)
+                self.hits += 1
+                return overlay
+
+        overlay = StaticOverlay(frame_shape, draw)
+        with self._lock:
+            self._overlays[cache_key] = overlay
+            self.renders += 1
+            while len(self._overlays) > self.max_entries:
+                self._overlays.popitem(last=False)
+        return overlay
+
+    def stats(self):
+        with self._lock:
+            return {'overlays': len(self._overlays), 'renders': self.renders, 'hits': self.hits}
+
+
+# Shared by every session and worker thread of a process; overlays are read-only once rendered
+overlay_cache = OverlayCache()
+# Bitmaps of individual text strings, such as the movement suggestions
+text_cache = OverlayCache(max_entries=128)
+
+
+def apply_static_overlay(frame, key, draw):
+    """Composite the cached static overlay for key onto frame, rendering it on first use."""
+    overlay_cache.get(key, frame.shape, draw).apply(frame)
+
+
+@functools.lru_cache(maxsize=512)
+def text_size(text, font, font_scale, thickness):
+    """cv2.getTextSize, memoized: the labels drawn on every frame come from small fixed sets."""
+    return cv2.getTextSize(text, font, font_scale, thickness)
+
+
+def draw_cached_text(frame, text, position, font, font_scale, color, thickness, shadow_color=None, shadow_offset=2):
+    """
+    cv2.putText through a cached bitmap of the text.
+
+    Produces the same pixels as putText at position, preceded by a shadow
+    drawn shadow_offset pixels down and right with one more thickness
+    when shadow_color is given, but renders each distinct string and style
+    only once.
+    """
+    (text_width, text_height), baseline = text_size(text, font, font_scale, thickness + 1)
+    margin = thickness + 2
+    shadow = shadow_offset if shadow_color is not None else 0
+    size = (text_height + baseline + 2 * margin + shadow, text_width + 2 * margin + shadow)
+    anchor = (margin, margin + text_height)
+
+    def draw(canvas):
+        if shadow_color is not None:
+            cv2.putText(canvas, text, (anchor[0] + shadow_offset, anchor[1] + shadow_offset),
+                        font, font_scale, shadow_color, thickness + 1)
+        cv2.putText(canvas, text, anchor, font, font_scale, color, thickness)
+
+    key = (text, font, font_scale, color, thickness, shadow_color, shadow_offset)
+    sprite = text_cache.get(key, size, draw)
+    sprite.apply(frame, (position[0] - anchor[0], position[1] - anchor[1]))